@@ -580,6 +580,23 @@ act_dispatcher = {
     'complex_cardioid': complex_cardioid
 }
 
+# Cartesian activations apply the same real function to the real and imaginary parts: layers using the split
+#   representation (see `cvnn.layers.set_representation`) apply them directly to the [..., 2] real tensor.
+split_dispatcher = {
+    linear: linear,
+    tf.keras.activations.linear: linear,
+    cart_sigmoid: tf.keras.activations.sigmoid,
+    cart_elu: tf.keras.activations.elu,
+    cart_exponential: tf.keras.activations.exponential,
+    cart_hard_sigmoid: tf.keras.activations.hard_sigmoid,
+    cart_relu: tf.keras.activations.relu,
+    cart_leaky_relu: tf.nn.leaky_relu,
+    cart_selu: tf.keras.activations.selu,
+    cart_softplus: tf.keras.activations.softplus,
+    cart_softsign: tf.keras.activations.softsign,
+    cart_tanh: tf.keras.activations.tanh
+}
+
 if __name__ == '__main__':
     x = tf.constant([-2, 1.0, 0.0, 1.0, -3, 0.8, 0.1], dtype=tf.float32)
     y = tf.constant([-2.5, -1.5, 0.0, 1.0, 2, 0.4, -0.4], dtype=tf.float32)
@@ -1,11 +1,20 @@
 # https://stackoverflow.com/questions/24100558/how-can-i-split-a-module-into-multiple-files-without-breaking-a-backwards-compa/24100645
 from cvnn.layers.pooling import ComplexMaxPooling2D, ComplexAvgPooling2D, ComplexAvgPooling3D, ComplexPolarAvgPooling2D
 from cvnn.layers.pooling import ComplexUnPooling2D, ComplexMaxPooling2DWithArgmax, ComplexAvgPooling1D
-from cvnn.layers.convolutional import ComplexConv2D, ComplexConv1D, ComplexConv3D
-from cvnn.layers.convolutional import ComplexConv2DTranspose
+from cvnn.layers.pooling import ComplexMaxPooling1D, ComplexMaxPooling3D, ComplexUnPooling1D, ComplexUnPooling3D
+from cvnn.layers.pooling import ComplexCircularAvgPooling2D
+from cvnn.layers.convolutional import ComplexConv2D, ComplexConv1D, ComplexConv3D, ComplexConv2Plus1D
+from cvnn.layers.convolutional import ComplexConv2DTranspose, ComplexDepthwiseConv2D, ComplexSeparableConv2D
 from cvnn.layers.core import ComplexInput, ComplexDense, ComplexFlatten, ComplexDropout, complex_input
+from cvnn.layers.core import ComplexLowRankDense, ComplexUnitaryDense
 from cvnn.layers.upsampling import ComplexUpSampling2D
+from cvnn.layers.reshaping import ComplexReshape, ComplexPermute, ComplexCropping2D, ComplexZeroPadding2D
+from cvnn.layers.reshaping import ComplexConcatenate, complex_concatenate
+from cvnn.layers.sparse import ComplexSparseDense, ComplexSparseConv
+from cvnn.layers.quantized import ComplexQuantizedDense, ComplexQuantizedConv
 from cvnn.layers.core import ComplexBatchNormalization
+from cvnn.layers.core import freeze, unfreeze
+from cvnn.layers.core import set_representation, get_representation, complex_to_split, split_to_complex
 
 
 __author__ = 'J. Agustin BARRACHINA'
@@ -1,5 +1,7 @@
 import six
 import functools
+import collections
+from typing import Optional
 import tensorflow as tf
 from packaging import version
 
@@ -23,7 +25,90 @@ from tensorflow.python.ops import nn_ops
 from cvnn.layers.core import ComplexLayer
 from cvnn.initializers import ComplexGlorotUniform, Zeros, ComplexInitializer, INIT_TECHNIQUES
 from cvnn import logger
-from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.activations import cast_to_real
+from cvnn.layers.core import DEFAULT_COMPLEX_TYPE, complex_to_split, split_to_complex, block_kernel, _move_axis
+
+CONV_METHODS = {'standard', 'gauss', 'block', 'fft', 'auto', 'winograd', 'winograd_f4'}
+TRANSPOSE_CONV_METHODS = {'standard', 'gauss', 'block'}
+DEPTHWISE_CONV_METHODS = {'standard', 'gauss'}
+GAUSS_CONV_METHODS = {'gauss', 'winograd', 'winograd_f4'}      # Methods using 3 real products
+FFT_CACHE_SIZE = 4      # Input shapes whose kernel FFT is kept by frozen layers using the fft method
+FFT_KERNEL_SIZE_THRESHOLD = 64      # Number of kernel elements from which conv_method='auto' uses the FFT
+_FFT = {1: tf.signal.fft, 2: tf.signal.fft2d, 3: tf.signal.fft3d}
+_IFFT = {1: tf.signal.ifft, 2: tf.signal.ifft2d, 3: tf.signal.ifft3d}
+
+
+def _kron(a, b):
+    return [[x * y for x in row_a for y in row_b] for row_a in a for row_b in b]
+
+
+# Winograd F(m x m, 3 x 3) matrices (B^T, G, A^T) from Lavin & Gray, "Fast Algorithms for Convolutional Neural
+# Networks", 2016. 2D transforms are Kronecker products of the 1D ones: vec(B^T d B) = kron(B^T, B^T) vec(d).
+_WINOGRAD_1D = {
+    'winograd': (2,
+                 [[1, 0, -1, 0], [0, 1, 1, 0], [0, -1, 1, 0], [0, 1, 0, -1]],
+                 [[1, 0, 0], [1 / 2, 1 / 2, 1 / 2], [1 / 2, -1 / 2, 1 / 2], [0, 0, 1]],
+                 [[1, 1, 1, 0], [0, 1, -1, -1]]),
+    'winograd_f4': (4,
+                    [[4, 0, -5, 0, 1, 0], [0, -4, -4, 1, 1, 0], [0, 4, -4, -1, 1, 0],
+                     [0, -2, -1, 2, 1, 0], [0, 2, -1, -2, 1, 0], [0, 4, 0, -5, 0, 1]],
+                    [[1 / 4, 0, 0], [-1 / 6, -1 / 6, -1 / 6], [-1 / 6, 1 / 6, -1 / 6],
+                     [1 / 24, 1 / 12, 1 / 6], [1 / 24, -1 / 12, 1 / 6], [0, 0, 1]],
+                    [[1, 1, 1, 1, 1, 0], [0, 1, -1, 2, -2, 0], [0, 1, 1, 4, 4, 0], [0, 1, -1, 8, -8, 1]])
+}
+WINOGRAD_TRANSFORMS = {method: (m, _kron(bt, bt), _kron(g, g), _kron(at, at))
+                       for method, (m, bt, g, at) in _WINOGRAD_1D.items()}
+
+
+def _input_parts(inputs):
+    """
+    :return: Tuple (real, imag) of `inputs`, imag is None for real inputs (known zero, see `_complex_convolution`).
+    """
+    if inputs.dtype.is_complex:
+        return tf.math.real(inputs), tf.math.imag(inputs)
+    return inputs, None
+
+
+def _patch_convolution(inputs, product, kernel_size, strides=1, padding='valid', data_format='channels_last',
+                       dilation_rate=1):
+    """
+    1D or 2D convolution computed as a matrix product of the input patches (im2col) with `tf.image.extract_patches`.
+    Complex inputs are converted to real tensors with interleaved real and imaginary parts on the channel axis.
+    :param inputs: Tensor of rank 3 (1D convolution) or 4 (2D convolution).
+    :param product: Callable mapping the real patches of shape (batch, out_h, out_w, k_h * k_w * parts * C)
+        to the real outputs of shape (batch, out_h, out_w, parts * F). parts is 2 for complex inputs, 1 otherwise.
+    :return: Outputs of the convolution, in the same dtype and data format as `inputs`.
+    """
+    rank = inputs.shape.rank - 2
+    kernel_size = conv_utils.normalize_tuple(kernel_size, rank, 'kernel_size')
+    strides = conv_utils.normalize_tuple(strides, rank, 'strides')
+    dilation_rate = conv_utils.normalize_tuple(dilation_rate, rank, 'dilation_rate')
+    if data_format == 'channels_first':
+        inputs = _move_axis(inputs, 1, -1)
+    if padding == 'causal':
+        inputs = tf.pad(inputs, [[0, 0], [(kernel_size[0] - 1) * dilation_rate[0], 0], [0, 0]])
+        padding = 'valid'
+    # 1D convolutions are done as 2D convolutions of height 1
+    to_2d = (lambda values: (1,) + tuple(values)) if rank == 1 else tuple
+    if rank == 1:
+        inputs = tf.expand_dims(inputs, axis=1)
+    is_complex = inputs.dtype.is_complex
+    if is_complex:
+        split_inputs = complex_to_split(inputs)
+        shape = tf.shape(split_inputs)
+        inputs = tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0))
+    patches = tf.image.extract_patches(inputs, sizes=(1,) + to_2d(kernel_size) + (1,),
+                                       strides=(1,) + to_2d(strides) + (1,),
+                                       rates=(1,) + to_2d(dilation_rate) + (1,), padding=padding.upper())
+    outputs = product(patches)
+    if is_complex:
+        shape = tf.shape(outputs)
+        outputs = split_to_complex(tf.reshape(outputs, tf.concat([shape[:-1], [-1, 2]], axis=0)))
+    if rank == 1:
+        outputs = tf.squeeze(outputs, axis=1)
+    if data_format == 'channels_first':
+        outputs = _move_axis(outputs, -1, 1)
+    return outputs
 
 
 class ComplexConv(Layer, ComplexLayer):
@@ -91,6 +176,23 @@ class ComplexConv(Layer, ComplexLayer):
             - 'mirror': Uses the initializer for both real and imaginary part.
                 Note that some initializers such as Glorot or He will lose it's property if initialized this way.
             - 'zero_imag': Initializer real part and let imaginary part to zero.
+        :param conv_method: One of 'standard', 'gauss', 'block', 'fft' or 'auto'. Algorithm used to compute the
+            complex convolution.
+            - 'standard': Uses 4 real convolutions (r*r, i*i, r*i, i*r).
+            - 'gauss': Uses Gauss' (Karatsuba) trick, only 3 real convolutions over summed inputs and kernels.
+                Saves 25% of the convolution FLOPs at the cost of a few element-wise additions.
+            - 'block': Interleaves real and imaginary parts on the channel axis and uses a single real convolution
+                with the block kernel [[kernel_r, kernel_i], [-kernel_i, kernel_r]].
+                Only one (larger) convolution is launched and no intermediate outputs are kept.
+            - 'fft': Convolution in the frequency domain, O(N log N) instead of O(N K) for input size N and
+                kernel size K. Worth it for large kernels. While the layer is frozen (see `freeze`),
+                the kernel FFT of the last `FFT_CACHE_SIZE` input shapes is cached between (eager) inference calls.
+            - 'auto': 'fft' if the kernel has at least `FFT_KERNEL_SIZE_THRESHOLD` elements, 'standard' otherwise.
+            - 'winograd' / 'winograd_f4': Winograd minimal filtering F(2x2, 3x3) / F(4x4, 3x3) with Gauss' trick
+                for the complex products. Only for 2D 3x3 kernels with strides 1, no dilation and no groups.
+                Uses 16 (resp. 36) instead of 36 (resp. 144) multiplications per 2x2 (resp. 4x4) output tile and
+                channel pair. While the layer is frozen, the transformed kernel is cached.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
       """
 
     def __init__(self, rank, filters, kernel_size, dtype=DEFAULT_COMPLEX_TYPE, strides=1, padding='valid', data_format=None, dilation_rate=1,
@@ -98,8 +200,9 @@ class ComplexConv(Layer, ComplexLayer):
                  kernel_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
                  kernel_regularizer=None, bias_regularizer=None,  # TODO: Not yet working
                  activity_regularizer=None, kernel_constraint=None, bias_constraint=None,
-                 init_technique: str = 'mirror',
-                 trainable=True, name=None, conv_op=None, **kwargs):
+                 init_technique: str = 'mirror', conv_method: str = 'standard',
+                 trainable=True, name=None, conv_op=None, representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
         if kernel_regularizer is not None or bias_regularizer is not None:
             logger.warning(f"Sorry, regularizers are not implemented yet, this parameter will take no effect")
         super(ComplexConv, self).__init__(
@@ -131,7 +234,8 @@ class ComplexConv(Layer, ComplexLayer):
         self.bias_regularizer = regularizers.get(bias_regularizer)
         self.kernel_constraint = constraints.get(kernel_constraint)
         self.bias_constraint = constraints.get(bias_constraint)
-        self.input_spec = InputSpec(min_ndim=self.rank + 2)
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=self.rank + 2))
+        self.conv_method = conv_method.lower()
 
         self._validate_init()
         self._is_causal = self.padding == 'causal'
@@ -156,8 +260,17 @@ class ComplexConv(Layer, ComplexLayer):
             raise ValueError('Causal padding is only supported for `Conv1D`'
                              'and `SeparableConv1D`.')
 
+        if self.conv_method not in CONV_METHODS:
+            raise ValueError(f"Unsupported conv_method {self.conv_method}, "
+                             f"supported methods are {CONV_METHODS}")
+        if self.conv_method in WINOGRAD_TRANSFORMS and (
+                self.rank != 2 or self.kernel_size != (3, 3) or self.strides != (1, 1) or
+                self.dilation_rate != (1, 1) or self.groups != 1):
+            raise ValueError(f"conv_method {self.conv_method} is only supported for 2D 3x3 kernels "
+                             f"with strides 1, no dilation and groups=1")
+
     def build(self, input_shape):
-        input_shape = tf.TensorShape(input_shape)
+        input_shape = self._complex_shape(input_shape)
         input_channel = self._get_input_channel(input_shape)
         if input_channel % self.groups != 0:
             raise ValueError(
@@ -165,73 +278,61 @@ class ComplexConv(Layer, ComplexLayer):
                 f'of groups. Received groups={self.groups}, but the input has {input_channel} channels '
                 f'(full input shape is {input_shape}).')
         kernel_shape = self.kernel_size + (input_channel // self.groups, self.filters)
-        if self.my_dtype.is_complex:
-            i_kernel_dtype = self.my_dtype if isinstance(self.kernel_initializer,
-                                                         ComplexInitializer) else self.my_dtype.real_dtype
-            i_bias_dtype = self.my_dtype if isinstance(self.bias_initializer,
-                                                       ComplexInitializer) else self.my_dtype.real_dtype
-            i_kernel_initializer = self.kernel_initializer
-            i_bias_initializer = self.bias_initializer
-            if not isinstance(self.kernel_initializer, ComplexInitializer):
-                tf.print(f"WARNING: you are using a Tensorflow Initializer for complex numbers. "
-                         f"Using {self.init_technique} method.")
-                if self.init_technique in INIT_TECHNIQUES:
-                    if self.init_technique == 'zero_imag':
-                        # This section is done to initialize with tf initializers, making imaginary part zero
-                        i_kernel_initializer = initializers.Zeros()
-                        i_bias_initializer = initializers.Zeros()
-                else:
-                    raise ValueError(f"Unsuported init_technique {self.init_technique}, "
-                                     f"supported techniques are {INIT_TECHNIQUES}")
-            self.kernel_r = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=i_kernel_dtype),
-                name='kernel_r',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer,
-            self.kernel_i = tf.Variable(
-                initial_value=i_kernel_initializer(shape=kernel_shape, dtype=i_kernel_dtype),
-                name='kernel_i',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer
-            if self.use_bias:
-                self.bias_r = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=i_bias_dtype),
-                    name='bias_r',
-                    trainable=True
-                )
-                self.bias_i = tf.Variable(
-                    initial_value=i_bias_initializer(shape=(self.filters,), dtype=i_bias_dtype),
-                    name='bias_i',
-                    constraint=self.bias_constraint,
-                    trainable=True
-                )  # TODO: regularizer=self.bias_regularizer
-        else:
-            self.kernel = self.add_weight(
-                name='kernel',
-                shape=kernel_shape,
-                initializer=self.kernel_initializer,
-                regularizer=self.kernel_regularizer,
-                constraint=self.kernel_constraint,
-                trainable=True,
-                dtype=self.my_dtype)
-            if self.use_bias:
-                self.bias = self.add_weight(
-                    name='bias',
-                    shape=(self.filters,),
-                    initializer=self.bias_initializer,
-                    regularizer=self.bias_regularizer,
-                    constraint=self.bias_constraint,
-                    trainable=True,
-                    dtype=self.my_dtype)
+        self._check_init_technique()
+        self._add_complex_weight('kernel', kernel_shape, self.kernel_initializer,
+                                 self.kernel_regularizer, self.kernel_constraint)
+        if self.use_bias:
+            self._add_complex_weight('bias', (self.filters,), self.bias_initializer,
+                                     self.bias_regularizer, self.bias_constraint)
         if not self.use_bias:
             self.bias = None
         channel_axis = self._get_channel_axis()
-        self.input_spec = InputSpec(min_ndim=self.rank + 2,
-                                    axes={channel_axis: input_channel})
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=self.rank + 2,
+                                                           axes={channel_axis: input_channel}))
         self.built = True
 
+    def _check_init_technique(self):
+        if self.my_dtype.is_complex and not isinstance(self.kernel_initializer, ComplexInitializer):
+            tf.print(f"WARNING: you are using a Tensorflow Initializer for complex numbers. "
+                     f"Using {self.init_technique} method.")
+            if self.init_technique not in INIT_TECHNIQUES:
+                raise ValueError(f"Unsuported init_technique {self.init_technique}, "
+                                 f"supported techniques are {INIT_TECHNIQUES}")
+
+    def _add_complex_weight(self, name, shape, initializer, regularizer=None, constraint=None):
+        """
+        Creates the weight `name` with the layer dtype.
+            - Complex weights are stored as two variables `name_r` and `name_i`.
+                If the initializer is not a `ComplexInitializer`, the imaginary part follows `self.init_technique`.
+            - Real weights are a single weight `name`.
+        """
+        if not self.my_dtype.is_complex:
+            setattr(self, name, self.add_weight(name=name, shape=shape, initializer=initializer,
+                                                regularizer=regularizer, constraint=constraint,
+                                                trainable=True, dtype=self.my_dtype))
+            return
+        if isinstance(initializer, ComplexInitializer):
+            init_dtype = self.my_dtype
+            imag_initializer = initializer
+        else:
+            init_dtype = self.my_dtype.real_dtype
+            # This section is done to initialize with tf initializers, making imaginary part zero
+            imag_initializer = initializers.Zeros() if self.init_technique == 'zero_imag' else initializer
+        # TODO: regularizer
+        setattr(self, name + '_r', tf.Variable(initial_value=initializer(shape=shape, dtype=init_dtype),
+                                               name=name + '_r', constraint=constraint, trainable=True))
+        setattr(self, name + '_i', tf.Variable(initial_value=imag_initializer(shape=shape, dtype=init_dtype),
+                                               name=name + '_i', constraint=constraint, trainable=True))
+
+    def _get_complex_weight(self, name):
+        """
+        :return: Tuple (real, imag) of the weight `name` created with `_add_complex_weight`.
+        """
+        if self.my_dtype.is_complex:
+            return getattr(self, name + '_r'), getattr(self, name + '_i')
+        weight = getattr(self, name)
+        return self._cached(name, lambda: (tf.math.real(weight), tf.math.imag(weight)))
+
     def convolution_op(self, inputs, kernel):
         # Convert Keras formats to TF native formats.
         if self.padding == 'causal':
@@ -241,6 +342,16 @@ class ComplexConv(Layer, ComplexLayer):
         else:
             tf_padding = self.padding
 
+        if self.groups > 1:
+            # TF CPU kernels do not support grouped convolutions: one convolution per group.
+            # Works for the block kernel too as interleaved channels keep each group contiguous.
+            channel_axis = self._get_channel_axis()
+            outputs = [tf.nn.convolution(group_inputs, group_kernel, strides=list(self.strides),
+                                         padding=tf_padding, dilations=list(self.dilation_rate),
+                                         data_format=self._tf_data_format, name=self.__class__.__name__)
+                       for group_inputs, group_kernel in zip(tf.split(inputs, self.groups, axis=channel_axis),
+                                                             tf.split(kernel, self.groups, axis=-1))]
+            return tf.concat(outputs, axis=channel_axis)
         return tf.nn.convolution(
             inputs,
             kernel,
@@ -259,55 +370,314 @@ class ComplexConv(Layer, ComplexLayer):
             4. Activation Function
         :returns: A tensor of rank 4+ representing `activation(conv2d(inputs, kernel) + bias)`.
         """
-        if inputs.dtype != self.my_dtype:
+        inputs = self._complex_view(inputs)
+        if self.my_dtype.is_complex and not inputs.dtype.is_complex:
+            # Real inputs are kept real: the products with their (zero) imaginary part are skipped
+            inputs = tf.cast(inputs, self.my_dtype.real_dtype)
+        elif inputs.dtype != self.my_dtype:
             tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
-            if self.my_dtype.is_complex and inputs.dtype.is_floating:
-                tf.print("\tThis is normally fixed using ComplexInput() "
-                         "at the start (tf casts input automatically to real).")
             inputs = tf.cast(inputs, self.my_dtype)
         if self._is_causal:  # Apply causal padding to inputs for Conv1D.
             inputs = tf.pad(inputs, self._compute_causal_padding(inputs))
         # Convolution
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        if self.my_dtype.is_complex:
-            kernel_r = self.kernel_r
-            kernel_i = self.kernel_i
-            if self.use_bias:
-                bias = tf.complex(self.bias_r, self.bias_i)
-        else:
-            kernel_r = tf.math.real(self.kernel)
-            kernel_i = tf.math.imag(self.kernel)    # TODO: Check they are all zero
-            if self.use_bias:
-                bias = self.bias
-        real_outputs = self.convolution_op(inputs_r, kernel_r) - self.convolution_op(inputs_i, kernel_i)
-        imag_outputs = self.convolution_op(inputs_r, kernel_i) + self.convolution_op(inputs_i, kernel_r)
-        outputs = tf.cast(tf.complex(real_outputs, imag_outputs), dtype=self.my_dtype)
+        outputs = self._convolve(inputs)
         # Add bias
-        if self.use_bias:
-            output_rank = outputs.shape.rank
-            if self.rank == 1 and self._channels_first:
-                # tf.nn.bias_add does not accept a 1D input tensor.
-                bias = tf.reshape(bias, (1, self.filters, 1))
-                outputs += bias
-            else:
-                # Handle multiple batch dimensions.
-                if output_rank is not None and output_rank > 2 + self.rank:
-
-                    def _apply_fn(o):
-                        # TODO: Will this bias be visible? Horrible
-                        return tf.nn.bias_add(o, bias, data_format=self._tf_data_format)
-
-                    outputs = nn_ops.squeeze_batch_dims(
-                        outputs, _apply_fn, inner_rank=self.rank + 1)
-                else:
-                    outputs = tf.nn.bias_add(
-                        outputs, bias, data_format=self._tf_data_format)
+        outputs = self._add_bias(outputs)
         # Activation function
         if self.activation is not None:
-            outputs = self.activation(outputs)
+            return self._activate(outputs, self.activation)
+        return self._to_representation(outputs)
+
+    def _add_bias(self, outputs):
+        if not self.use_bias:
+            return outputs
+        bias = self._get_bias()
+        if bias.dtype.is_complex and not outputs.dtype.is_complex:
+            bias = tf.math.real(bias)       # See `_real_output`
+        output_rank = outputs.shape.rank
+        if self.rank == 1 and self._channels_first:
+            # tf.nn.bias_add does not accept a 1D input tensor.
+            bias = tf.reshape(bias, (1, self.filters, 1))
+            outputs += bias
+        else:
+            # Handle multiple batch dimensions.
+            if output_rank is not None and output_rank > 2 + self.rank:
+
+                def _apply_fn(o):
+                    # TODO: Will this bias be visible? Horrible
+                    return tf.nn.bias_add(o, bias, data_format=self._tf_data_format)
+
+                outputs = nn_ops.squeeze_batch_dims(
+                    outputs, _apply_fn, inner_rank=self.rank + 1)
+            else:
+                outputs = tf.nn.bias_add(
+                    outputs, bias, data_format=self._tf_data_format)
         return outputs
 
+    def _get_kernel(self):
+        """
+        :return: Tuple (kernel_r, kernel_i) with the real and imaginary parts of the kernel.
+        """
+        return self._get_complex_weight('kernel')
+
+    def _get_bias(self):
+        if self.my_dtype.is_complex:
+            return self._cached('bias', lambda: tf.complex(self.bias_r, self.bias_i))
+        return self.bias
+
+    def _precompute_weights(self):
+        if self.use_bias:
+            self._get_bias()
+        if self.conv_method == 'block' and self.my_dtype.is_complex:
+            self._cached('block_kernel', lambda: self._block_kernel(*self._get_kernel()))
+
+    def _convolve(self, inputs):
+        """
+        Convolution of `inputs` (already padded if causal) with the layer kernel. Neither bias nor activation.
+        Real inputs, real layers and layers with real outputs (see `_real_output`) skip the products known to be zero.
+        """
+        kernel_r, kernel_i = self._get_kernel()
+        conv_method = self._get_conv_method()
+        if conv_method == 'fft':
+            return self._fft_convolution(inputs, kernel_r, kernel_i)
+        if conv_method in WINOGRAD_TRANSFORMS:
+            return self._winograd_convolution(tf.cast(inputs, self.my_dtype), kernel_r, kernel_i)
+        real_output = self._real_output()
+        if conv_method == 'block' and self.my_dtype.is_complex and inputs.dtype.is_complex and not real_output:
+            return self._block_convolution(inputs, kernel_r, kernel_i)
+        return self._combine_parts(*self._complex_convolution(*_input_parts(inputs),
+                                                              *self._known_parts(kernel_r, kernel_i),
+                                                              real_output=real_output))
+
+    def _real_output(self) -> bool:
+        """
+        :return: True if the activation only keeps the real part of the outputs (`cast_to_real`).
+            The imaginary part is then not computed and the convolution (and bias) outputs are real.
+        """
+        return self.my_dtype.is_complex and self.activation is cast_to_real
+
+    def _known_parts(self, weight_r, weight_i):
+        """
+        :return: Tuple (real, imag) of a weight (see `_get_complex_weight`),
+            imag is None for real layers (known zero, see `_complex_convolution`).
+        """
+        return (weight_r, weight_i) if self.my_dtype.is_complex else (weight_r, None)
+
+    def _combine_parts(self, outputs_r, outputs_i):
+        """
+        :return: Outputs with the layer dtype, real (the real dtype of the layer) if `outputs_i` is None.
+        """
+        if outputs_i is None:
+            return tf.cast(outputs_r, self.my_dtype.real_dtype)
+        return tf.cast(tf.complex(outputs_r, outputs_i), dtype=self.my_dtype)
+
+    def _get_conv_method(self):
+        if self.conv_method == 'auto':
+            kernel_elements = functools.reduce(lambda a, b: a * b, self.kernel_size)
+            return 'fft' if kernel_elements >= FFT_KERNEL_SIZE_THRESHOLD else 'standard'
+        return self.conv_method
+
+    def _complex_convolution(self, inputs_r, inputs_i, kernel_r, kernel_i, convolution_op=None,
+                             real_output: bool = False):
+        """
+        Computes the complex convolution of (inputs_r + j inputs_i) with (kernel_r + j kernel_i)
+            using only real-valued convolutions, following `self.conv_method`.
+        Imaginary parts known to be zero are given as None and their products are skipped:
+            2 real products for real inputs or a real kernel, 1 if both are real.
+        :param convolution_op: Real-valued (bilinear) operation `op(inputs, kernel)`.
+            Defaults to `self.convolution_op`.
+        :param real_output: If True, only the real part of the outputs is computed (2 real products at most).
+        :return: Tuple (real_outputs, imag_outputs), imag_outputs is None if the outputs are real.
+        """
+        if convolution_op is None:
+            convolution_op = self.convolution_op
+        if inputs_i is None or kernel_i is None or real_output:
+            real_outputs = convolution_op(inputs_r, kernel_r)
+            if inputs_i is not None and kernel_i is not None:
+                real_outputs -= convolution_op(inputs_i, kernel_i)
+            if real_output or (inputs_i is None and kernel_i is None):
+                return real_outputs, None
+            if inputs_i is None:
+                return real_outputs, convolution_op(inputs_r, kernel_i)
+            return real_outputs, convolution_op(inputs_i, kernel_r)
+        if self.conv_method in GAUSS_CONV_METHODS:
+            # (a + jb)(c + jd) = (ac - bd) + j((a + b)(c + d) - ac - bd)
+            real_real = convolution_op(inputs_r, kernel_r)
+            imag_imag = convolution_op(inputs_i, kernel_i)
+            cross = convolution_op(inputs_r + inputs_i, kernel_r + kernel_i)
+            return real_real - imag_imag, cross - real_real - imag_imag
+        real_outputs = convolution_op(inputs_r, kernel_r) - convolution_op(inputs_i, kernel_i)
+        imag_outputs = convolution_op(inputs_r, kernel_i) + convolution_op(inputs_i, kernel_r)
+        return real_outputs, imag_outputs
+
+    @staticmethod
+    def _block_kernel(kernel_r, kernel_i):
+        """
+        Real kernel of shape (..., 2 * in_channels, 2 * out_channels) equivalent to the complex kernel.
+        Complex channel c is mapped to the real channels (2c, 2c + 1) holding its real and imaginary parts.
+        """
+        return block_kernel(kernel_r, kernel_i)
+
+    def _block_convolution(self, inputs, kernel_r, kernel_i, convolution_op=None):
+        """
+        Complex convolution done with one real convolution.
+        Real and imaginary parts are interleaved on the channel axis (a bitcast for channels_last, no copy)
+            and convolved with the block kernel of `_block_kernel`.
+        """
+        if convolution_op is None:
+            convolution_op = self.convolution_op
+        split_inputs = complex_to_split(inputs)      # (..., 2)
+        rank = split_inputs.shape.rank
+        if self._channels_first:
+            # Move the (real, imag) axis next to the channels: (batch, C, ..., 2) -> (batch, C, 2, ...)
+            channel_axis = rank - self.rank - 2
+            perm = list(range(channel_axis + 1)) + [rank - 1] + list(range(channel_axis + 1, rank - 1))
+            split_inputs = tf.transpose(split_inputs, perm)
+            shape = tf.shape(split_inputs)
+            interleaved = tf.reshape(split_inputs, tf.concat([shape[:channel_axis], [-1], shape[channel_axis + 2:]],
+                                                             axis=0))
+        else:
+            shape = tf.shape(split_inputs)
+            interleaved = tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0))
+        outputs = convolution_op(interleaved, self._cached('block_kernel',
+                                                            lambda: self._block_kernel(kernel_r, kernel_i)))
+        shape = tf.shape(outputs)
+        if self._channels_first:
+            channel_axis = rank - self.rank - 2
+            outputs = tf.reshape(outputs, tf.concat([shape[:channel_axis], [-1, 2], shape[channel_axis + 1:]],
+                                                    axis=0))
+            perm = list(range(channel_axis + 1)) + list(range(channel_axis + 2, rank)) + [channel_axis + 1]
+            outputs = tf.transpose(outputs, perm)
+        else:
+            outputs = tf.reshape(outputs, tf.concat([shape[:-1], [-1, 2]], axis=0))
+        return tf.cast(split_to_complex(outputs), dtype=self.my_dtype)
+
+    def _fft_convolution(self, inputs, kernel_r, kernel_i):
+        """
+        Convolution (cross-correlation) computed as a product in the frequency domain.
+        Inputs are padded as the spatial convolution would, then each output channel is
+            ifft(sum_c fft(inputs_c) * fft(flipped_kernel_c)) of which only the valid (non circular) part is kept.
+            Dilation is done by inserting zeros in the kernel and strides by sub-sampling the output.
+        """
+        complex_dtype = self.my_dtype if self.my_dtype.is_complex else tf.complex(
+            tf.zeros((), self.my_dtype), tf.zeros((), self.my_dtype)).dtype
+        inputs = tf.cast(inputs, complex_dtype)
+        input_rank = inputs.shape.rank
+        spatial_axes = list(range(input_rank - self.rank - 1, input_rank - 1))
+        if not self._channels_first:    # Spatial axes last: (batch, ..., channels) -> (batch, channels, ...)
+            inputs = tf.transpose(inputs, list(range(spatial_axes[0])) + [input_rank - 1] + spatial_axes)
+        dilated_size = [(k - 1) * d + 1 for k, d in zip(self.kernel_size, self.dilation_rate)]
+        if self.padding == 'same':
+            paddings = [[0, 0]] * (input_rank - self.rank)
+            for i in range(self.rank):
+                length = tf.shape(inputs)[input_rank - self.rank + i]
+                out_length = (length + self.strides[i] - 1) // self.strides[i]
+                total = tf.maximum((out_length - 1) * self.strides[i] + dilated_size[i] - length, 0)
+                paddings.append([total // 2, total - total // 2])
+            inputs = tf.pad(inputs, paddings)
+        fft_shape = tf.shape(inputs)[-self.rank:]
+
+        def kernel_fft():
+            kernel = tf.cast(tf.complex(kernel_r, kernel_i), complex_dtype)
+            for axis, dilation in enumerate(self.dilation_rate):
+                if dilation > 1:    # Insert dilation - 1 zeros between kernel elements
+                    shape = kernel.shape.as_list()
+                    kernel = tf.pad(tf.expand_dims(kernel, axis + 1),
+                                    [[0, 0]] * (axis + 1) + [[0, dilation - 1]] + [[0, 0]] * (len(shape) - axis - 1))
+                    shape[axis] *= dilation
+                    kernel = tf.reshape(kernel, shape)[(slice(None),) * axis + (slice(0, dilated_size[axis]),)]
+            kernel = tf.reverse(kernel, axis=list(range(self.rank)))    # Cross-correlation
+            kernel = tf.transpose(kernel, [self.rank, self.rank + 1] + list(range(self.rank)))     # (in, out, ...)
+            kernel = tf.pad(kernel, tf.concat([tf.zeros((2, 2), dtype=tf.int32),
+                                               tf.stack([tf.zeros_like(fft_shape), fft_shape - dilated_size], axis=1)],
+                                              axis=0))
+            return _FFT[self.rank](kernel)
+
+        if tf.executing_eagerly() and self._is_frozen():
+            # One kernel FFT per padded input shape, only the last FFT_CACHE_SIZE shapes are kept
+            fft_kernels = self._cached('fft_kernels', collections.OrderedDict)
+            key = tuple(fft_shape.numpy().tolist())
+            if key not in fft_kernels:
+                fft_kernels[key] = kernel_fft()
+                if len(fft_kernels) > FFT_CACHE_SIZE:
+                    fft_kernels.popitem(last=False)
+            fft_kernel = fft_kernels[key]
+        else:
+            fft_kernel = kernel_fft()
+        spatial = 'xyz'[:self.rank]
+        fft_inputs = _FFT[self.rank](inputs)
+        # Split channels by group: (..., groups * c, spatial) -> (..., groups, c, spatial)
+        inputs_shape = tf.shape(fft_inputs)
+        channel_axis = fft_inputs.shape.rank - self.rank - 1
+        fft_inputs = tf.reshape(fft_inputs, tf.concat([inputs_shape[:channel_axis], [self.groups, -1],
+                                                       inputs_shape[channel_axis + 1:]], axis=0))
+        kernel_shape = tf.shape(fft_kernel)
+        fft_kernel = tf.reshape(fft_kernel, tf.concat([kernel_shape[:1], [self.groups, -1], kernel_shape[2:]],
+                                                      axis=0))
+        fft_outputs = tf.einsum(f"...gc{spatial},cgf{spatial}->...gf{spatial}", fft_inputs, fft_kernel)
+        outputs_shape = tf.shape(fft_outputs)
+        outputs = _IFFT[self.rank](tf.reshape(fft_outputs, tf.concat([outputs_shape[:channel_axis], [-1],
+                                                                      outputs_shape[channel_axis + 2:]], axis=0)))
+        # Keep the part not affected by the circular convolution, sub-sampled by the strides
+        outputs = outputs[(Ellipsis,) + tuple(slice(k - 1, None, s) for k, s in zip(dilated_size, self.strides))]
+        if not self._channels_first:
+            outputs = tf.transpose(outputs, list(range(spatial_axes[0])) + [i + 1 for i in spatial_axes] +
+                                   [spatial_axes[0]])
+        return tf.cast(outputs, dtype=self.my_dtype)
+
+    def _winograd_convolution(self, inputs, kernel_r, kernel_i):
+        """
+        Winograd convolution F(m x m, 3 x 3) of rank 4 `inputs`.
+        The (padded) input is cut into overlapping (m + 2) x (m + 2) tiles d, each giving an m x m output tile
+            Y = A^T [(G g G^T) * (B^T d B)] A.
+        All transforms are a single tensordot with the Kronecker product matrices and the channel mixing is,
+            for each of the (m + 2)^2 tile elements, a (batched) complex matrix product.
+        """
+        m, input_transform, kernel_transform, output_transform = WINOGRAD_TRANSFORMS[self.conv_method]
+        alpha = m + 2
+        real_dtype = kernel_r.dtype
+        if self._channels_first:
+            inputs = _move_axis(inputs, 1, -1)
+        if self.padding == 'same':
+            inputs = tf.pad(inputs, [[0, 0], [1, 1], [1, 1], [0, 0]])
+        shape = tf.shape(inputs)
+        out_h, out_w = shape[1] - 2, shape[2] - 2
+        tiles_h, tiles_w = (out_h + m - 1) // m, (out_w + m - 1) // m
+        inputs = tf.pad(inputs, [[0, 0], [0, tiles_h * m - out_h], [0, tiles_w * m - out_w], [0, 0]])
+        # Real and imaginary parts on a last axis (of size 1 for real layers)
+        parts = complex_to_split(inputs) if inputs.dtype.is_complex else tf.expand_dims(inputs, axis=-1)
+        tiles = tf.stack([parts[:, i:i + tiles_h * m:m, j:j + tiles_w * m:m]
+                          for i in range(alpha) for j in range(alpha)])      # (alpha^2, batch, th, tw, C, parts)
+        tiles = tf.tensordot(tf.constant(input_transform, dtype=real_dtype), tiles, axes=1)
+        tiles = tf.reshape(tiles, tf.stack([alpha * alpha, -1, shape[3], tf.shape(parts)[-1]]))
+
+        def transform_kernel():
+            kernel_shape = kernel_r.shape.as_list()
+            transform = tf.constant(kernel_transform, dtype=real_dtype)
+            return (tf.tensordot(transform, tf.reshape(kernel_r, [9] + kernel_shape[2:]), axes=1),
+                    tf.tensordot(transform, tf.reshape(kernel_i, [9] + kernel_shape[2:]), axes=1))
+
+        transformed_r, transformed_i = self._cached('winograd_kernel', transform_kernel)   # (alpha^2, C, F)
+        if inputs.dtype.is_complex:
+            products = tf.stack(self._complex_convolution(tiles[..., 0], tiles[..., 1],
+                                                          transformed_r, transformed_i, convolution_op=tf.matmul),
+                                axis=-1)
+        else:
+            products = tf.expand_dims(tf.matmul(tiles[..., 0], transformed_r), axis=-1)
+        outputs = tf.tensordot(tf.constant(output_transform, dtype=real_dtype), products, axes=1)
+        # (m * m, batch * th * tw, F, parts) -> (batch, th * m, tw * m, F, parts)
+        outputs = tf.reshape(outputs, tf.stack([m, m, shape[0], tiles_h, tiles_w, self.filters, -1]))
+        outputs = tf.transpose(outputs, [2, 3, 0, 4, 1, 5, 6])
+        outputs = tf.reshape(outputs, tf.stack([shape[0], tiles_h * m, tiles_w * m, self.filters, -1]))
+        outputs = outputs[:, :out_h, :out_w]
+        if inputs.dtype.is_complex:
+            outputs = tf.complex(outputs[..., 0], outputs[..., 1])
+        else:
+            outputs = outputs[..., 0]
+        if self._channels_first:
+            outputs = _move_axis(outputs, -1, 1)
+        return tf.cast(outputs, dtype=self.my_dtype)
+
     def _spatial_output_shape(self, spatial_input_shape):
         return [
             conv_utils.conv_output_length(
@@ -354,7 +724,9 @@ class ComplexConv(Layer, ComplexLayer):
             'activity_regularizer': regularizers.serialize(self.activity_regularizer),
             'kernel_constraint': constraints.serialize(self.kernel_constraint),
             'bias_constraint': constraints.serialize(self.bias_constraint),
-            'dtype': self.my_dtype
+            'dtype': self.my_dtype,
+            'conv_method': self.conv_method,
+            'representation': self._get_representation()
         })
         return config
 
@@ -402,8 +774,8 @@ class ComplexConv(Layer, ComplexLayer):
                            kernel_initializer=self.kernel_initializer, bias_initializer=self.bias_initializer,
                            kernel_regularizer=self.kernel_regularizer, bias_regularizer=self.bias_regularizer,
                            activity_regularizer=self.activity_regularizer, kernel_constraint=self.kernel_constraint,
-                           bias_constraint=self.bias_constraint, trainable=self.trainable,
-                           name=self.name + "_real_equiv")
+                           bias_constraint=self.bias_constraint, conv_method=self.conv_method,
+                           trainable=self.trainable, name=self.name + "_real_equiv")
 
 
 class ComplexConv1D(ComplexConv):
@@ -445,6 +817,59 @@ class ComplexConv1D(ComplexConv):
             bias_constraint=constraints.get(bias_constraint),
             **kwargs)
 
+    def reset_stream(self, batch_size: int = 1):
+        """
+        Starts (or restarts) streaming inference with `stream_step`.
+        The layer keeps the last `dilation_rate * (kernel_size - 1)` input samples it received,
+            initialized to zero as the causal padding would.
+        Only available for built layers with `padding='causal'` and `strides=1`.
+        :param batch_size: Number of independent streams processed in parallel.
+        """
+        if self.padding != 'causal' or self.strides[0] != 1:
+            raise ValueError(f"Streaming is only supported for padding='causal' and strides=1, "
+                             f"got padding={self.padding} and strides={self.strides}")
+        if not self.built:
+            raise ValueError(f"{self.name} must be built (called once or built with the input shape) "
+                             f"before streaming, the number of input channels is unknown.")
+        input_channel = self._get_kernel()[0].shape[-2] * self.groups
+        memory = self.dilation_rate[0] * (self.kernel_size[0] - 1)
+        buffer_shape = (batch_size, input_channel, memory) if self._channels_first \
+            else (batch_size, memory, input_channel)
+        # object.__setattr__ so that keras does not add the buffer to the layer weights
+        object.__setattr__(self, '_stream_buffer', tf.Variable(tf.zeros(buffer_shape, dtype=self.my_dtype),
+                                                               trainable=False, name='stream_buffer'))
+
+    def stream_step(self, frame):
+        """
+        Streaming version of `call`. Each call receives the following samples of the input sequence
+            and returns the corresponding output samples, as if the full sequence had been given to `call`.
+        The cost of a step only depends on the kernel size and the number of new samples, not on the past sequence.
+        Chain the `stream_step` of each layer to stream a stack of causal layers.
+        :param frame: New samples of shape (batch_size, channels) for a single sample
+            or (batch_size, samples, channels) (channels_first: (batch_size, channels, samples)).
+        :return: Output samples with the same layout as `frame`.
+        """
+        if getattr(self, '_stream_buffer', None) is None:
+            self.reset_stream(batch_size=frame.shape[0])
+        time_axis = -1 if self._channels_first else -2
+        frame = tf.cast(self._complex_view(frame), self.my_dtype)
+        single_sample = frame.shape.rank == 2
+        if single_sample:
+            frame = tf.expand_dims(frame, axis=time_axis)
+        window = tf.concat([self._stream_buffer, frame], axis=time_axis)
+        memory = self._stream_buffer.shape[time_axis]
+        if memory > 0:
+            if self._channels_first:
+                self._stream_buffer.assign(window[..., -memory:])
+            else:
+                self._stream_buffer.assign(window[..., -memory:, :])
+        outputs = self._add_bias(self._convolve(window))
+        if single_sample:
+            outputs = tf.squeeze(outputs, axis=time_axis)
+        if self.activation is not None:
+            return self._activate(outputs, self.activation)
+        return self._to_representation(outputs)
+
 
 class ComplexConv2D(ComplexConv):
     """2D convolution layer (e.g. spatial convolution over images).
@@ -666,6 +1091,114 @@ class ComplexConv3D(ComplexConv):
             **kwargs)
 
 
+class ComplexConv2Plus1D(ComplexConv3D):
+    """
+    Factorized 3D complex convolution, (2+1)D [Tran et al., 2018].
+    The (depth, height, width) kernel is replaced by a spatial (height, width) convolution
+        to `intermediate_filters` channels followed by a 1D convolution along the depth axis.
+    Using 2D and 1D convolutions instead of the (slow on CPU) conv3d, with fewer parameters and FLOPs.
+    The output shape is the same as for `ComplexConv3D` with the same arguments.
+    Arguments are those of `ComplexConv3D` except:
+        - intermediate_filters: Number of channels between both convolutions.
+            Defaults to the value that keeps the number of parameters of the full 3D kernel:
+            `kd * kh * kw * in * filters // (kh * kw * in + kd * filters)`.
+        - groups: Not supported.
+        - conv_method: Only 'standard' and 'gauss' are supported (used for both convolutions).
+    """
+
+    def __init__(self, filters, kernel_size, intermediate_filters: Optional[int] = None, dtype=DEFAULT_COMPLEX_TYPE,
+                 strides=(1, 1, 1), padding='valid', data_format=None, dilation_rate=(1, 1, 1), activation=None,
+                 use_bias=True, kernel_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
+                 kernel_regularizer=None, bias_regularizer=None, activity_regularizer=None,
+                 kernel_constraint=None, bias_constraint=None, **kwargs):
+        super(ComplexConv2Plus1D, self).__init__(
+            filters=filters, kernel_size=kernel_size, dtype=dtype, strides=strides, padding=padding,
+            data_format=data_format, dilation_rate=dilation_rate, activation=activation, use_bias=use_bias,
+            kernel_initializer=kernel_initializer, bias_initializer=bias_initializer,
+            kernel_regularizer=kernel_regularizer, bias_regularizer=bias_regularizer,
+            activity_regularizer=activity_regularizer, kernel_constraint=kernel_constraint,
+            bias_constraint=bias_constraint, **kwargs)
+        self.intermediate_filters = intermediate_filters
+        if self.groups != 1:
+            raise ValueError(f"{self.__class__.__name__} does not support groups, received groups={self.groups}")
+        if self.conv_method not in DEPTHWISE_CONV_METHODS:
+            raise ValueError(f"Unsupported conv_method {self.conv_method} for {self.__class__.__name__}, "
+                             f"supported methods are {DEPTHWISE_CONV_METHODS}")
+
+    def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
+        input_channel = self._get_input_channel(input_shape)
+        kernel_d, kernel_h, kernel_w = self.kernel_size
+        intermediate_filters = self.intermediate_filters
+        if intermediate_filters is None:
+            intermediate_filters = max(kernel_d * kernel_h * kernel_w * input_channel * self.filters //
+                                       (kernel_h * kernel_w * input_channel + kernel_d * self.filters), 1)
+        self._check_init_technique()
+        self._add_complex_weight('spatial_kernel', (kernel_h, kernel_w, input_channel, intermediate_filters),
+                                 self.kernel_initializer, self.kernel_regularizer, self.kernel_constraint)
+        self._add_complex_weight('depth_kernel', (kernel_d, intermediate_filters, self.filters),
+                                 self.kernel_initializer, self.kernel_regularizer, self.kernel_constraint)
+        if self.use_bias:
+            self._add_complex_weight('bias', (self.filters,), self.bias_initializer,
+                                     self.bias_regularizer, self.bias_constraint)
+        else:
+            self.bias = None
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=5,
+                                                           axes={self._get_channel_axis(): input_channel}))
+        self.built = True
+
+    def _spatial_op(self, inputs, kernel):
+        """(batch, depth, height, width, channels) -> 2D convolution of each depth slice."""
+        shape = tf.shape(inputs)
+        outputs = tf.nn.convolution(tf.reshape(inputs, tf.concat([[-1], shape[-3:]], axis=0)), kernel,
+                                    strides=list(self.strides[1:]), padding=self._get_padding_op(),
+                                    dilations=list(self.dilation_rate[1:]))
+        return tf.reshape(outputs, tf.concat([shape[:-3], tf.shape(outputs)[1:]], axis=0))
+
+    def _depth_op(self, inputs, kernel):
+        """(batch, depth, height, width, channels) -> 1D convolution along depth for each (height, width)."""
+        inputs = _move_axis(inputs, -4, -2)       # (batch, height, width, depth, channels)
+        shape = tf.shape(inputs)
+        outputs = tf.nn.convolution(tf.reshape(inputs, tf.concat([[-1], shape[-2:]], axis=0)), kernel,
+                                    strides=list(self.strides[:1]), padding=self._get_padding_op(),
+                                    dilations=list(self.dilation_rate[:1]))
+        outputs = tf.reshape(outputs, tf.concat([shape[:-2], tf.shape(outputs)[1:]], axis=0))
+        return _move_axis(outputs, -2, -4)
+
+    def _convolve(self, inputs):
+        if self._channels_first:
+            inputs = _move_axis(inputs, -4, -1)
+        outputs_r, outputs_i = self._complex_convolution(
+            *_input_parts(inputs), *self._known_parts(*self._get_complex_weight('spatial_kernel')),
+            convolution_op=self._spatial_op)
+        outputs_r, outputs_i = self._complex_convolution(
+            outputs_r, outputs_i, *self._known_parts(*self._get_complex_weight('depth_kernel')),
+            convolution_op=self._depth_op, real_output=self._real_output())
+        outputs = self._combine_parts(outputs_r, outputs_i)
+        if self._channels_first:
+            outputs = _move_axis(outputs, -1, -4)
+        return outputs
+
+    def get_config(self):
+        config = super(ComplexConv2Plus1D, self).get_config()
+        config.pop('groups')
+        config['intermediate_filters'] = self.intermediate_filters
+        return config
+
+    def get_real_equivalent(self):
+        return ComplexConv2Plus1D(filters=self.filters, kernel_size=self.kernel_size,
+                                  intermediate_filters=self.intermediate_filters, dtype=self.my_dtype.real_dtype,
+                                  strides=self.strides, padding=self.padding, data_format=self.data_format,
+                                  dilation_rate=self.dilation_rate, activation=self.activation,
+                                  use_bias=self.use_bias, kernel_initializer=self.kernel_initializer,
+                                  bias_initializer=self.bias_initializer,
+                                  kernel_regularizer=self.kernel_regularizer, bias_regularizer=self.bias_regularizer,
+                                  activity_regularizer=self.activity_regularizer,
+                                  kernel_constraint=self.kernel_constraint, bias_constraint=self.bias_constraint,
+                                  conv_method=self.conv_method, trainable=self.trainable,
+                                  name=self.name + "_real_equiv")
+
+
 class ComplexConv2DTranspose(ComplexConv2D):
     """
     Transposed convolution layer. Sometimes (wrongly) called Deconvolution.
@@ -739,6 +1272,9 @@ class ComplexConv2DTranspose(ComplexConv2D):
       see `keras.constraints`).
     bias_constraint: Constraint function applied to the bias vector (
       see `keras.constraints`).
+    conv_method: One of 'standard' (default), 'gauss' or 'block'. See `ComplexConv`.
+      Independently of it, when `strides == kernel_size` (no dilation and no `output_padding`),
+      the transposed convolution is computed exactly as one matrix product per pixel (sub-pixel decomposition).
     Input shape:
     4D tensor with shape:
     `(batch_size, channels, rows, cols)` if data_format='channels_first'
@@ -811,16 +1347,19 @@ class ComplexConv2DTranspose(ComplexConv2D):
             for stride, out_pad in zip(self.strides, self.output_padding):
                 if out_pad >= stride:
                     raise ValueError(f'Stride {self.strides} must be greater than output padding {self.output_padding}')
+        if self.conv_method not in TRANSPOSE_CONV_METHODS:
+            raise ValueError(f"Unsupported conv_method {self.conv_method} for ComplexConv2DTranspose, "
+                             f"supported methods are {TRANSPOSE_CONV_METHODS}")
 
     def build(self, input_shape):
-        input_shape = tf.TensorShape(input_shape)
+        input_shape = self._complex_shape(input_shape)
         if len(input_shape) != 4:
             raise ValueError(f'Inputs should have rank 4. Received input shape: {input_shape}')
         channel_axis = self._get_channel_axis()
         if input_shape.dims[channel_axis].value is None:
             raise ValueError('The channel dimension of the inputs should be defined. Found `None`.')
         input_dim = int(input_shape[channel_axis])
-        self.input_spec = InputSpec(ndim=4, axes={channel_axis: input_dim})
+        self.input_spec = self._split_input_spec(InputSpec(ndim=4, axes={channel_axis: input_dim}))
         kernel_shape = self.kernel_size + (self.filters, input_dim)
         if self.my_dtype.is_complex:
             self.kernel_r = tf.Variable(
@@ -870,6 +1409,9 @@ class ComplexConv2DTranspose(ComplexConv2D):
         self.built = True
 
     def call(self, inputs):
+        inputs = self._complex_view(inputs)
+        if not inputs.dtype.is_complex:
+            inputs = tf.cast(inputs, self.my_dtype.real_dtype)      # See `ComplexConv._complex_convolution`
         inputs_shape = tf.shape(inputs)
         batch_size = inputs_shape[0]
         if self.data_format == 'channels_first':
@@ -913,55 +1455,19 @@ class ComplexConv2DTranspose(ComplexConv2D):
         else:
             output_shape = (batch_size, out_height, out_width, self.filters)
 
-        output_shape_tensor = tf.stack(output_shape)
         # Deconvolution part
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        if self.my_dtype.is_complex:
-            kernel_r = self.kernel_r
-            kernel_i = self.kernel_i
-            if self.use_bias:
-                bias = tf.complex(self.bias_r, self.bias_i)
+        if self._is_sub_pixel():
+            transpose_op = functools.partial(self._sub_pixel_transpose_op, output_shape=output_shape)
         else:
-            kernel_r = tf.math.real(self.kernel)
-            kernel_i = tf.math.imag(self.kernel)
-            if self.use_bias:
-                bias = self.bias
-        real_outputs_ri_rk = backend.conv2d_transpose(
-            inputs_r,
-            kernel_r,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ii_ik = backend.conv2d_transpose(
-            inputs_i,
-            kernel_i,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ri_ik = backend.conv2d_transpose(
-            inputs_r,
-            kernel_i,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs_ii_rk = backend.conv2d_transpose(
-            inputs_i,
-            kernel_r,
-            output_shape_tensor,
-            strides=self.strides,
-            padding=self.padding,
-            data_format=self.data_format,
-            dilation_rate=self.dilation_rate)
-        real_outputs = real_outputs_ri_rk - real_outputs_ii_ik
-        imag_outputs = real_outputs_ii_rk + real_outputs_ri_ik
-        outputs = tf.cast(tf.complex(real_outputs, imag_outputs), dtype=self.my_dtype)
+            transpose_op = functools.partial(self._conv_transpose_op, output_shape=output_shape)
+        real_output = self._real_output()
+        if self.conv_method == 'block' and self.my_dtype.is_complex and inputs.dtype.is_complex and not real_output:
+            outputs = self._block_convolution(inputs, *self._get_kernel(), convolution_op=transpose_op)
+        else:
+            outputs = self._combine_parts(*self._complex_convolution(*_input_parts(inputs),
+                                                                     *self._known_parts(*self._get_kernel()),
+                                                                     convolution_op=transpose_op,
+                                                                     real_output=real_output))
 
         if not tf.executing_eagerly():
             # Infer the static output shape:
@@ -969,11 +1475,61 @@ class ComplexConv2DTranspose(ComplexConv2D):
             outputs.set_shape(out_shape)
         # Apply bias
         if self.use_bias:
-            outputs = tf.nn.bias_add(outputs, bias, data_format=conv_utils.convert_data_format(self.data_format, ndim=4))
+            bias = self._get_bias()
+            if bias.dtype.is_complex and not outputs.dtype.is_complex:
+                bias = tf.math.real(bias)       # See `_real_output`
+            outputs = tf.nn.bias_add(outputs, bias, data_format=conv_utils.convert_data_format(self.data_format,
+                                                                                              ndim=4))
         # Apply activation function
         if self.activation is not None:
-            return self.activation(outputs)
-        return outputs
+            return self._activate(outputs, self.activation)
+        return self._to_representation(outputs)
+
+    @staticmethod
+    def _block_kernel(kernel_r, kernel_i):
+        """
+        Same as `ComplexConv._block_kernel` but for transposed kernels of shape (..., out_channels, in_channels).
+        """
+        return tf.linalg.matrix_transpose(ComplexConv._block_kernel(tf.linalg.matrix_transpose(kernel_r),
+                                                                    tf.linalg.matrix_transpose(kernel_i)))
+
+    def _is_sub_pixel(self):
+        """
+        When the strides equal the kernel size (and there is neither dilation nor output padding),
+            the output windows do not overlap and each input pixel is expanded into its own
+            kernel_h x kernel_w output block. Both 'valid' and 'same' paddings are then equivalent.
+        """
+        return tuple(self.strides) == tuple(self.kernel_size) and self.output_padding is None and \
+            all(d == 1 for d in self.dilation_rate)
+
+    def _transpose_output_shape(self, output_shape, kernel):
+        output_shape = list(output_shape)
+        output_shape[self._get_channel_axis()] = kernel.shape[-2]      # Also valid for the (larger) block kernel
+        return output_shape
+
+    def _conv_transpose_op(self, inputs, kernel, output_shape):
+        return backend.conv2d_transpose(
+            inputs,
+            kernel,
+            tf.stack(self._transpose_output_shape(output_shape, kernel)),
+            strides=self.strides,
+            padding=self.padding,
+            data_format=self.data_format,
+            dilation_rate=self.dilation_rate)
+
+    def _sub_pixel_transpose_op(self, inputs, kernel, output_shape):
+        """
+        Exact transposed convolution for `_is_sub_pixel` layers: a single matrix product of every input pixel
+            with the kernel followed by a depth to space rearrangement (no overlapping windows to sum).
+        """
+        output_shape = self._transpose_output_shape(output_shape, kernel)
+        if self._channels_first:
+            outputs = tf.tensordot(inputs, kernel, axes=[[1], [3]])       # (batch, h, w, kernel_h, kernel_w, out)
+            outputs = tf.transpose(outputs, [0, 5, 1, 3, 2, 4])
+        else:
+            outputs = tf.tensordot(inputs, kernel, axes=[[3], [3]])
+            outputs = tf.transpose(outputs, [0, 1, 3, 2, 4, 5])
+        return tf.reshape(outputs, tf.stack(output_shape))
 
     def compute_output_shape(self, input_shape):
         input_shape = tf.TensorShape(input_shape).as_list()
@@ -1012,3 +1568,206 @@ class ComplexConv2DTranspose(ComplexConv2D):
         config = super(ComplexConv2DTranspose, self).get_config()
         config['output_padding'] = self.output_padding
         return config
+
+
+class ComplexDepthwiseConv2D(ComplexConv2D):
+    """
+    Depthwise 2D complex convolution.
+    Each input channel is convolved with its own `depth_multiplier` kernels (no mixing between channels),
+        making the layer `input_channels` times cheaper than the equivalent `ComplexConv2D`.
+    Arguments are those of `ComplexConv2D` except:
+        - depth_multiplier: Number of output channels per input channel.
+            Output has `input_channels * depth_multiplier` channels.
+        - depthwise_initializer, depthwise_regularizer, depthwise_constraint: Replace the kernel ones.
+        - conv_method: Only 'standard' and 'gauss' are supported.
+    """
+
+    def __init__(self, kernel_size, strides=(1, 1), padding='valid', depth_multiplier=1, data_format=None,
+                 dilation_rate=(1, 1), activation=None, use_bias=True, dtype=DEFAULT_COMPLEX_TYPE,
+                 depthwise_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
+                 depthwise_regularizer=None, bias_regularizer=None, activity_regularizer=None,
+                 depthwise_constraint=None, bias_constraint=None, **kwargs):
+        super(ComplexDepthwiseConv2D, self).__init__(
+            filters=None,
+            kernel_size=kernel_size,
+            strides=strides,
+            padding=padding,
+            data_format=data_format,
+            dilation_rate=dilation_rate,
+            activation=activation,
+            use_bias=use_bias,
+            dtype=dtype,
+            kernel_initializer=depthwise_initializer,
+            bias_initializer=bias_initializer,
+            kernel_regularizer=depthwise_regularizer,
+            bias_regularizer=bias_regularizer,
+            activity_regularizer=activity_regularizer,
+            kernel_constraint=depthwise_constraint,
+            bias_constraint=bias_constraint,
+            **kwargs)
+        self.depth_multiplier = depth_multiplier
+        if self.conv_method not in DEPTHWISE_CONV_METHODS:
+            raise ValueError(f"Unsupported conv_method {self.conv_method} for {self.__class__.__name__}, "
+                             f"supported methods are {DEPTHWISE_CONV_METHODS}")
+
+    def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
+        input_channel = self._get_input_channel(input_shape)
+        self.filters = input_channel * self.depth_multiplier
+        self._check_init_technique()
+        self._add_complex_weight('depthwise_kernel', self.kernel_size + (input_channel, self.depth_multiplier),
+                                 self.kernel_initializer, self.kernel_regularizer, self.kernel_constraint)
+        if self.use_bias:
+            self._add_complex_weight('bias', (self.filters,), self.bias_initializer,
+                                     self.bias_regularizer, self.bias_constraint)
+        else:
+            self.bias = None
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=4,
+                                                           axes={self._get_channel_axis(): input_channel}))
+        self.built = True
+
+    def _get_kernel(self):
+        return self._get_complex_weight('depthwise_kernel')
+
+    def convolution_op(self, inputs, kernel):
+        return backend.depthwise_conv2d(inputs, kernel, strides=self.strides, padding=self.padding,
+                                        data_format=self.data_format, dilation_rate=self.dilation_rate)
+
+    def get_config(self):
+        config = super(ComplexDepthwiseConv2D, self).get_config()
+        for key in ('filters', 'groups', 'kernel_initializer', 'kernel_regularizer', 'kernel_constraint'):
+            config.pop(key)
+        config.update({
+            'depth_multiplier': self.depth_multiplier,
+            'depthwise_initializer': initializers.serialize(self.kernel_initializer),
+            'depthwise_regularizer': regularizers.serialize(self.kernel_regularizer),
+            'depthwise_constraint': constraints.serialize(self.kernel_constraint),
+        })
+        return config
+
+    def get_real_equivalent(self):
+        return ComplexDepthwiseConv2D(kernel_size=self.kernel_size, strides=self.strides, padding=self.padding,
+                                      depth_multiplier=self.depth_multiplier, data_format=self.data_format,
+                                      dilation_rate=self.dilation_rate, activation=self.activation,
+                                      use_bias=self.use_bias, dtype=self.my_dtype.real_dtype,
+                                      depthwise_initializer=self.kernel_initializer,
+                                      bias_initializer=self.bias_initializer,
+                                      depthwise_regularizer=self.kernel_regularizer,
+                                      bias_regularizer=self.bias_regularizer,
+                                      activity_regularizer=self.activity_regularizer,
+                                      depthwise_constraint=self.kernel_constraint,
+                                      bias_constraint=self.bias_constraint, conv_method=self.conv_method,
+                                      trainable=self.trainable, name=self.name + "_real_equiv")
+
+
+class ComplexSeparableConv2D(ComplexConv2D):
+    """
+    Depthwise separable 2D complex convolution.
+    A depthwise convolution (see `ComplexDepthwiseConv2D`) followed by a pointwise (1x1) convolution
+        mixing the channels into `filters` outputs.
+        For a k x k kernel this costs about `1 / filters + 1 / k**2` of the equivalent `ComplexConv2D`.
+    Arguments are those of `ComplexConv2D` except:
+        - depth_multiplier: Number of depthwise output channels per input channel.
+        - depthwise_initializer, depthwise_regularizer, depthwise_constraint: For the depthwise kernel.
+        - pointwise_initializer, pointwise_regularizer, pointwise_constraint: For the pointwise kernel.
+        - conv_method: Only 'standard' and 'gauss' are supported (used for both convolutions).
+    """
+
+    def __init__(self, filters, kernel_size, strides=(1, 1), padding='valid', data_format=None,
+                 dilation_rate=(1, 1), depth_multiplier=1, activation=None, use_bias=True,
+                 dtype=DEFAULT_COMPLEX_TYPE, depthwise_initializer=ComplexGlorotUniform(),
+                 pointwise_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
+                 depthwise_regularizer=None, pointwise_regularizer=None, bias_regularizer=None,
+                 activity_regularizer=None, depthwise_constraint=None, pointwise_constraint=None,
+                 bias_constraint=None, **kwargs):
+        super(ComplexSeparableConv2D, self).__init__(
+            filters=filters,
+            kernel_size=kernel_size,
+            strides=strides,
+            padding=padding,
+            data_format=data_format,
+            dilation_rate=dilation_rate,
+            activation=activation,
+            use_bias=use_bias,
+            dtype=dtype,
+            kernel_initializer=depthwise_initializer,
+            bias_initializer=bias_initializer,
+            kernel_regularizer=depthwise_regularizer,
+            bias_regularizer=bias_regularizer,
+            activity_regularizer=activity_regularizer,
+            kernel_constraint=depthwise_constraint,
+            bias_constraint=bias_constraint,
+            **kwargs)
+        self.depth_multiplier = depth_multiplier
+        self.pointwise_initializer = initializers.get(pointwise_initializer)
+        self.pointwise_regularizer = regularizers.get(pointwise_regularizer)
+        self.pointwise_constraint = constraints.get(pointwise_constraint)
+        if self.conv_method not in DEPTHWISE_CONV_METHODS:
+            raise ValueError(f"Unsupported conv_method {self.conv_method} for {self.__class__.__name__}, "
+                             f"supported methods are {DEPTHWISE_CONV_METHODS}")
+
+    def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
+        input_channel = self._get_input_channel(input_shape)
+        self._check_init_technique()
+        self._add_complex_weight('depthwise_kernel', self.kernel_size + (input_channel, self.depth_multiplier),
+                                 self.kernel_initializer, self.kernel_regularizer, self.kernel_constraint)
+        self._add_complex_weight('pointwise_kernel', (1, 1, input_channel * self.depth_multiplier, self.filters),
+                                 self.pointwise_initializer, self.pointwise_regularizer, self.pointwise_constraint)
+        if self.use_bias:
+            self._add_complex_weight('bias', (self.filters,), self.bias_initializer,
+                                     self.bias_regularizer, self.bias_constraint)
+        else:
+            self.bias = None
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=4,
+                                                           axes={self._get_channel_axis(): input_channel}))
+        self.built = True
+
+    def _depthwise_op(self, inputs, kernel):
+        return backend.depthwise_conv2d(inputs, kernel, strides=self.strides, padding=self.padding,
+                                        data_format=self.data_format, dilation_rate=self.dilation_rate)
+
+    def _pointwise_op(self, inputs, kernel):
+        return tf.nn.convolution(inputs, kernel, padding='VALID', data_format=self._tf_data_format)
+
+    def _convolve(self, inputs):
+        outputs_r, outputs_i = self._complex_convolution(
+            *_input_parts(inputs), *self._known_parts(*self._get_complex_weight('depthwise_kernel')),
+            convolution_op=self._depthwise_op)
+        outputs_r, outputs_i = self._complex_convolution(
+            outputs_r, outputs_i, *self._known_parts(*self._get_complex_weight('pointwise_kernel')),
+            convolution_op=self._pointwise_op, real_output=self._real_output())
+        return self._combine_parts(outputs_r, outputs_i)
+
+    def get_config(self):
+        config = super(ComplexSeparableConv2D, self).get_config()
+        for key in ('groups', 'kernel_initializer', 'kernel_regularizer', 'kernel_constraint'):
+            config.pop(key)
+        config.update({
+            'depth_multiplier': self.depth_multiplier,
+            'depthwise_initializer': initializers.serialize(self.kernel_initializer),
+            'pointwise_initializer': initializers.serialize(self.pointwise_initializer),
+            'depthwise_regularizer': regularizers.serialize(self.kernel_regularizer),
+            'pointwise_regularizer': regularizers.serialize(self.pointwise_regularizer),
+            'depthwise_constraint': constraints.serialize(self.kernel_constraint),
+            'pointwise_constraint': constraints.serialize(self.pointwise_constraint),
+        })
+        return config
+
+    def get_real_equivalent(self):
+        return ComplexSeparableConv2D(filters=self.filters, kernel_size=self.kernel_size, strides=self.strides,
+                                      padding=self.padding, data_format=self.data_format,
+                                      dilation_rate=self.dilation_rate, depth_multiplier=self.depth_multiplier,
+                                      activation=self.activation, use_bias=self.use_bias,
+                                      dtype=self.my_dtype.real_dtype,
+                                      depthwise_initializer=self.kernel_initializer,
+                                      pointwise_initializer=self.pointwise_initializer,
+                                      bias_initializer=self.bias_initializer,
+                                      depthwise_regularizer=self.kernel_regularizer,
+                                      pointwise_regularizer=self.pointwise_regularizer,
+                                      bias_regularizer=self.bias_regularizer,
+                                      activity_regularizer=self.activity_regularizer,
+                                      depthwise_constraint=self.kernel_constraint,
+                                      pointwise_constraint=self.pointwise_constraint,
+                                      bias_constraint=self.bias_constraint, conv_method=self.conv_method,
+                                      trainable=self.trainable, name=self.name + "_real_equiv")
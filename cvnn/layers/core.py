@@ -4,13 +4,19 @@ import tensorflow as tf
 from tensorflow.keras.layers import Flatten, Dense, InputLayer, Layer
 from tensorflow.python.keras import backend as K
 from tensorflow.keras import initializers
+from tensorflow.keras import activations
 import tensorflow_probability as tfp
 from tensorflow import TensorShape, Tensor
+from packaging import version
+if version.parse(tf.__version__) < version.parse("2.6.0"):
+    from tensorflow.python.keras.engine.input_spec import InputSpec
+else:
+    from tensorflow.keras.layers import InputSpec
 # from keras.utils import control_flow_util
 # typing
 from typing import Optional, Union, List, Tuple
 # Own modules
-from cvnn.activations import t_activation
+from cvnn.activations import t_activation, split_dispatcher
 from cvnn.initializers import ComplexGlorotUniform, Zeros, Ones, ComplexInitializer, INIT_TECHNIQUES
 
 
@@ -18,10 +24,142 @@ t_input = Union[Tensor, tuple, list]
 t_input_shape = Union[TensorShape, List[TensorShape]]
 
 DEFAULT_COMPLEX_TYPE = tf.as_dtype(np.complex64)
+MATMUL_METHODS = {'standard', 'gauss', 'packed'}
+REPRESENTATIONS = {'complex', 'split'}
+_representation = 'complex'
+
+
+@tf.custom_gradient
+def complex_to_split(inputs):
+    """
+    Views a complex tensor of shape [...] as a real tensor of shape [..., 2] holding its real and imaginary parts.
+    Complex numbers are already stored as interleaved (real, imag) pairs so this is a bitcast, no data is copied.
+    :param inputs: complex64 or complex128 tensor.
+    :return: float32 or float64 tensor with an extra inner-most dimension of size 2.
+    """
+    def grad(upstream):
+        return tf.bitcast(upstream, inputs.dtype)
+    return tf.bitcast(inputs, inputs.dtype.real_dtype), grad
+
+
+@tf.custom_gradient
+def split_to_complex(inputs):
+    """
+    Inverse of `complex_to_split`. Views a real tensor of shape [..., 2] as a complex tensor of shape [...].
+    :param inputs: float32 or float64 tensor whose inner-most dimension is of size 2 (real and imaginary parts).
+    :return: complex64 or complex128 tensor.
+    """
+    def grad(upstream):
+        return tf.bitcast(upstream, inputs.dtype)
+    complex_dtype = tf.complex64 if inputs.dtype == tf.float32 else tf.complex128
+    return tf.bitcast(inputs, complex_dtype), grad
+
+
+def set_representation(representation: str):
+    """
+    Sets the representation of the complex tensors flowing between the layers created afterwards.
+        - 'complex' (default): complex64 or complex128 tensors.
+        - 'split': real tensors of shape [..., 2] holding the real and imaginary parts (see `complex_to_split`).
+            Layers consume and produce them directly, so that complex tensors only exist at the model boundaries:
+            `complex_input` gives split model inputs (convert the data with `complex_to_split`) and the outputs
+            are converted back with `split_to_complex`.
+    Like the dtype, the representation of a layer is fixed when it is created. It can also be given to a single layer
+        with the `representation` argument of its constructor, and it is saved in the layer config.
+    Real-valued layers (real dtype) are not affected.
+    :param representation: One of `REPRESENTATIONS`.
+    """
+    global _representation
+    _check_representation(representation)
+    _representation = representation
+
+
+def _check_representation(representation: str):
+    if representation not in REPRESENTATIONS:
+        raise ValueError(f"Unknown representation {representation}. Supported representations are {REPRESENTATIONS}")
+
+
+def get_representation() -> str:
+    """
+    :return: The representation used by the layers created from now on (see `set_representation`).
+    """
+    return _representation
+
+
+def _move_axis(inputs, source: int, destination: int):
+    """Same as np.moveaxis for a tensor of known rank."""
+    perm = list(range(inputs.shape.rank))
+    perm.insert(destination % len(perm), perm.pop(source % len(perm)))
+    return tf.transpose(inputs, perm)
+
+
+def _split_to_channels(split_inputs, channels_first: bool = False):
+    """
+    Real tensor with the real and imaginary parts of a split tensor interleaved on the channel axis:
+        complex channel c is mapped to the real channels (2c, 2c + 1).
+    Real-valued operations acting independently on each channel (pooling, resizing...) can then be applied
+        to both parts at once. This is a reshape (no copy) for channels_last, a transpose for channels_first.
+    The reshape uses the dynamic shape, so the static shape (channels in particular) is set back on the result.
+    :param split_inputs: Real tensor of shape (batch, ..., channels, 2) or (batch, channels, ..., 2).
+    """
+    if channels_first:
+        split_inputs = _move_axis(split_inputs, -1, 2)
+        static_shape = split_inputs.shape.as_list()         # (batch, channels, 2, ...)
+        shape = tf.shape(split_inputs)
+        outputs = tf.reshape(split_inputs, tf.concat([shape[:1], [-1], shape[3:]], axis=0))
+        channels = None if static_shape[1] is None else 2 * static_shape[1]
+        outputs.set_shape(static_shape[:1] + [channels] + static_shape[3:])
+        return outputs
+    static_shape = split_inputs.shape.as_list()
+    shape = tf.shape(split_inputs)
+    outputs = tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0))
+    channels = None if static_shape[-2] is None else 2 * static_shape[-2]
+    outputs.set_shape(static_shape[:-2] + [channels])
+    return outputs
+
+
+def _channels_to_split(inputs, channels_first: bool = False):
+    """Inverse of `_split_to_channels`."""
+    static_shape = inputs.shape.as_list()
+    shape = tf.shape(inputs)
+    if channels_first:
+        channels = None if static_shape[1] is None else static_shape[1] // 2
+        outputs = tf.reshape(inputs, tf.concat([shape[:1], [-1, 2], shape[2:]], axis=0))
+        outputs.set_shape(static_shape[:1] + [channels, 2] + static_shape[2:])
+        return _move_axis(outputs, 2, -1)
+    channels = None if static_shape[-1] is None else static_shape[-1] // 2
+    outputs = tf.reshape(inputs, tf.concat([shape[:-1], [-1, 2]], axis=0))
+    outputs.set_shape(static_shape[:-1] + [channels, 2])
+    return outputs
+
+
+def block_kernel(kernel_r, kernel_i):
+    """
+    Real matrix of shape (..., 2 * in_features, 2 * out_features) equivalent to the complex kernel
+        (kernel_r + j kernel_i) of shape (..., in_features, out_features).
+    Complex feature c is mapped to the real features (2c, 2c + 1) holding its real and imaginary parts,
+        which is the layout given by `complex_to_split` so inputs and outputs are bitcasts, not copies.
+    """
+    real_row = tf.stack([kernel_r, kernel_i], axis=-1)          # Contribution of the real part of the input
+    imag_row = tf.stack([-kernel_i, kernel_r], axis=-1)         # Contribution of the imaginary part of the input
+    block = tf.stack([real_row, imag_row], axis=-3)             # (..., in_features, 2, out_features, 2)
+    kernel_shape = kernel_r.shape.as_list()
+    return tf.reshape(block, kernel_shape[:-2] + [2 * kernel_shape[-2], 2 * kernel_shape[-1]])
+
+
+def _matmul(inputs, kernel):
+    if isinstance(inputs, tf.SparseTensor):
+        return tf.sparse.sparse_dense_matmul(inputs, kernel)
+    return tf.matmul(inputs, kernel)
 
 
 class ComplexLayer(ABC):
 
+    def __new__(cls, *args, **kwargs):
+        layer = super(ComplexLayer, cls).__new__(cls)
+        # Written in __dict__ so that keras does not track it (like `_frozen`)
+        layer.__dict__['_split'] = get_representation() == 'split'
+        return layer
+
     @abstractmethod
     def get_real_equivalent(self):
         """
@@ -29,9 +167,192 @@ class ComplexLayer(ABC):
         """
         pass
 
+    def _cached(self, key: str, compute_fn):
+        """
+        Memoises `compute_fn()`, a tensor that only depends on the layer weights (for example a kernel FFT),
+            while the layer is frozen (see `freeze`). Otherwise `compute_fn()` is called each time.
+        Frozen layers compute the value eagerly, even inside a `tf.function`, so that it is embedded as a constant.
+        The cache is emptied by `freeze`, `unfreeze` and `set_weights` (or `load_weights`) of the frozen model.
+        :param key: String identifying the cached tensor.
+        :param compute_fn: Callable with no arguments returning the tensor.
+        """
+        if not self._is_frozen():
+            return compute_fn()
+        cache = self.__dict__.get('_weights_cache')
+        if cache is None:
+            cache = {}
+            # object.__setattr__ so that keras does not track the dictionary
+            object.__setattr__(self, '_weights_cache', cache)
+        if key not in cache:
+            with tf.init_scope():       # Lifts the computation out of the tf.function being traced (if any)
+                cache[key] = compute_fn()
+        return cache[key]
+
+    def _clear_cache(self):
+        cache = self.__dict__.get('_weights_cache')
+        if cache is not None:
+            cache.clear()
+
+    def _is_frozen(self) -> bool:
+        return self.__dict__.get('_frozen', False)
+
+    def _is_split(self) -> bool:
+        """
+        :return: True if the layer consumes and produces split tensors (see `set_representation`).
+        """
+        dtype = getattr(self, 'my_dtype', None)
+        return self.__dict__.get('_split', False) and (dtype is None or tf.as_dtype(dtype).is_complex)
+
+    def _init_representation(self, representation: Optional[str] = None):
+        """
+        Sets the representation of the layer, given by the `representation` argument of its constructor.
+        :param representation: One of `REPRESENTATIONS`, `get_representation()` if None (see `set_representation`).
+        """
+        if representation is None:
+            representation = get_representation()
+        _check_representation(representation)
+        self.__dict__['_split'] = representation == 'split'
+
+    def _get_representation(self) -> str:
+        """
+        :return: The representation given when the layer was created (see `set_representation`).
+        """
+        return 'split' if self.__dict__.get('_split', False) else 'complex'
+
+    def _complex_view(self, inputs):
+        """
+        :return: Split `inputs` of a split layer viewed as a complex tensor (a bitcast, no copy).
+            Split layers take split inputs (their input specs and `_complex_shape` count the extra last axis),
+            sparse inputs and inputs of complex layers are returned unchanged.
+        """
+        if self._is_split() and isinstance(inputs, tf.Tensor) and not inputs.dtype.is_complex:
+            return split_to_complex(inputs)
+        return inputs
+
+    def _to_representation(self, outputs):
+        """
+        Inverse of `_complex_view`: complex `outputs` of a split layer are viewed as a split tensor.
+        """
+        if self._is_split() and outputs.dtype.is_complex:
+            return complex_to_split(outputs)
+        return outputs
+
+    def _complex_shape(self, input_shape) -> TensorShape:
+        """
+        :return: Shape of the complex tensor viewed from `input_shape` (split inputs have an extra last axis of 2).
+        """
+        input_shape = tf.TensorShape(input_shape)
+        return input_shape[:-1] if self._is_split() else input_shape
+
+    def _input_shape(self, complex_shape) -> TensorShape:
+        """
+        :return: Shape of the inputs of the layer holding complex tensors of shape `complex_shape` (inverse of
+            `_complex_shape`), used to build converted layers.
+        """
+        complex_shape = tf.TensorShape(complex_shape)
+        return complex_shape.concatenate([2]) if self._is_split() else complex_shape
+
+    def _split_input_spec(self, spec):
+        """
+        :param spec: `InputSpec` of the complex inputs.
+        :return: `spec` adapted to the split inputs if the layer is split (one more dimension, negative axes shifted).
+        """
+        if spec is None or not self._is_split():
+            return spec
+        axes = {(axis - 1 if axis < 0 else axis): value for axis, value in (spec.axes or {}).items()}
+        more = lambda ndim: None if ndim is None else ndim + 1
+        return type(spec)(ndim=more(spec.ndim), min_ndim=more(spec.min_ndim), max_ndim=more(spec.max_ndim),
+                          axes=axes)
+
+    def _activate(self, outputs, activation):
+        """
+        :return: `activation(outputs)` in the layer representation.
+            Split layers apply cartesian activations (see `cvnn.activations.split_dispatcher`) to the split tensor.
+        """
+        if self._is_split() and outputs.dtype.is_complex and activation in split_dispatcher:
+            return split_dispatcher[activation](complex_to_split(outputs))
+        return self._to_representation(activation(outputs))
+
+    def _precompute_weights(self):
+        """
+        Fills the cache (see `_cached`) with the tensors composed from the layer weights. Called by `freeze`.
+        Layers not overriding it compute them lazily on their first call.
+        """
+        pass
+
+
+def _complex_layers(model):
+    layers = [model] + list(model.submodules) if isinstance(model, tf.Module) else [model]
+    return [layer for layer in layers if isinstance(layer, ComplexLayer)]
+
+
+def _freeze_after(obj, method_name: str, model):
+    """
+    Makes the `method_name` method (`set_weights` or `load_weights`) of `obj` freeze `model` again after assigning
+        the weights, so that the cached tensors are recomputed from the new values.
+    """
+    if method_name in obj.__dict__ or not hasattr(obj, method_name):
+        return
+    method = getattr(obj, method_name)
+
+    def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        freeze(model)
+        return result
+    # object.__setattr__ so that keras does not track it, removed by `unfreeze`
+    object.__setattr__(obj, method_name, wrapper)
+
+
+def freeze(model):
+    """
+    Puts `model` (or a single layer) in frozen inference mode.
+    The tensors composed from the split variables (complex kernels and biases, block kernels,
+        batch normalization whitening matrices, etc.) are computed once and reused as constants by every following
+        call, including `model.predict`, instead of being rebuilt on each call.
+    Batch normalization layers always use their moving statistics while frozen.
+    `set_weights` (of the model or of its complex layers) and `load_weights` recompute the cached tensors and reset
+        the `model.predict` function so the new values are used. Other assignments (`variable.assign`,
+        an optimizer...) are not seen: call `freeze` again after them. `tf.function`s wrapping the model defined by
+        the user must be re-traced.
+    Frozen layers do not propagate gradients to their weights, use `unfreeze` before training again.
+    :param model: A built `tf.keras.Model` or layer.
+    :return: `model`.
+    """
+    complex_layers = _complex_layers(model)
+    for layer in complex_layers:
+        layer._clear_cache()
+        object.__setattr__(layer, '_frozen', True)
+        if layer.built:
+            layer._precompute_weights()
+        _freeze_after(layer, 'set_weights', model)
+    _freeze_after(model, 'set_weights', model)
+    _freeze_after(model, 'load_weights', model)
+    object.__setattr__(model, '_frozen', True)
+    if hasattr(model, 'predict_function'):
+        model.predict_function = None
+    return model
+
+
+def unfreeze(model):
+    """
+    Reverts `freeze`. Weights are read from the variables again on each call.
+    :param model: A `tf.keras.Model` or layer.
+    :return: `model`.
+    """
+    for layer in [model] + _complex_layers(model):
+        for method_name in ('set_weights', 'load_weights'):
+            layer.__dict__.pop(method_name, None)
+    for layer in _complex_layers(model):
+        object.__setattr__(layer, '_frozen', False)
+        layer._clear_cache()
+    object.__setattr__(model, '_frozen', False)
+    if hasattr(model, 'predict_function'):
+        model.predict_function = None
+    return model
+
 
 def complex_input(shape=None, batch_size=None, name=None, dtype=DEFAULT_COMPLEX_TYPE,
-                  sparse=False, tensor=None, ragged=False, **kwargs):
+                  sparse=False, tensor=None, ragged=False, representation: Optional[str] = None, **kwargs):
     """
     `complex_input()` is used to instantiate a Keras tensor.
     A Keras tensor is a TensorFlow symbolic tensor object,
@@ -63,6 +384,9 @@ def complex_input(shape=None, batch_size=None, name=None, dtype=DEFAULT_COMPLEX_
           values of 'None' in the 'shape' argument represent ragged dimensions.
           For more information about RaggedTensors, see
           [this guide](https://www.tensorflow.org/guide/ragged_tensors).
+      representation: 'complex' or 'split' (see `set_representation`), `get_representation()` if None.
+          With 'split' and a complex dtype, the input is a split tensor: real dtype and an extra last axis of 2,
+          as taken by split layers. Convert complex data with `complex_to_split` before feeding the model.
       **kwargs: deprecated arguments support. Supports `batch_shape` and
           `batch_input_shape`.
     Returns:
@@ -108,6 +432,15 @@ def complex_input(shape=None, batch_size=None, name=None, dtype=DEFAULT_COMPLEX_
                          'dimension.')
     if kwargs:
         raise ValueError('Unrecognized keyword arguments:', kwargs.keys())
+    if representation is None:
+        representation = get_representation()
+    _check_representation(representation)
+    if representation == 'split' and dtype.is_complex and tensor is None:
+        input_layer_config['dtype'] = dtype.real_dtype.name
+        if shape is not None:
+            shape = tuple(shape) + (2,)
+        if batch_input_shape is not None:
+            batch_input_shape = tuple(batch_input_shape) + (2,)
 
     if batch_input_shape:
         shape = batch_input_shape[1:]
@@ -144,17 +477,38 @@ class ComplexInput(InputLayer, ComplexLayer):
 
 
 class ComplexFlatten(Flatten, ComplexLayer):
+    """
+    Flattens the complex inputs (without the batch axis), reshaping the complex tensor directly.
+    Other complex shape layers are in `cvnn.layers.reshaping`.
+    """
+
+    def __init__(self, data_format: Optional[str] = None, representation: Optional[str] = None, **kwargs):
+        """
+        :param data_format: A string, one of `channels_last` (default) or `channels_first`.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexFlatten, self).__init__(data_format=data_format, **kwargs)
 
     def call(self, inputs: t_input):
-        # tf.print(f"inputs at ComplexFlatten are {inputs.dtype}")
-        real_flat = super(ComplexFlatten, self).call(tf.math.real(inputs))
-        imag_flat = super(ComplexFlatten, self).call(tf.math.imag(inputs))
-        return tf.cast(tf.complex(real_flat, imag_flat), inputs.dtype)  # Keep input dtype
+        if not self._is_split():
+            return super(ComplexFlatten, self).call(inputs)
+        inputs = self._to_representation(inputs)
+        if self.data_format == 'channels_first' and inputs.shape.rank > 3:
+            inputs = _move_axis(inputs, 1, -2)      # Flatten in channels_last order, as keras does
+        return tf.reshape(inputs, tf.stack([tf.shape(inputs)[0], -1, 2]))
 
     def get_real_equivalent(self):
         # Dtype agnostic so just init one.
         return ComplexFlatten(name=self.name + "_real_equiv")
 
+    def get_config(self):
+        config = super(ComplexFlatten, self).get_config()
+        config.update({
+            'representation': self._get_representation()
+        })
+        return config
+
 
 class ComplexDense(Dense, ComplexLayer):
     """
@@ -167,6 +521,9 @@ class ComplexDense(Dense, ComplexLayer):
     * activation is the element-wise activation function passed as the activation argument,
     * weights is a matrix created by the layer
     * bias is a bias vector created by the layer
+
+    Sparse inputs of rank 2 are also accepted: a `tf.SparseTensor` (complex or real) or a pair (real, imag) of real
+        `tf.SparseTensor`. They are multiplied with `tf.sparse.sparse_dense_matmul` without being densified.
     """
 
     def __init__(self, units: int, activation: t_activation = None, use_bias: bool = True,
@@ -178,6 +535,8 @@ class ComplexDense(Dense, ComplexLayer):
                  kernel_constraint_i=None,
                  dtype=DEFAULT_COMPLEX_TYPE,  # TODO: Check typing of this.
                  init_technique: str = 'mirror',
+                 matmul_method: str = 'standard',
+                 representation: Optional[str] = None,
                  **kwargs):
         """
         :param units: Positive integer, dimensionality of the output space.
@@ -195,7 +554,19 @@ class ComplexDense(Dense, ComplexLayer):
             - 'mirror': Uses the initializer for both real and imaginary part.
                 Note that some initializers such as Glorot or He will lose it's property if initialized this way.
             - 'zero_imag': Initializer real part and let imaginary part to zero.
+        :param matmul_method: One of 'standard', 'gauss' or 'packed'. Algorithm used to compute the complex matrix
+            product.
+            Ignored for real dtype.
+            - 'standard': Builds the complex kernel from its real and imaginary parts and uses a complex matmul.
+            - 'gauss': Uses Gauss' (Karatsuba) trick on the real and imaginary parts directly,
+                only 3 real matmuls and the complex kernel is never materialised.
+            - 'packed': A single real matmul of the (interleaved) real and imaginary parts of the input with the
+                block kernel [[w_r, w_i], [-w_i, w_r]]. One larger GEMM makes a better use of multi-threaded BLAS
+                for small batches. The block kernel is built once per call, or cached while the layer is frozen
+                (see `freeze`).
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
         """
+        self._init_representation(representation)
         # TODO: verify the initializers? and that dtype complex has cvnn.activations.
         if activation is None:
             activation = "linear"
@@ -209,8 +580,32 @@ class ComplexDense(Dense, ComplexLayer):
         # !Cannot override dtype of the layer because it has a read-only @property
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         self.init_technique = init_technique.lower()
+        self.input_spec = self._split_input_spec(InputSpec(min_ndim=2))
+        self.matmul_method = matmul_method.lower()
+        if self.matmul_method not in MATMUL_METHODS:
+            raise ValueError(f"Unsupported matmul_method {self.matmul_method}, "
+                             f"supported methods are {MATMUL_METHODS}")
+
+    def __call__(self, inputs, *args, **kwargs):
+        if not isinstance(inputs, (tuple, list)):
+            return super(ComplexDense, self).__call__(inputs, *args, **kwargs)
+        # (real, imag) pair of sparse tensors, checked by `_sparse_inputs` instead of the input spec
+        input_spec = self.input_spec
+        self.input_spec = None
+        try:
+            return super(ComplexDense, self).__call__(inputs, *args, **kwargs)
+        finally:
+            if self.input_spec is None:     # Not built by this call
+                self.input_spec = input_spec
 
     def build(self, input_shape):
+        if isinstance(input_shape, (list, tuple)) and input_shape and \
+                isinstance(input_shape[0], (TensorShape, list, tuple)):
+            input_shape = TensorShape(input_shape[0])       # (real, imag) pair of sparse tensors
+        else:
+            input_shape = self._complex_shape(input_shape)
+        if input_shape[-1] is not None:
+            self.input_spec = self._split_input_spec(InputSpec(min_ndim=2, axes={-1: int(input_shape[-1])}))
         if self.my_dtype.is_complex:
             i_kernel_dtype = self.my_dtype if isinstance(self.kernel_initializer,
                                                          ComplexInitializer) else self.my_dtype.real_dtype
@@ -230,30 +625,7 @@ class ComplexDense(Dense, ComplexLayer):
                     raise ValueError(f"Unsuported init_technique {self.init_technique}, "
                                      f"supported techniques are {INIT_TECHNIQUES}")
 
-            self.w_r = self.add_weight('kernel_r',
-                                     shape=(input_shape[-1], self.units),
-                                     dtype=self.my_dtype.real_dtype,
-                                     initializer=self.kernel_initializer,
-                                     trainable=True,
-                                     #constraint=self.kernel_constraint, regularizer=self.kernel_regularizer)
-                                     constraint=self.kernel_constraint_r, regularizer=self.kernel_regularizer)
-            #self.w_r = tf.Variable(
-            #    name='kernel_r',
-            #    initial_value=self.kernel_initializer(shape=(input_shape[-1], self.units), dtype=i_kernel_dtype),
-            #    trainable=True
-            #)
-            self.w_i = self.add_weight('kernel_i',
-                                     shape=(input_shape[-1], self.units),
-                                     dtype=self.my_dtype.real_dtype,
-                                     initializer=self.kernel_initializer,
-                                     trainable=True,
-                                     #constraint=self.kernel_constraint, regularizer=self.kernel_regularizer)
-                                     constraint=self.kernel_constraint_i, regularizer=self.kernel_regularizer)
-            #self.w_i = tf.Variable(
-            #    name='kernel_i',
-            #    initial_value=i_kernel_initializer(shape=(input_shape[-1], self.units), dtype=i_kernel_dtype),
-            #    trainable=True
-            #)
+            self._build_kernel(input_shape)
             if self.use_bias:
                 self.b_r = tf.Variable(
                     name='bias_r',
@@ -267,37 +639,145 @@ class ComplexDense(Dense, ComplexLayer):
                 )
         else:
             # TODO: For Complex you should probably want to use MY init for real keras. DO sth! at least error message
-            self.w = self.add_weight('kernel',
-                                     shape=(input_shape[-1], self.units),
-                                     dtype=self.my_dtype,
-                                     initializer=self.kernel_initializer,
-                                     trainable=True,
-                                     #constraint=self.kernel_constraint, regularizer=self.kernel_regularizer)
-                                     constraint=self.kernel_constraint, regularizer=self.kernel_regularizer)
+            self._build_kernel(input_shape)
             if self.use_bias:
                 self.b = self.add_weight('bias', shape=(self.units,), dtype=self.my_dtype,
                                          initializer=self.bias_initializer, trainable=self.use_bias)
 
+    def _build_kernel(self, input_shape):
+        if self.my_dtype.is_complex:
+            self.w_r, self.w_i = self._add_kernel('kernel', (input_shape[-1], self.units))
+        else:
+            self.w = self._add_kernel('kernel', (input_shape[-1], self.units))
+
+    def _add_kernel(self, name: str, shape):
+        """
+        Adds a kernel weight using the layer kernel initializer, regularizer and constraints.
+        :param name: Name of the weight. `name_r` and `name_i` are used for the real and imaginary parts.
+        :param shape: Shape of the weight.
+        :return: Tuple (real, imag) of the created variables for complex dtype, the created variable otherwise.
+        """
+        if self.my_dtype.is_complex:
+            return tuple(self.add_weight(name + suffix, shape=shape, dtype=self.my_dtype.real_dtype,
+                                         initializer=self.kernel_initializer, trainable=True,
+                                         constraint=constraint, regularizer=self.kernel_regularizer)
+                         for suffix, constraint in (('_r', self.kernel_constraint_r),
+                                                    ('_i', self.kernel_constraint_i)))
+        return self.add_weight(name, shape=shape, dtype=self.my_dtype, initializer=self.kernel_initializer,
+                               trainable=True, constraint=self.kernel_constraint, regularizer=self.kernel_regularizer)
+
     def call(self, inputs: t_input):
         # tf.print(f"inputs at ComplexDense are {inputs.dtype}")
-        if inputs.dtype != self.my_dtype:
+        if isinstance(inputs, (tf.SparseTensor, tuple, list)):
+            inputs = self._sparse_inputs(inputs)
+        elif self._complex_view(inputs).dtype != self.my_dtype:
             tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
             if self.my_dtype.is_complex and inputs.dtype.is_floating:
                 tf.print("\tThis is normally fixed using ComplexInput() "
                          "at the start (tf casts input automatically to real).")
-            inputs = tf.cast(inputs, self.my_dtype)
+            inputs = tf.cast(self._complex_view(inputs), self.my_dtype)
+        else:
+            inputs = self._complex_view(inputs)
         if self.my_dtype.is_complex:
-            w = tf.complex(self.w_r, self.w_i)
             if self.use_bias:
-                b = tf.complex(self.b_r, self.b_i)
+                b = self._cached('bias', lambda: tf.complex(self.b_r, self.b_i))
+            out = self._complex_matmul(inputs)
         else:
-            w = self.w
             if self.use_bias:
                 b = self.b
-        out = tf.matmul(inputs, w)
+            out = self._real_matmul(inputs)
         if self.use_bias:
             out = out + b
-        return self.activation(out)
+        return self._activate(out, self.activation)
+
+    def _sparse_inputs(self, inputs):
+        """
+        Parses sparse inputs: a `tf.SparseTensor` or a pair (real, imag) of real `tf.SparseTensor`.
+        Only rank 2 sparse inputs (batch, features) are supported.
+        :return: Tuple (real, imag) of real SparseTensors for complex dtype (imag is None if the input was real),
+            a SparseTensor of the layer dtype otherwise.
+        """
+        real_dtype = self.my_dtype.real_dtype
+        if isinstance(inputs, (tuple, list)):
+            if len(inputs) != 2 or not all(isinstance(part, tf.SparseTensor) for part in inputs):
+                raise ValueError(f"{self.name} expected a tensor or a pair (real, imag) of SparseTensors, "
+                                 f"received {inputs}")
+            if not self.my_dtype.is_complex:
+                raise ValueError(f"{self.name} has real dtype {self.my_dtype}, "
+                                 f"it cannot receive a (real, imag) pair of SparseTensors")
+            return tuple(tf.cast(part, real_dtype) for part in inputs)
+        if not self.my_dtype.is_complex:
+            return tf.cast(inputs, self.my_dtype)
+        if not inputs.dtype.is_complex:
+            return tf.cast(inputs, real_dtype), None
+        return (tf.SparseTensor(inputs.indices, tf.cast(tf.math.real(inputs.values), real_dtype), inputs.dense_shape),
+                tf.SparseTensor(inputs.indices, tf.cast(tf.math.imag(inputs.values), real_dtype), inputs.dense_shape))
+
+    def _real_matmul(self, inputs):
+        return _matmul(inputs, self.w)
+
+    def _complex_matmul(self, inputs):
+        """
+        Product of the complex `inputs` with the layer kernel, following `self.matmul_method`.
+        """
+        return self._complex_product(inputs, 'kernel', self.w_r, self.w_i)
+
+    def _complex_product(self, inputs, name: str, kernel_r, kernel_i):
+        """
+        Product of the complex `inputs` with the complex matrix (kernel_r + j kernel_i), following `self.matmul_method`.
+        :param inputs: Complex tensor or (real, imag) pair of real SparseTensors (see `_sparse_inputs`).
+        :param name: Name of the kernel, used as the cache key of the tensors composed from it.
+        """
+        if isinstance(inputs, tuple):
+            return self._sparse_complex_product(*inputs, name, kernel_r, kernel_i)
+        if self.matmul_method == 'gauss':
+            inputs_r = tf.math.real(inputs)
+            inputs_i = tf.math.imag(inputs)
+            # (a + jb)(c + jd) = (ac - bd) + j((a + b)(c + d) - ac - bd)
+            real_real = tf.matmul(inputs_r, kernel_r)
+            imag_imag = tf.matmul(inputs_i, kernel_i)
+            cross = tf.matmul(inputs_r + inputs_i, self._cached(f'{name}_sum', lambda: kernel_r + kernel_i))
+            return tf.complex(real_real - imag_imag, cross - real_real - imag_imag)
+        if self.matmul_method == 'packed':
+            kernel = self._cached(f'packed_{name}', lambda: block_kernel(kernel_r, kernel_i))
+            split_inputs = complex_to_split(inputs)     # (..., in_features, 2)
+            shape = tf.shape(split_inputs)
+            outputs = tf.matmul(tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0)), kernel)
+            shape = tf.shape(outputs)
+            return split_to_complex(tf.reshape(outputs, tf.concat([shape[:-1], [kernel_r.shape[-1], 2]], axis=0)))
+        return tf.matmul(inputs, self._cached(name, lambda: tf.complex(kernel_r, kernel_i)))
+
+    def _sparse_complex_product(self, inputs_r, inputs_i, name: str, kernel_r, kernel_i):
+        """
+        Same as `_complex_product` for sparse inputs (inputs_r + j inputs_i). The inputs are never densified,
+            the cost is proportional to their number of non-zero elements.
+        :param inputs_i: Imaginary part of the inputs, None if the inputs are real.
+        """
+        matmul = tf.sparse.sparse_dense_matmul
+        if inputs_i is None:
+            return tf.complex(matmul(inputs_r, kernel_r), matmul(inputs_r, kernel_i))
+        if self.matmul_method == 'packed':
+            # [x_r, x_i] [[w_r, w_i], [-w_i, w_r]] = [y_r, y_i]
+            kernel = self._cached(f'packed_sparse_{name}', lambda: tf.concat([tf.concat([kernel_r, kernel_i], axis=1),
+                                                                             tf.concat([-kernel_i, kernel_r], axis=1)],
+                                                                            axis=0))
+            outputs = matmul(tf.sparse.concat(axis=-1, sp_inputs=[inputs_r, inputs_i]), kernel)
+            outputs_r, outputs_i = tf.split(outputs, 2, axis=-1)
+            return tf.complex(outputs_r, outputs_i)
+        if self.matmul_method == 'gauss':
+            real_real = matmul(inputs_r, kernel_r)
+            imag_imag = matmul(inputs_i, kernel_i)
+            cross = matmul(tf.sparse.add(inputs_r, inputs_i), self._cached(f'{name}_sum', lambda: kernel_r + kernel_i))
+            return tf.complex(real_real - imag_imag, cross - real_real - imag_imag)
+        return tf.complex(matmul(inputs_r, kernel_r) - matmul(inputs_i, kernel_i),
+                          matmul(inputs_r, kernel_i) + matmul(inputs_i, kernel_r))
+
+    def _precompute_weights(self):
+        if self.my_dtype.is_complex:
+            # A dummy product caches the kernel used by `self.matmul_method`
+            self._complex_matmul(tf.zeros((1, self.w_r.shape[0]), dtype=self.my_dtype))
+            if self.use_bias:
+                self._cached('bias', lambda: tf.complex(self.b_r, self.b_i))
 
     def get_real_equivalent(self, output_multiplier=2):
         # assert self.my_dtype.is_complex, "The layer was already real!"    # TODO: Shall I check this?
@@ -307,14 +787,237 @@ class ComplexDense(Dense, ComplexLayer):
                             kernel_initializer=self.kernel_initializer, bias_initializer=self.bias_initializer,
                             #kernel_constraint=self.kernel_constraint, kernel_regularizer=self.kernel_regularizer, #MODIFIED CODE ------
                             kernel_constraint=self.kernel_constraint, kernel_regularizer=self.kernel_regularizer,
-                            dtype=self.my_dtype.real_dtype, name=self.name + "_real_equiv")
+                            dtype=self.my_dtype.real_dtype, matmul_method=self.matmul_method,
+                            name=self.name + "_real_equiv")
 
     def get_config(self):
         config = super(ComplexDense, self).get_config()
         config.update({
             'dtype': self.my_dtype,
-            'init_technique': self.init_technique
+            'init_technique': self.init_technique,
+            'matmul_method': self.matmul_method,
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexLowRankDense(ComplexDense):
+    """
+    Fully connected complex-valued layer with a low-rank (factorised) kernel.
+
+    Implements the operation:
+        activation(input * U * V + bias)
+
+    * where U is a matrix of shape (input_features, rank) and V a matrix of shape (rank, units).
+    Parameters and FLOPs go from input_features * units to rank * (input_features + units).
+    Use `ComplexLowRankDense.from_dense` to compress a trained `ComplexDense` layer.
+    """
+
+    def __init__(self, units: int, rank: int, **kwargs):
+        """
+        :param units: Positive integer, dimensionality of the output space.
+        :param rank: Positive integer, (complex) rank of the kernel, the inner dimension of U and V.
+        :param kwargs: Same arguments as `ComplexDense` (activation, initializers, constraints, matmul_method...).
+            The kernel initializer, regularizer and constraints are used for both U and V.
+        """
+        super(ComplexLowRankDense, self).__init__(units, **kwargs)
+        if rank < 1:
+            raise ValueError(f"rank must be a positive integer, received {rank}")
+        self.rank = int(rank)
+
+    def _build_kernel(self, input_shape):
+        if self.my_dtype.is_complex:
+            self.u_r, self.u_i = self._add_kernel('kernel_u', (input_shape[-1], self.rank))
+            self.v_r, self.v_i = self._add_kernel('kernel_v', (self.rank, self.units))
+        else:
+            self.u = self._add_kernel('kernel_u', (input_shape[-1], self.rank))
+            self.v = self._add_kernel('kernel_v', (self.rank, self.units))
+
+    def _real_matmul(self, inputs):
+        return tf.matmul(_matmul(inputs, self.u), self.v)
+
+    def _complex_matmul(self, inputs):
+        outputs = self._complex_product(inputs, 'kernel_u', self.u_r, self.u_i)
+        return self._complex_product(outputs, 'kernel_v', self.v_r, self.v_i)
+
+    def _precompute_weights(self):
+        if self.my_dtype.is_complex:
+            self._complex_matmul(tf.zeros((1, self.u_r.shape[0]), dtype=self.my_dtype))
+            if self.use_bias:
+                self._cached('bias', lambda: tf.complex(self.b_r, self.b_i))
+
+    @classmethod
+    def from_dense(cls, dense: ComplexDense, rank: int):
+        """
+        Approximates a built `ComplexDense` layer with a `ComplexLowRankDense` using the truncated (complex) SVD
+            of its kernel W = S_U diag(s) S_V^H, so that U = S_U[:, :rank] sqrt(s) and V = sqrt(s) S_V[:, :rank]^H.
+        This is the best rank `rank` approximation of W in Frobenius norm. Bias and configuration are copied.
+        :param dense: Built `ComplexDense` layer.
+        :param rank: Rank of the new layer. Should be smaller than min(input_features, units) to save anything.
+        :return: Built `ComplexLowRankDense` layer.
+        """
+        if not dense.built:
+            raise ValueError(f"Layer {dense.name} must be built to be converted to a low-rank layer")
+        layer = cls(units=dense.units, rank=rank, activation=dense.activation, use_bias=dense.use_bias,
+                    kernel_initializer=dense.kernel_initializer, bias_initializer=dense.bias_initializer,
+                    kernel_constraint=dense.kernel_constraint, kernel_regularizer=dense.kernel_regularizer,
+                    dtype=dense.my_dtype, init_technique=dense.init_technique, matmul_method=dense.matmul_method,
+                    representation=dense._get_representation(), name=dense.name + "_low_rank")
+        if dense.my_dtype.is_complex:
+            kernel = tf.complex(dense.w_r, dense.w_i)
+        else:
+            kernel = tf.convert_to_tensor(dense.w)
+        layer.build(layer._input_shape([None, kernel.shape[0]]))
+        layer.built = True      # Otherwise the first call builds it again, initializing the factors
+        singular_values, left, right = tf.linalg.svd(kernel)
+        sqrt_s = tf.cast(tf.sqrt(singular_values[:rank]), kernel.dtype)
+        u = left[:, :rank] * sqrt_s
+        v = tf.expand_dims(sqrt_s, axis=-1) * tf.linalg.adjoint(right[:, :rank])
+        if layer.my_dtype.is_complex:
+            for variable, value in ((layer.u_r, tf.math.real(u)), (layer.u_i, tf.math.imag(u)),
+                                    (layer.v_r, tf.math.real(v)), (layer.v_i, tf.math.imag(v))):
+                variable.assign(value)
+            if layer.use_bias:
+                layer.b_r.assign(dense.b_r)
+                layer.b_i.assign(dense.b_i)
+        else:
+            layer.u.assign(u)
+            layer.v.assign(v)
+            if layer.use_bias:
+                layer.b.assign(dense.b)
+        return layer
+
+    def get_real_equivalent(self, output_multiplier=2):
+        # Same number of real parameters with the same rank: rank * (2 * input_features + 2 * units)
+        return ComplexLowRankDense(units=int(round(self.units * output_multiplier)), rank=self.rank,
+                                   activation=self.activation, use_bias=self.use_bias,
+                                   kernel_initializer=self.kernel_initializer, bias_initializer=self.bias_initializer,
+                                   kernel_constraint=self.kernel_constraint, kernel_regularizer=self.kernel_regularizer,
+                                   dtype=self.my_dtype.real_dtype, matmul_method=self.matmul_method,
+                                   name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexLowRankDense, self).get_config()
+        config.update({
+            'rank': self.rank
+        })
+        return config
+
 
+class ComplexUnitaryDense(Layer, ComplexLayer):
+    """
+    Square fully connected complex-valued layer with a structured unitary matrix, as in
+        "Unitary Evolution Recurrent Neural Networks" from M. Arjovsky et al. (2016)
+        URL: https://arxiv.org/abs/1511.06464
+
+    Implements the operation:
+        activation(W input + bias), with W = D3 R2 F^-1 D2 P R1 F D1
+
+    * where D1, D2, D3 are diagonal matrices of (learnt) phases e^(j theta),
+    * R1, R2 are (learnt) Householder reflections I - 2 v v^H / ||v||^2,
+    * F is the unitary discrete Fourier transform and P a fixed random permutation.
+    W is unitary so it preserves the norm of the input (no vanishing or exploding gradients when stacked).
+    Applied in O(n log n) with 7n real parameters (plus bias) instead of the O(n^2) of a square `ComplexDense`.
+    """
+
+    def __init__(self, activation: t_activation = None, use_bias: bool = True, bias_initializer="Zeros",
+                 seed: Optional[int] = None, dtype=DEFAULT_COMPLEX_TYPE, representation: Optional[str] = None,
+                 **kwargs):
+        """
+        :param activation: Activation function to use. Either from keras.activations or cvnn.activations.
+            If you don't specify anything, no activation is applied (ie. "linear" activation: a(x) = x).
+        :param use_bias: Boolean, whether the layer uses a bias vector.
+        :param bias_initializer: Initializer for the bias vector.
+        :param seed: A Python integer used as seed of the permutation P. Drawn at random if None
+            (and saved in the config so that the layer can be re-created with the same permutation).
+        :param dtype: Complex dtype of the input and layer.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexUnitaryDense, self).__init__(**kwargs)
+        self.my_dtype = tf.dtypes.as_dtype(dtype)
+        if not self.my_dtype.is_complex:
+            raise ValueError(f"{self.__class__.__name__} only supports complex dtypes, received {self.my_dtype}")
+        self.activation = activations.get(activation if activation is not None else "linear")
+        self.use_bias = use_bias
+        self.bias_initializer = initializers.get(bias_initializer)
+        self.seed = seed if seed is not None else int(np.random.randint(2 ** 31 - 1))
+
+    def build(self, input_shape):
+        self.units = int(self._complex_shape(input_shape)[-1])
+        real_dtype = self.my_dtype.real_dtype
+        self.phases = self.add_weight('phases', shape=(3, self.units), dtype=real_dtype,
+                                      initializer=initializers.RandomUniform(-np.pi, np.pi), trainable=True)
+        self.reflection_r = self.add_weight('reflection_r', shape=(2, self.units), dtype=real_dtype,
+                                            initializer=initializers.RandomUniform(-1., 1.), trainable=True)
+        self.reflection_i = self.add_weight('reflection_i', shape=(2, self.units), dtype=real_dtype,
+                                            initializer=initializers.RandomUniform(-1., 1.), trainable=True)
+        if self.use_bias:
+            self.b_r = self.add_weight('bias_r', shape=(self.units,), dtype=real_dtype,
+                                       initializer=self.bias_initializer, trainable=True)
+            self.b_i = self.add_weight('bias_i', shape=(self.units,), dtype=real_dtype,
+                                       initializer=self.bias_initializer, trainable=True)
+        self.permutation = tf.constant(np.random.RandomState(self.seed).permutation(self.units), dtype=tf.int32)
+        self.built = True
+
+    def _get_phasors(self):
+        """:return: Tensor of shape (3, units) with the diagonals e^(j theta) of D1, D2 and D3."""
+        return tf.complex(tf.math.cos(self.phases), tf.math.sin(self.phases))
+
+    def _get_reflections(self):
+        """:return: Tensor of shape (2, units) with the reflection vectors v / ||v|| of R1 and R2."""
+        reflections = tf.complex(self.reflection_r, self.reflection_i)
+        norm = tf.norm(tf.stack([self.reflection_r, self.reflection_i], axis=-1), axis=[-2, -1])
+        return reflections / tf.cast(tf.expand_dims(norm, axis=-1), self.my_dtype)
+
+    @staticmethod
+    def _reflect(inputs, unit_vector):
+        # (I - 2 v v^H) x = x - 2 (v^H x) v
+        projection = tf.reduce_sum(tf.math.conj(unit_vector) * inputs, axis=-1, keepdims=True)
+        return inputs - 2 * projection * unit_vector
+
+    def call(self, inputs):
+        inputs = self._complex_view(inputs)
+        if inputs.dtype != self.my_dtype:
+            tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
+            inputs = tf.cast(inputs, self.my_dtype)
+        phasors = self._cached('phasors', self._get_phasors)
+        reflections = self._cached('reflections', self._get_reflections)
+        scale = tf.cast(tf.math.sqrt(float(self.units)), self.my_dtype)     # Makes the FFT unitary
+        outputs = inputs * phasors[0]
+        outputs = tf.signal.fft(outputs) / scale
+        outputs = self._reflect(outputs, reflections[0])
+        outputs = tf.gather(outputs, self.permutation, axis=-1)
+        outputs = outputs * phasors[1]
+        outputs = tf.signal.ifft(outputs) * scale
+        outputs = self._reflect(outputs, reflections[1])
+        outputs = outputs * phasors[2]
+        if self.use_bias:
+            outputs = outputs + self._cached('bias', lambda: tf.complex(self.b_r, self.b_i))
+        return self._activate(outputs, self.activation)
+
+    def _precompute_weights(self):
+        self._cached('phasors', self._get_phasors)
+        self._cached('reflections', self._get_reflections)
+        if self.use_bias:
+            self._cached('bias', lambda: tf.complex(self.b_r, self.b_i))
+
+    def compute_output_shape(self, input_shape):
+        return input_shape
+
+    def get_real_equivalent(self):
+        raise NotImplementedError(f"{self.__class__.__name__} has no real-valued equivalent, the unitary structure "
+                                  f"relies on complex phases and the Fourier transform")
+
+    def get_config(self):
+        config = super(ComplexUnitaryDense, self).get_config()
+        config.update({
+            'activation': activations.serialize(self.activation),
+            'use_bias': self.use_bias,
+            'bias_initializer': initializers.serialize(self.bias_initializer),
+            'seed': self.seed,
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
         })
         return config
 
@@ -336,7 +1039,8 @@ class ComplexDropout(Layer, ComplexLayer):
     not have any variables/weights that can be frozen during training.)
     """
 
-    def __init__(self, rate: float, noise_shape=None, seed: Optional[int] = None, **kwargs):
+    def __init__(self, rate: float, noise_shape=None, seed: Optional[int] = None,
+                 representation: Optional[str] = None, **kwargs):
         """
         :param rate: Float between 0 and 1. Fraction of the input units to drop.
         :param noise_shape: 1D integer tensor representing the shape of the binary dropout mask that
@@ -344,7 +1048,9 @@ class ComplexDropout(Layer, ComplexLayer):
             For instance, if your inputs have shape `(batch_size, timesteps, features)` and you want the dropout
             mask to be the same for all timesteps, you can use `noise_shape=(batch_size, 1, features)`.
         :param seed: A Python integer to use as random seed.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
         """
+        self._init_representation(representation)
         super(ComplexDropout, self).__init__(**kwargs)  # trainable=False,
         if isinstance(rate, (int, float)) and not 0 <= rate <= 1:
             raise ValueError(f'Invalid value {rate} received for `rate`, expected a value between 0 and 1.')
@@ -387,12 +1093,13 @@ class ComplexDropout(Layer, ComplexLayer):
         # output = control_flow_util.smart_cond(training, dropped_inputs, lambda: tf.identity(inputs))
         # return output
         if not training:
-            return inputs
+            return self._to_representation(inputs)
+        inputs = self._complex_view(inputs)     # The real and imaginary parts are dropped together
         drop_filter = tf.nn.dropout(tf.ones(tf.shape(inputs)), rate=self.rate,
                                     noise_shape=self.noise_shape, seed=self.seed)
         y_out = tf.multiply(tf.cast(drop_filter, dtype=inputs.dtype), inputs)
         y_out = tf.cast(y_out, dtype=inputs.dtype)
-        return y_out
+        return self._to_representation(y_out)
 
     def compute_output_shape(self, input_shape):
         return input_shape
@@ -406,7 +1113,8 @@ class ComplexDropout(Layer, ComplexLayer):
         config.update({
             'rate': self.rate,
             'noise_shape': self.noise_shape,
-            'seed': self.seed
+            'seed': self.seed,
+            'representation': self._get_representation()
         })
         return config
 
@@ -420,7 +1128,8 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
                  center: bool = True, scale: bool = True, epsilon: float = 0.001,
                  beta_initializer=Zeros(), gamma_initializer=Ones(), dtype=DEFAULT_COMPLEX_TYPE,
                  moving_mean_initializer=Zeros(), moving_variance_initializer=Ones(), cov_method: int = 2,  # TODO: Check inits
-                 **kwargs):
+                 representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         self.epsilon = epsilon
         self.cov_method = cov_method
@@ -437,6 +1146,7 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
         self.scale = scale
 
     def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
         self.epsilon_matrix = tf.eye(2, dtype=self.my_dtype.real_dtype) * self.epsilon
         # Cast the negative indices to positive
         self.axis = [len(input_shape) + ax if ax < 0 else ax for ax in self.axis]
@@ -502,6 +1212,7 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
             )
 
     def call(self, inputs, training=None):
+        inputs = self._complex_view(inputs)
         if inputs.dtype != self.my_dtype:
             tf.print(f"Warning: Expecting input dtype {self.my_dtype} but got {inputs.dtype}. "
                      f"Automatic cast will be done.")
@@ -511,7 +1222,7 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
             tf.print(f"Training was None and now is {training}")
             # This is used for my own debugging, I don't know WHEN this happens,
             # I trust K.learning_phase() returns a correct boolean.
-        if training:
+        if training and not self._is_frozen():
             # First get the mean and var
             mean = tf.math.reduce_mean(inputs, axis=self.used_axis)
             if self.cov_method == 1:
@@ -521,7 +1232,7 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
                 indices = [([[i, i], [i, i + valu]], [[i + valu, i], [i + valu, i + valu]]) for i in range(0, valu)]
                 var = tf.gather_nd(var_20_20, indices=indices)
             elif self.cov_method == 2:
-                X_10_2 = tf.stack((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
+                X_10_2 = self._split_parts(inputs)
                 var_10_2_2 = tfp.stats.covariance(X_10_2, sample_axis=self.used_axis, event_axis=-1)
                 var = var_10_2_2
             else:
@@ -530,34 +1241,63 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
             # Now the train part with these values
             self.moving_mean.assign(self.momentum * self.moving_mean + (1. - self.momentum) * mean)
             self.moving_var.assign(self.moving_var * self.momentum + var * (1. - self.momentum))
-            out = self._normalize(inputs, var, mean)
+            out = self._normalize(inputs, self._whitening_matrix(var), mean)
+        elif self._is_frozen():
+            out = self._normalize(inputs, self._cached('whitening', lambda: self._whitening_matrix(self.moving_var)),
+                                  self._cached('moving_mean', lambda: tf.identity(self.moving_mean)))
         else:
-            out = self._normalize(inputs, self.moving_var, self.moving_mean)
+            out = self._normalize(inputs, self._whitening_matrix(self.moving_var), self.moving_mean)
         if self.scale:
-            if self.my_dtype.is_complex:
-                gamma = tf.complex(self.gamma_r, self.gamma_i)      # TODO: Should this be real valued?
-            else:
-                gamma = self.gamma
-            out = gamma * out
+            out = self._get_gamma() * out
         if self.center:
-            if self.my_dtype.is_complex:
-                beta = tf.complex(self.beta_r, self.beta_i)
-            else:
-                beta = self.beta
-            out = out + beta
-        return out
+            out = out + self._get_beta()
+        return self._to_representation(out)
+
+    def _get_gamma(self):
+        if not self.my_dtype.is_complex:
+            return self.gamma
+        gamma = lambda: tf.complex(self.gamma_r, self.gamma_i)      # TODO: Should this be real valued?
+        # Moving statistics may be assigned inside a graph while the layer is not trainable,
+        #   so composed weights are only cached while frozen.
+        return self._cached('gamma', gamma) if self._is_frozen() else gamma()
+
+    def _get_beta(self):
+        if not self.my_dtype.is_complex:
+            return self.beta
+        beta = lambda: tf.complex(self.beta_r, self.beta_i)
+        return self._cached('beta', beta) if self._is_frozen() else beta()
 
-    def _normalize(self, inputs, var, mean):
+    def _precompute_weights(self):
+        self._cached('whitening', lambda: self._whitening_matrix(self.moving_var))
+        self._cached('moving_mean', lambda: tf.identity(self.moving_mean))
+        if self.scale:
+            self._get_gamma()
+        if self.center:
+            self._get_beta()
+
+    def _whitening_matrix(self, var):
         """
-        :inputs: Tensor
         :param var: Tensor of shape [..., 2, 2], if inputs dtype is real, var[slice] = [[var_slice, 0], [0, 0]]
+        :return: var^(-1/2) of shape [..., 2, 2]
+        """
+        # Inv and sqrtm is done over 2 inner most dimension [..., M, M] so it should be [..., 2, 2] for us.
+        return tf.linalg.sqrtm(tf.linalg.inv(var + self.epsilon_matrix))  # TODO: Check this exists always?
+
+    def _split_parts(self, inputs):
+        """:return: Real tensor of shape [..., 2] with the real and imaginary parts of `inputs` (zero for real dtype)."""
+        if self.my_dtype.is_complex:
+            return complex_to_split(inputs)
+        return tf.stack((tf.math.real(inputs), tf.math.imag(inputs)), axis=-1)
+
+    def _normalize(self, inputs, inv_sqrt_var, mean):
+        """
+        :inputs: Tensor
+        :param inv_sqrt_var: Whitening matrix of shape [..., 2, 2] (see `_whitening_matrix`)
         :param mean: Tensor with the mean in the corresponding dtype (same shape as inputs)
         """
         complex_zero_mean = inputs - mean
-        # Inv and sqrtm is done over 2 inner most dimension [..., M, M] so it should be [..., 2, 2] for us.
-        inv_sqrt_var = tf.linalg.sqrtm(tf.linalg.inv(var + self.epsilon_matrix))  # var^(-1/2)  # TODO: Check this exists always?
         # Separate real and imag so I go from shape [...] to [..., 2]
-        zero_mean = tf.stack((tf.math.real(complex_zero_mean), tf.math.imag(complex_zero_mean)), axis=-1)
+        zero_mean = self._split_parts(complex_zero_mean)
         # I expand dims to make the mult of matrix [..., 2, 2] and [..., 2, 1] resulting in [..., 2, 1]
         inputs_hat = tf.matmul(inv_sqrt_var, tf.expand_dims(zero_mean, axis=-1))
 
@@ -565,6 +1305,8 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
         # Use reshape and not squeeze in case I have 1 channel for example.
         squeeze_inputs_hat = tf.reshape(inputs_hat, shape=tf.shape(inputs_hat)[:-1])
         # Get complex data
+        if self.my_dtype.is_complex:
+            return split_to_complex(squeeze_inputs_hat)
         complex_inputs_hat = tf.cast(tf.complex(squeeze_inputs_hat[..., 0], squeeze_inputs_hat[..., 1]),
                                      dtype=self.my_dtype)
         # import pdb; pdb.set_trace()
@@ -594,6 +1336,7 @@ class ComplexBatchNormalization(Layer, ComplexLayer):
             'gamma_initializer': self.gamma_initializer,
             'dtype': self.my_dtype,
             'moving_mean_initializer': self.moving_mean_initializer,
-            'moving_variance_initializer': self.moving_variance_initializer
+            'moving_variance_initializer': self.moving_variance_initializer,
+            'representation': self._get_representation()
         })
         return config
@@ -1,3 +1,5 @@
+import functools
+import itertools
 import tensorflow as tf
 from packaging import version
 from tensorflow.keras.layers import Layer
@@ -14,7 +16,290 @@ from abc import abstractmethod
 from typing import Union, Optional, Tuple
 # Own models
 from cvnn.layers.core import ComplexLayer
-from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.layers.core import DEFAULT_COMPLEX_TYPE, complex_to_split, split_to_complex
+from cvnn.layers.core import _split_to_channels, _channels_to_split, _move_axis
+
+# Indices output by ComplexMaxPooling2DWithArgmax: flattened input positions (int64) or in-window offsets (uint8)
+ARGMAX_FORMATS = {'flat', 'window'}
+
+
+def _pool_parts(pool, inputs, channels_first: bool, **kwargs):
+    """
+    Applies the real-valued pooling `pool` to complex `inputs`, pooling the real and imaginary parts at once
+        interleaved on the channel axis (no copy for channels_last).
+    :param channels_first: True if the channel axis of `inputs` is the second one.
+    :param kwargs: Arguments of `pool` (including its own `data_format`).
+    """
+    if not inputs.dtype.is_complex:
+        return pool(inputs, **kwargs)
+    outputs = pool(_split_to_channels(complex_to_split(inputs), channels_first), **kwargs)
+    return split_to_complex(_channels_to_split(outputs, channels_first))
+
+
+def _polar_avg_pool(inputs, renormalize: bool, channels_first: bool = False, **kwargs):
+    """
+    Average pooling of complex `inputs` in polar form without trigonometric functions: the magnitudes |z| and the
+        unit phasors z/|z| (0 for z = 0) are pooled at once, stacked on the channel axis.
+    :param renormalize: If True, the mean phasor is scaled back to unit length, giving the mean magnitude with the
+        circular mean phase (phase 0 where the phasors cancel out). Otherwise the mean magnitude is multiplied by
+        the mean phasor, whose length (the mean resultant length, between 0 and 1) measures how aligned
+        the phases of the window are.
+    :param channels_first: True if the channel axis of `inputs` is the second one. The inputs are then transposed
+        and pooled as channels_last, the only layout supported by the CPU kernels of `tf.nn.avg_pool2d`.
+    :param kwargs: Arguments of `tf.nn.avg_pool2d` for channels_last inputs (ksize, strides and padding).
+    """
+    if channels_first:
+        inputs = _move_axis(inputs, 1, -1)
+    magnitude = tf.math.abs(inputs)
+    phasor = complex_to_split(inputs) / tf.expand_dims(tf.where(magnitude > 0, magnitude, tf.ones_like(magnitude)),
+                                                       axis=-1)
+    pooled = tf.nn.avg_pool2d(tf.concat([magnitude, phasor[..., 0], phasor[..., 1]], axis=-1), **kwargs)
+    magnitude, phasor_r, phasor_i = tf.split(pooled, 3, axis=-1)
+    if renormalize:
+        squared_length = tf.square(phasor_r) + tf.square(phasor_i)
+        aligned = squared_length > 0
+        scale = magnitude * tf.math.rsqrt(tf.where(aligned, squared_length, tf.ones_like(squared_length)))
+        outputs_r = tf.where(aligned, phasor_r * scale, magnitude)
+        outputs_i = tf.where(aligned, phasor_i * scale, tf.zeros_like(phasor_i))
+    else:
+        outputs_r, outputs_i = magnitude * phasor_r, magnitude * phasor_i
+    outputs = split_to_complex(tf.stack([outputs_r, outputs_i], axis=-1))
+    return _move_axis(outputs, -1, 1) if channels_first else outputs
+
+
+def _call_pool_function(layer, inputs, *args, **kwargs):
+    """
+    Calls `layer.pool_function` on complex inputs. The inputs and outputs of split layers are viewed as complex
+        tensors (see `cvnn.layers.set_representation`).
+    """
+    outputs = layer.pool_function(layer._complex_view(inputs), *args, **kwargs)
+    if isinstance(outputs, tuple):      # (outputs, argmax)
+        return (layer._to_representation(outputs[0]),) + outputs[1:]
+    return layer._to_representation(outputs)
+
+
+def _shape(tensor):
+    """:return: Shape of `tensor` (of known rank) as a list, static dimensions when known and scalar tensors otherwise."""
+    dynamic_shape = tf.shape(tensor)
+    return [d if d is not None else dynamic_shape[i] for i, d in enumerate(tensor.shape.as_list())]
+
+
+def _pooling_geometry(spatial_shape, pool_size, strides, padding: str):
+    """
+    :param spatial_shape: Length of each spatial axis of the inputs (ints or scalar tensors).
+    :param padding: 'valid' or 'same'.
+    :return: Tuple (output_size, paddings) with the output length and the (before, after) padding of each spatial
+        axis, as computed by `tf.nn.max_pool`.
+    """
+    output_size, paddings = [], []
+    for length, pool, stride in zip(spatial_shape, pool_size, strides):
+        if padding == 'same':
+            size = (length + stride - 1) // stride
+            total = (size - 1) * stride + pool - length
+            total = tf.maximum(total, 0) if isinstance(total, tf.Tensor) else max(total, 0)
+            paddings.append((total // 2, total - total // 2))
+        else:
+            size = (length - pool) // stride + 1
+            paddings.append((0, 0))
+        output_size.append(size)
+    return output_size, paddings
+
+
+def _window_positions(pool_size):
+    """:return: Positions of the pooling window in row-major order (the order of the in-window offsets)."""
+    return list(itertools.product(*[range(pool) for pool in pool_size]))
+
+
+def _window_slices(pool_size, strides, output_size):
+    """
+    :return: For each position of the pooling window, the slices of a (batch, *spatial, channels) tensor selecting
+        that element of every window.
+    """
+    return [(slice(None),) + tuple(slice(o, o + (size - 1) * stride + 1, stride)
+                                   for o, size, stride in zip(window, output_size, strides)) + (slice(None),)
+            for window in _window_positions(pool_size)]
+
+
+def _scatter_to_windows(values, offsets, pool_size, strides, spatial_shape):
+    """
+    Places each element of `values` (batch, *output_size, channels) at the position `offsets` of its pooling window
+        in a zero tensor of spatial shape `spatial_shape` (the padded inputs of the pooling).
+    Values of overlapping windows falling on the same position are summed, always in the same order.
+    """
+    dims = _shape(values)
+    rank = len(pool_size)
+    if tuple(strides) == tuple(pool_size):
+        # The windows tile the inputs: they are laid out with a reshape and a transpose
+        window_elements = functools.reduce(lambda a, b: a * b, pool_size)
+        windows = tf.cast(tf.one_hot(offsets, window_elements), values.dtype) * tf.expand_dims(values, axis=-1)
+        windows = tf.reshape(windows, tf.stack(dims + list(pool_size)))     # (batch, *output_size, C, *pool_size)
+        windows = tf.transpose(windows, [0] + [axis for i in range(rank) for axis in (1 + i, rank + 2 + i)] +
+                               [rank + 1])
+        size = [length * pool for length, pool in zip(dims[1:-1], pool_size)]
+        outputs = tf.reshape(windows, tf.stack([dims[0]] + size + [dims[-1]]))
+        # 'valid' pooling may leave out the last elements
+        return tf.pad(outputs, [[0, 0]] + [[0, length - n] for length, n in zip(spatial_shape, size)] + [[0, 0]])
+    shape = tf.stack([dims[0]] + list(spatial_shape) + [dims[-1]])
+    zeros = tf.zeros_like(values)
+    outputs = None
+    for offset, window in enumerate(_window_positions(pool_size)):
+        end = [o + (size - 1) * stride + 1 for o, size, stride in zip(window, dims[1:-1], strides)]
+        # Gradient of the strided slice: places the values at the strided positions of a zero tensor
+        part = tf.raw_ops.StridedSliceGrad(shape=shape, begin=tf.constant([0] + list(window) + [0]),
+                                           end=tf.stack([dims[0]] + end + [dims[-1]]),
+                                           strides=tf.constant([1] + list(strides) + [1]),
+                                           dy=tf.where(tf.equal(offsets, offset), values, zeros))
+        outputs = part if outputs is None else outputs + part
+    return outputs
+
+
+def _gather_from_windows(inputs, offsets, pool_size, strides, output_size):
+    """
+    Inverse of `_scatter_to_windows`: gathers the element at the position `offsets` of each pooling window of
+        `inputs` (batch, *spatial, channels), one window position at a time.
+    :return: Tensor of the shape of `offsets`.
+    """
+    slices = _window_slices(pool_size, strides, output_size)
+    outputs = inputs[slices[0]]
+    for offset, window in enumerate(slices[1:], start=1):
+        outputs = tf.where(tf.equal(offsets, offset), inputs[window], outputs)
+    return outputs
+
+
+def _unpool(values, offsets, pool_size, strides, padding: str, spatial_shape):
+    """
+    Max unpooling (1D, 2D or 3D) of channels_last `values`: each value is placed at the position `offsets` of its
+        pooling window (see `_magnitude_max_pool`) in a zero tensor of the shape of the pooling inputs.
+    Values of overlapping windows falling on the same position are summed, always in the same order.
+    The gradient gathers back the selected positions (no scatter).
+    :param spatial_shape: Spatial shape of the pooling inputs (ints or scalar tensors).
+    :param padding: 'valid' or 'same'.
+    """
+    output_size = _shape(values)[1:-1]
+    _, paddings = _pooling_geometry(spatial_shape, pool_size, strides, padding)
+    padded_size = [length + before + after for length, (before, after) in zip(spatial_shape, paddings)]
+    crop = (slice(None),) + tuple(slice(before, before + length)
+                                  for length, (before, _) in zip(spatial_shape, paddings)) + (slice(None),)
+
+    @tf.custom_gradient
+    def unpool(x, indices):
+        def grad(d_outputs):
+            d_outputs = tf.pad(d_outputs, [(0, 0)] + paddings + [(0, 0)])
+            return _gather_from_windows(d_outputs, indices, pool_size, strides, output_size), None
+
+        return _scatter_to_windows(x, indices, pool_size, strides, padded_size)[crop], grad
+
+    return unpool(values, offsets)
+
+
+def _axis_range(axis: int, length, ndim: int):
+    """:return: int64 range of `length` elements along `axis` of a tensor of `ndim` dimensions (broadcastable)."""
+    shape = [1] * ndim
+    shape[axis] = -1
+    return tf.reshape(tf.range(tf.cast(length, tf.int64)), shape)
+
+
+def _magnitude_max_pool(inputs, pool_size, strides, padding: str, data_format: str):
+    """
+    Max pooling (1D, 2D or 3D) of complex inputs, ranking the values by their squared magnitude |z|^2 (no sqrt).
+    The windows are compared one position at a time with element-wise selections, so each maximum is gathered
+        within its window (no flattened copy of the inputs nor global indices).
+    Real inputs are ranked by their value, as `tf.nn.max_pool` does.
+    The gradient only flows to the selected positions.
+    :param padding: 'valid' or 'same'.
+    :param data_format: 'channels_last' or 'channels_first'.
+    :return: Tuple (outputs, offsets). `offsets` (int32, same shape as `outputs`) is the position of each maximum
+        in its window, flattened in row-major order of `pool_size`. Ties keep the first position.
+    """
+    channels_first = data_format == 'channels_first'
+    if channels_first:
+        inputs = _move_axis(inputs, 1, -1)
+    dims = _shape(inputs)
+    output_size, paddings = _pooling_geometry(dims[1:-1], pool_size, strides, padding)
+    padded_size = [length + before + after for length, (before, after) in zip(dims[1:-1], paddings)]
+    paddings = [(0, 0)] + paddings + [(0, 0)]
+    crop = (slice(None),) + tuple(slice(before, before + length)
+                                  for length, (before, _) in zip(dims[1:-1], paddings[1:-1])) + (slice(None),)
+    slices = _window_slices(pool_size, strides, output_size)
+
+    @tf.custom_gradient
+    def max_pool(x):
+        scores = tf.reduce_sum(tf.square(complex_to_split(x)), axis=-1) if x.dtype.is_complex else x
+        if padding == 'same':       # Padded positions are never selected
+            x = tf.pad(x, paddings)
+            scores = tf.pad(scores, paddings, constant_values=scores.dtype.min)
+        outputs, best = x[slices[0]], scores[slices[0]]
+        offsets = tf.zeros_like(best, dtype=tf.int32)
+        for offset, window in enumerate(slices[1:], start=1):
+            score = scores[window]
+            better = score > best
+            outputs = tf.where(better, x[window], outputs)
+            best = tf.where(better, score, best)
+            offsets = tf.where(better, offset, offsets)
+
+        def grad(d_outputs, *unused_d_offsets):
+            return _scatter_to_windows(d_outputs, offsets, pool_size, strides, padded_size)[crop]
+
+        return (outputs, offsets), grad
+
+    outputs, offsets = max_pool(inputs)
+    if channels_first:
+        outputs, offsets = _move_axis(outputs, -1, 1), _move_axis(offsets, -1, 1)
+    return outputs, offsets
+
+
+def _flat_argmax(inputs, offsets, pool_size, strides, padding: str, data_format: str):
+    """
+    :param offsets: In-window positions of the maxima of the pooling of `inputs` (see `_magnitude_max_pool`).
+    :return: Indices (int64) of the maxima in the flattened `inputs` (batch included), as returned by
+        `tf.nn.max_pool_with_argmax(..., include_batch_in_index=True)`.
+    """
+    channels_first = data_format == 'channels_first'
+    if channels_first:
+        inputs, offsets = _move_axis(inputs, 1, -1), _move_axis(offsets, 1, -1)
+    dims = _shape(inputs)
+    output_dims = _shape(offsets)
+    rank = len(pool_size)
+    _, paddings = _pooling_geometry(dims[1:-1], pool_size, strides, padding)
+    offsets = tf.cast(offsets, tf.int64)
+    coordinates = [_axis_range(0, output_dims[0], rank + 2)]
+    for i, (pool, stride, (before, _)) in enumerate(zip(pool_size, strides, paddings)):
+        window_coordinate = offsets // functools.reduce(lambda a, b: a * b, pool_size[i + 1:], 1) % pool
+        coordinates.append(_axis_range(i + 1, output_dims[i + 1], rank + 2) * stride + window_coordinate -
+                           tf.cast(before, tf.int64))
+    coordinates.append(_axis_range(rank + 1, output_dims[-1], rank + 2))
+    lengths = dims
+    if channels_first:      # Flattened in the (batch, channels, *spatial) order of the inputs
+        coordinates = [coordinates[0], coordinates[-1]] + coordinates[1:-1]
+        lengths = [dims[0], dims[-1]] + dims[1:-1]
+    indices = coordinates[0]
+    for coordinate, length in zip(coordinates[1:], lengths[1:]):
+        indices = indices * tf.cast(length, tf.int64) + coordinate
+    return _move_axis(indices, -1, 1) if channels_first else indices
+
+
+def _window_offsets(indices, pool_size, strides, padding: str, spatial_shape, channels, data_format: str):
+    """
+    Inverse of `_flat_argmax`: position in its pooling window of each index of the flattened pooling inputs.
+    :param indices: channels_last indices (batch, *output_size, channels) of the maxima in the flattened inputs
+        (batch included), flattened in the `data_format` layout of the pooling inputs.
+    :param spatial_shape: Spatial shape of the pooling inputs.
+    :param channels: Number of channels of the pooling inputs.
+    :return: int32 offsets as returned by `_magnitude_max_pool`.
+    """
+    rank = len(pool_size)
+    output_dims = _shape(indices)
+    _, paddings = _pooling_geometry(spatial_shape, pool_size, strides, padding)
+    indices = tf.cast(indices, tf.int64)
+    step = 1 if data_format == 'channels_first' else tf.cast(channels, tf.int64)
+    offsets = 0
+    for i in reversed(range(rank)):     # Last axis first, it is the contiguous one
+        length = tf.cast(spatial_shape[i], tf.int64)
+        window_coordinate = indices // step % length + tf.cast(paddings[i][0], tf.int64) - \
+            _axis_range(i + 1, output_dims[i + 1], rank + 2) * strides[i]
+        offsets += window_coordinate * functools.reduce(lambda a, b: a * b, pool_size[i + 1:], 1)
+        step *= length
+    return tf.cast(offsets, tf.int32)
 
 
 class ComplexPooling2D(Layer, ComplexLayer):
@@ -26,7 +311,8 @@ class ComplexPooling2D(Layer, ComplexLayer):
     def __init__(self, pool_size: Union[int, Tuple[int, int]] = (2, 2),
                  strides: Optional[Union[int, Tuple[int, int]]] = None,
                  padding: str = 'valid', data_format: Optional[str] = None,
-                 name: Optional[str] = None, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+                 name: Optional[str] = None, dtype=DEFAULT_COMPLEX_TYPE, representation: Optional[str] = None,
+                 **kwargs):
         """
         :param pool_size: An integer or tuple/list of 2 integers: (pool_height, pool_width)
             specifying the size of the pooling window.
@@ -39,7 +325,9 @@ class ComplexPooling2D(Layer, ComplexLayer):
             `channels_last` corresponds to inputs with shape
             `(batch, height, width, channels)` while `channels_first` corresponds to inputs with shape `(batch, channels, height, width)`.
         :param name: A string, the name of the layer.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
         """
+        self._init_representation(representation)
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         super(ComplexPooling2D, self).__init__(name=name, **kwargs)
         if data_format is None:
@@ -51,7 +339,7 @@ class ComplexPooling2D(Layer, ComplexLayer):
         self.strides = conv_utils.normalize_tuple(strides, 2, 'strides')
         self.padding = conv_utils.normalize_padding(padding)
         self.data_format = conv_utils.normalize_data_format(data_format)
-        self.input_spec = InputSpec(ndim=4)
+        self.input_spec = self._split_input_spec(InputSpec(ndim=4))
 
     @abstractmethod
     def pool_function(self, inputs, ksize, strides, padding, data_format):
@@ -64,8 +352,8 @@ class ComplexPooling2D(Layer, ComplexLayer):
         else:
             pool_shape = (1, 1) + self.pool_size
             strides = (1, 1) + self.strides
-        outputs = self.pool_function(
-            inputs,
+        outputs = _call_pool_function(
+            self, inputs,
             ksize=pool_shape,
             strides=strides,
             padding=self.padding.upper(),
@@ -98,7 +386,8 @@ class ComplexPooling2D(Layer, ComplexLayer):
             'padding': self.padding,
             'strides': self.strides,
             'data_format': self.data_format,
-            'dtype': self.my_dtype
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
         })
         return config
 
@@ -106,42 +395,18 @@ class ComplexPooling2D(Layer, ComplexLayer):
 class ComplexMaxPooling2D(ComplexPooling2D):
     """
     Max pooling operation for 2D spatial data.
-    Works for complex dtype using the absolute value to get the max.
+    Works for complex dtype using the absolute value to get the max (see `_magnitude_max_pool`).
     """
 
-    def __init__(self, pool_size: Union[int, Tuple[int, int]] = (2, 2),
-                 strides: Optional[Union[int, Tuple[int, int]]] = None,
-                 padding: str = 'valid', data_format: Optional[str] = None,
-                 name: Optional[str] = None, **kwargs):
-        super(ComplexMaxPooling2D, self).__init__(pool_size=pool_size, strides=strides, padding=padding,
-                                                  data_format=data_format, name=name, **kwargs)
-        self.argmax = None
-
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        # The max is calculated with the absolute value. This will still work on real values.
-        if inputs.dtype.is_complex:
-            abs_in = tf.math.abs(inputs)
-        else:
-            abs_in = inputs
-        output, argmax = tf.nn.max_pool_with_argmax(input=abs_in, ksize=ksize, strides=strides,
-                                                    padding=padding, data_format=data_format,
-                                                    include_batch_in_index=True)
-        self.argmax = argmax
-        shape = tf.shape(output)
-        tf_res = tf.reshape(tf.gather(tf.reshape(inputs, [-1]), argmax), shape)
-        # assert np.all(tf_res == output)             # For debugging when the input is real only!
-        assert tf_res.dtype == inputs.dtype
-        return tf_res
+        if not inputs.dtype.is_complex:
+            return tf.nn.max_pool(inputs, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+        return _magnitude_max_pool(inputs, self.pool_size, self.strides, self.padding, self.data_format)[0]
 
     def get_real_equivalent(self):
         return ComplexMaxPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
                                    data_format=self.data_format, name=self.name + "_real_equiv")
 
-    def get_max_index(self):
-        if self.argmax is None:
-            raise AttributeError("Variable argmax did not exist, call at least once the max-pooling layer")
-        return self.argmax  # TODO: Shall I check this is use only once?
-
 
 class ComplexMaxPooling2DWithArgmax(ComplexMaxPooling2D):
     """
@@ -151,6 +416,27 @@ class ComplexMaxPooling2DWithArgmax(ComplexMaxPooling2D):
     Works for complex dtype using the absolute value to get the max.
     """
 
+    def __init__(self, pool_size: Union[int, Tuple[int, int]] = (2, 2),
+                 strides: Optional[Union[int, Tuple[int, int]]] = None,
+                 padding: str = 'valid', data_format: Optional[str] = None,
+                 name: Optional[str] = None, argmax_format: str = 'flat', **kwargs):
+        """
+        Same arguments as `ComplexPooling2D` and
+        :param argmax_format: Format of the output indices, one of `ARGMAX_FORMATS`:
+            - 'flat' (default): int64 indices of the maxima in the flattened input (batch included),
+                as `tf.nn.max_pool_with_argmax(..., include_batch_in_index=True)`.
+            - 'window': uint8 position of each maximum in its pooling window (row-major order), 8 times smaller.
+                `ComplexUnPooling2D` then needs the pooling `pool_size`, `strides` and `padding`.
+        """
+        super(ComplexMaxPooling2DWithArgmax, self).__init__(pool_size=pool_size, strides=strides, padding=padding,
+                                                            data_format=data_format, name=name, **kwargs)
+        if argmax_format not in ARGMAX_FORMATS:
+            raise ValueError(f"Unsupported argmax_format {argmax_format}, supported formats are {ARGMAX_FORMATS}")
+        if argmax_format == 'window' and self.pool_size[0] * self.pool_size[1] > 256:
+            raise ValueError(f"argmax_format 'window' stores the offsets as uint8, "
+                             f"pool_size {self.pool_size} has more than 256 elements")
+        self.argmax_format = argmax_format
+
     def pool_function(self, inputs, ksize, strides, padding, data_format):
         """
         :param inputs: A Tensor. Input to pool over.
@@ -165,35 +451,24 @@ class ComplexMaxPooling2DWithArgmax(ComplexMaxPooling2D):
             - output	A Tensor. Has the same type as input.
             - argmax	A Tensor. The indices in argmax are flattened (Complains directly to TensorFlow)
         """
-        # The max is calculated with the absolute value. This will still work on real values.
-        if inputs.dtype.is_complex:
-            abs_in = tf.math.abs(inputs)
-        else:
-            abs_in = inputs
-        output, argmax = tf.nn.max_pool_with_argmax(input=abs_in, ksize=ksize, strides=strides,
-                                                    padding=padding, data_format=data_format,
-                                                    include_batch_in_index=True)
-        shape = tf.shape(output)
-        tf_res = tf.reshape(tf.gather(tf.reshape(inputs, [-1]), argmax), shape)
-        # assert np.all(tf_res == output)             # For debugging when the input is real only!
-        assert tf_res.dtype == inputs.dtype
-        return tf_res, argmax
+        outputs, offsets = _magnitude_max_pool(inputs, self.pool_size, self.strides, self.padding, self.data_format)
+        if self.argmax_format == 'window':
+            return outputs, tf.cast(offsets, tf.uint8)
+        return outputs, _flat_argmax(inputs, offsets, self.pool_size, self.strides, self.padding, self.data_format)
+
+    def get_config(self):
+        config = super(ComplexMaxPooling2DWithArgmax, self).get_config()
+        config.update({
+            'argmax_format': self.argmax_format
+        })
+        return config
 
 
 class ComplexAvgPooling2D(ComplexPooling2D):
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        output_r = tf.nn.avg_pool2d(input=inputs_r, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        output_i = tf.nn.avg_pool2d(input=inputs_i, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_r, output_i)
-        else:
-            output = output_r
-        return output
+        return _pool_parts(tf.nn.avg_pool2d, inputs, self.data_format == 'channels_first', ksize=ksize,
+                           strides=strides, padding=padding, data_format=data_format)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
@@ -201,17 +476,18 @@ class ComplexAvgPooling2D(ComplexPooling2D):
 
     
 class ComplexCircularAvgPooling2D(ComplexPooling2D):
+    """
+    Average pooling using circular statistics (https://en.wikipedia.org/wiki/Circular_mean): the mean magnitude
+        is multiplied by the mean of the unit phasors z/|z|, which has the circular mean phase and the mean
+        resultant length of the window. Windows whose phases cancel out are pooled to 0.
+    Real inputs are average pooled (as the real equivalent layer).
+    """
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_abs   = tf.math.abs(inputs)
-        inputs_phase = tf.math.phase(inputs)
-        amp = tf.nn.avg_pool2d(input=inputs_abs, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        raise NotImplemetedError("Still not implemented")       # https://en.wikipedia.org/wiki/Circular_mean
-        pha = tf.nn.avg_pool2d(input=inputs_phase, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)       # TODO
-        output =  tf.cast(tf.complex(amp * tf.math.cos(pha), amp * tf.math.sin(pha)), dtype=z.dtype)
-        return output
+        if not inputs.dtype.is_complex:
+            return tf.nn.avg_pool2d(inputs, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+        return _polar_avg_pool(inputs, renormalize=False, channels_first=self.data_format == 'channels_first',
+                               ksize=self.pool_size, strides=self.strides, padding=padding)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
@@ -219,79 +495,71 @@ class ComplexCircularAvgPooling2D(ComplexPooling2D):
 
 
 class ComplexPolarAvgPooling2D(ComplexPooling2D):
+    """
+    Average pooling of the magnitude, with the circular mean of the phase (see `_polar_avg_pool`).
+    If the phases are uniformly distributed on the circle there is no circular mean and the phase is 0.
+    Real inputs are pooled to the mean of their absolute value.
+    """
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_abs = tf.math.abs(inputs)
-        output_abs = tf.nn.avg_pool2d(input=inputs_abs, ksize=ksize, strides=strides,
-                                      padding=padding, data_format=data_format)
-        # Use circular mean
-        inputs_angle = tf.math.angle(inputs)
-        unit_x = tf.math.cos(inputs_angle)      # Convert all angles to corresponding points on the unit circle
-        unit_y = tf.math.sin(inputs_angle)      # convert polar coordinates to Cartesian coordinates.
-        avg_unit_x = tf.nn.avg_pool2d(input=unit_x, ksize=ksize, strides=strides,   # Then compute the arithmetic
-                                      padding=padding, data_format=data_format)     # mean of these points.
-        avg_unit_y = tf.nn.avg_pool2d(input=unit_y, ksize=ksize, strides=strides,
-                                      padding=padding, data_format=data_format)
-        # The angle is a reasonable mean of the input angles.
-        output_angle = tf.math.angle(tf.complex(avg_unit_x, avg_unit_y))
-        # Unknown result. If the angles are uniformly distributed on the circle,
-        # then the resulting radius will be 0, and there is no circular mean.
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_abs * tf.math.cos(output_angle), output_abs * tf.math.sin(output_angle))
-        else:
-            output = output_abs
-        return output
+        if not inputs.dtype.is_complex:
+            return tf.nn.avg_pool2d(tf.math.abs(inputs), ksize=ksize, strides=strides, padding=padding,
+                                    data_format=data_format)
+        return _polar_avg_pool(inputs, renormalize=True, channels_first=self.data_format == 'channels_first',
+                               ksize=self.pool_size, strides=self.strides, padding=padding)
 
     def get_real_equivalent(self):
         return ComplexPolarAvgPooling2D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
                                         data_format=self.data_format, name=self.name + "_real_equiv")
 
 
-class ComplexUnPooling2D(Layer, ComplexLayer):
+class ComplexUnPooling(Layer, ComplexLayer):
     """
-    Performs UnPooling as explained in:
-    https://www.oreilly.com/library/view/hands-on-convolutional-neural/9781789130331/6476c4d5-19f2-455f-8590-c6f99504b7a5.xhtml
-    This class was inspired to recreate the CV-FCN model of https://www.mdpi.com/2072-4292/11/22/2653
-    As far as I am concerned this class should work for any dimensional input but I have not tested it
-        (and you need the argmax which I only implemented the 2D case).
+    Max unpooling of 1D, 2D or 3D inputs, see `ComplexUnPooling2D`.
+    When the pooling geometry is given (`pool_size`), each value is placed inside its own pooling window,
+        one window position at a time, so overlapping windows are summed in a fixed order and
+        the gradient only gathers the selected positions back.
     """
 
-    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
-                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, **kwargs):
+    def __init__(self, rank: int, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
+                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, pool_size=None, strides=None, padding: str = 'valid',
+                 data_format: Optional[str] = None, representation: Optional[str] = None, **kwargs):
         """
-        :param desired_output_shape: tf.TensorShape (or equivalent like tuple or list).
-            The expected output shape without the batch size.
-            Meaning that for a 2D image to be enlarged, this is size 3 of the form HxWxC or CxHxW
-        :param upsampling_factor: Integer. The factor to which enlarge the image, 
-            For example, if upsampling_factor=2, an input image of size 32x32 will be 64x64.
-            This parameter is ignored if desired_output_shape is used or if the output shape is given to the call funcion.
+        :param rank: 1, 2 or 3, number of spatial axes.
+        Other arguments are the same as `ComplexUnPooling2D`.
         """
+        self._init_representation(representation)
+        self.rank = rank
         self.my_dtype = tf.dtypes.as_dtype(dtype)
+        self.pool_size = None if pool_size is None else conv_utils.normalize_tuple(pool_size, rank, 'pool_size')
+        self.strides = self.pool_size if strides is None else conv_utils.normalize_tuple(strides, rank, 'strides')
+        self.padding = conv_utils.normalize_padding(padding)
+        self.data_format = conv_utils.normalize_data_format(data_format)
         if desired_output_shape is not None:
             if not tf.TensorShape(desired_output_shape).is_fully_defined():
-                # tf.print(f"Warning: Partially defined desired_output_shape will be casted to None")
-                # desired_output_shape = None
                 raise ValueError(f"desired_output_shape must be fully defined, got {desired_output_shape}")
-            elif len(desired_output_shape) != 3:
-                raise ValueError(f"desired_output_shape expected to be size 3 and got size {len(desired_output_shape)}")
+            elif len(desired_output_shape) != rank + 1:
+                raise ValueError(f"desired_output_shape expected to be size {rank + 1} and got size "
+                                 f"{len(desired_output_shape)}")
+            desired_output_shape = tuple(tf.TensorShape(desired_output_shape).as_list())
         self.desired_output_shape = desired_output_shape
         if upsampling_factor is None or isinstance(upsampling_factor, int):
             self.upsampling_factor = upsampling_factor
         else:
             raise ValueError(f"Unsuported upsampling_factor = {upsampling_factor}")
-        super(ComplexUnPooling2D, self).__init__(trainable=False, name=name, dtype=self.my_dtype.real_dtype,
-                                                 dynamic=dynamic, **kwargs)
+        kwargs.pop('trainable', None)
+        super(ComplexUnPooling, self).__init__(trainable=False, name=name, dtype=self.my_dtype.real_dtype,
+                                               dynamic=dynamic, **kwargs)
 
     def call(self, inputs, **kwargs):
         """
-        TODO: Still has a bug, if argmax has coincident indexes. Don't think this is desired (but might).
         :param inputs: A tuple of Tensor objects (input, argmax).
             - input 	A Tensor.
-            - argmax	A Tensor. The indices in argmax are flattened (Complains directly to TensorFlow)
+            - argmax	A Tensor. The indices output by `ComplexMaxPooling2DWithArgmax`, either int64 indices of the
+                flattened pooling inputs or uint8 in-window offsets.
             - output_shape (Optional) A tf.TensorShape (or equivalent like tuple or list).
                 The expected output shape without the batch size.
                 Meaning that for a 2D image to be enlarged, this is size 3 of the form HxWxC or CxHxW
-            # TODO: I could make an automatic unpool mat if it is not given.
         """
         if not isinstance(inputs, list):
             raise ValueError('This layer should be called on a list of inputs.')
@@ -302,48 +570,127 @@ class ComplexUnPooling2D(Layer, ComplexLayer):
             inputs_values, unpool_mat, output_shape = inputs
         else:
             raise ValueError(f'inputs = {inputs} must have size 2 or 3 and had size {len(inputs)}')
+        inputs_values = self._complex_view(inputs_values)
+        if self.pool_size is None:
+            return self._to_representation(self._unpool_flat(inputs_values, unpool_mat, output_shape))
+        return self._to_representation(self._unpool_windows(inputs_values, unpool_mat, output_shape))
 
+    def _unpool_flat(self, values, indices, output_shape):
+        """
+        Unpooling of flat indices when the pooling geometry is unknown: one scatter of the whole batch.
+        Indices falling on the same position are summed (in no defined order on GPU).
+        :param output_shape: Output shape without the batch size. If not fully defined, the spatial shape of `values`
+            multiplied by `upsampling_factor`.
+        """
+        if indices.dtype == tf.uint8:
+            raise ValueError(f"{self.name} needs the pool_size of the pooling to unpool 'window' indices")
+        if output_shape is not None and tf.TensorShape(output_shape).is_fully_defined():
+            output_shape = tf.TensorShape(output_shape).as_list()
+        elif self.upsampling_factor is not None:
+            spatial_axes = range(2, self.rank + 2) if self.data_format == 'channels_first' else range(1, self.rank + 1)
+            output_shape = [length * self.upsampling_factor if axis in spatial_axes else length
+                            for axis, length in enumerate(_shape(values))][1:]
+        else:
+            raise ValueError('output_shape should be passed as 3rd element or either desired_output_shape '
+                             'or upsampling_factor should be passed on construction')
         # https://stackoverflow.com/a/42549265/5931672
         # https://github.com/tensorflow/addons/issues/632#issuecomment-482580850
-        # This is for the case I don't know the expected output shape so I used the upsampling factor
-        if not tf.TensorShape(output_shape).is_fully_defined():
-            if self.upsampling_factor is None:
-                raise ValueError('output_shape should be passed as 3rd element or either desired_output_shape '
-                                 'or upsampling_factor should be passed on construction')
-            if inputs_values.get_shape()[1:].is_fully_defined():
-                output_shape = tf.tile(inputs_values,
-                                       [1, self.upsampling_factor, self.upsampling_factor, 1]).get_shape()[1:]
-            else:
-                output_shape = tf.shape(inputs_values)[1:]
-        elif self.upsampling_factor is not None:
-            tf.print("WARNING: Ignoring self.upsampling_factor parameter")
-
-        flat_output_shape = tf.reduce_prod(output_shape)
-        shape = (tf.shape(inputs_values)[0] * flat_output_shape,)
-        updates = tf.reshape(inputs_values, [-1])
-        indices = tf.expand_dims(tf.reshape(unpool_mat, [-1]), axis=-1)
-        # assert indices.shape[-1] == tf.rank(shape)
-        ret = tf.scatter_nd(indices, updates, shape=shape)
-        # import pdb; pdb.set_trace()
-        desired_output_shape_with_batch = tf.concat([[tf.shape(inputs_values)[0]], output_shape], axis=0)
-        ret = tf.reshape(ret, shape=desired_output_shape_with_batch)
-        return ret
+        shape = (tf.shape(values)[0] * tf.reduce_prod(output_shape),)
+        outputs = tf.scatter_nd(tf.reshape(indices, [-1, 1]), tf.reshape(values, [-1]), shape=shape)
+        return tf.reshape(outputs, [-1] + output_shape)
+
+    def _unpool_windows(self, values, indices, output_shape):
+        """
+        Unpooling with the pooling geometry: the output positions are computed from the in-window offsets
+            (converted from the flat indices if needed) and each value is placed inside its own window.
+        :param output_shape: Output shape without the batch size. If not fully defined, the smallest input shape
+            of the pooling giving the shape of `values`.
+        """
+        channels_first = self.data_format == 'channels_first'
+        if channels_first:
+            values, indices = _move_axis(values, 1, -1), _move_axis(indices, 1, -1)
+        if output_shape is not None and tf.TensorShape(output_shape).is_fully_defined():
+            output_shape = tf.TensorShape(output_shape).as_list()
+            spatial_shape = output_shape[1:] if channels_first else output_shape[:-1]
+        else:
+            spatial_shape = [(length - 1) * stride + pool if self.padding == 'valid' else length * stride
+                             for length, pool, stride in zip(_shape(values)[1:-1], self.pool_size, self.strides)]
+        output_size, _ = _pooling_geometry(spatial_shape, self.pool_size, self.strides, self.padding)
+        if all(isinstance(length, int) for length in output_size + _shape(values)[1:-1]) \
+                and output_size != _shape(values)[1:-1]:
+            raise ValueError(f"{self.name}: pooling {spatial_shape} with pool_size={self.pool_size}, "
+                             f"strides={self.strides} and padding='{self.padding}' gives {output_size}, "
+                             f"not the shape of the inputs {_shape(values)[1:-1]}")
+        if indices.dtype != tf.uint8:
+            indices = _window_offsets(indices, self.pool_size, self.strides, self.padding, spatial_shape,
+                                      _shape(values)[-1], self.data_format)
+        outputs = _unpool(values, indices, self.pool_size, self.strides, self.padding, spatial_shape)
+        outputs.set_shape([values.shape[0]] + [length if isinstance(length, int) else None
+                                               for length in spatial_shape] + [values.shape[-1]])
+        return _move_axis(outputs, -1, 1) if channels_first else outputs
 
     def get_real_equivalent(self):
-        return ComplexUnPooling2D(desired_output_shape=self.desired_output_shape, name=self.name,
-                                  dtype=self.my_dtype.real_dtype, dynamic=self.dtype)
+        config = self.get_config()
+        config.update({
+            'name': self.name + "_real_equiv",
+            'dtype': self.my_dtype.real_dtype
+        })
+        return self.__class__.from_config(config)
 
     def get_config(self):
-        config = super(ComplexUnPooling2D, self).get_config()
+        config = super(ComplexUnPooling, self).get_config()
         config.update({
+            'rank': self.rank,
             'desired_output_shape': self.desired_output_shape,
+            'upsampling_factor': self.upsampling_factor,
             'name': self.name,
             'dtype': self.my_dtype,
             'dynamic': False,
+            'pool_size': self.pool_size,
+            'strides': self.strides,
+            'padding': self.padding,
+            'data_format': self.data_format,
+            'representation': self._get_representation()
         })
         return config
 
 
+class ComplexUnPooling2D(ComplexUnPooling):
+    """
+    Performs UnPooling as explained in:
+    https://www.oreilly.com/library/view/hands-on-convolutional-neural/9781789130331/6476c4d5-19f2-455f-8590-c6f99504b7a5.xhtml
+    This class was inspired to recreate the CV-FCN model of https://www.mdpi.com/2072-4292/11/22/2653
+    See `ComplexUnPooling1D` and `ComplexUnPooling3D` for other dimensions.
+    """
+
+    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
+                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, pool_size=None, strides=None, padding: str = 'valid',
+                 data_format: Optional[str] = None, **kwargs):
+        """
+        :param desired_output_shape: tf.TensorShape (or equivalent like tuple or list).
+            The expected output shape without the batch size.
+            Meaning that for a 2D image to be enlarged, this is size 3 of the form HxWxC or CxHxW
+        :param upsampling_factor: Integer. The factor to which enlarge the image, 
+            For example, if upsampling_factor=2, an input image of size 32x32 will be 64x64.
+            This parameter is ignored if desired_output_shape is used or if the output shape is given to the call funcion.
+        :param pool_size: pool_size of the max pooling. Without it, the indices must be 'flat'
+            (see `ComplexMaxPooling2DWithArgmax`) and the output shape is given by desired_output_shape,
+            the call inputs or upsampling_factor.
+        :param strides: strides of the max pooling. Defaults to pool_size.
+        :param padding: padding of the max pooling, 'valid' or 'same'.
+        :param data_format: A string, one of `channels_last` (default) or `channels_first`.
+        """
+        super(ComplexUnPooling2D, self).__init__(rank=2, desired_output_shape=desired_output_shape,
+                                                 upsampling_factor=upsampling_factor, name=name, dtype=dtype,
+                                                 dynamic=dynamic, pool_size=pool_size, strides=strides,
+                                                 padding=padding, data_format=data_format, **kwargs)
+
+    def get_config(self):
+        config = super(ComplexUnPooling2D, self).get_config()
+        config.pop('rank')
+        return config
+
+
 """
     3D Pooling
 """
@@ -352,7 +699,8 @@ class ComplexUnPooling2D(Layer, ComplexLayer):
 class ComplexPooling3D(Layer, ComplexLayer):
     def __init__(self, pool_size=(2, 2, 1), strides=None,
                  padding='valid', data_format='channels_last',
-                 name=None, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+                 name=None, dtype=DEFAULT_COMPLEX_TYPE, representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
         self.my_dtype = dtype
         super(ComplexPooling3D, self).__init__(name=name, **kwargs)
         if data_format is None:
@@ -363,15 +711,15 @@ class ComplexPooling3D(Layer, ComplexLayer):
         self.strides = conv_utils.normalize_tuple(strides, 3, 'strides')
         self.padding = conv_utils.normalize_padding(padding)
         self.data_format = conv_utils.normalize_data_format(data_format)
-        self.input_spec = InputSpec(ndim=5)
+        self.input_spec = self._split_input_spec(InputSpec(ndim=5))
 
     @abstractmethod
     def pool_function(self, inputs, ksize, strides, padding, data_format):
         pass
 
     def call(self, inputs, **kwargs):
-        outputs = self.pool_function(
-            inputs,
+        outputs = _call_pool_function(
+            self, inputs,
             self.pool_size,
             strides=self.strides,
             padding=self.padding.upper(),
@@ -404,31 +752,58 @@ class ComplexPooling3D(Layer, ComplexLayer):
             'pool_size': self.pool_size,
             'padding': self.padding,
             'data_format': self.data_format,
-            'dtype': self.my_dtype
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
         })
         return config
 
 
+class ComplexMaxPooling3D(ComplexPooling3D):
+    """
+    Max pooling operation for 3D spatial data, using the absolute value to get the max (see `_magnitude_max_pool`).
+    """
+
+    def pool_function(self, inputs, ksize, strides, padding, data_format):
+        if not inputs.dtype.is_complex:
+            return tf.nn.max_pool3d(inputs, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+        return _magnitude_max_pool(inputs, self.pool_size, self.strides, self.padding, self.data_format)[0]
+
+    def get_real_equivalent(self):
+        return ComplexMaxPooling3D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
+                                   data_format=self.data_format, name=self.name + "_real_equiv")
+
+
 class ComplexAvgPooling3D(ComplexPooling3D):
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        output_r = tf.nn.avg_pool3d(input=inputs_r, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        output_i = tf.nn.avg_pool3d(input=inputs_i, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_r, output_i)
-        else:
-            output = output_r
-        return output
+        return _pool_parts(tf.nn.avg_pool3d, inputs, self.data_format == 'channels_first', ksize=ksize,
+                           strides=strides, padding=padding, data_format=data_format)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling3D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
                                    data_format=self.data_format, name=self.name + "_real_equiv")
 
 
+class ComplexUnPooling3D(ComplexUnPooling):
+    """
+    Max unpooling of 3D spatial data, see `ComplexUnPooling2D`.
+    desired_output_shape is of size 4, (depth, height, width, channels) or channels first.
+    """
+
+    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
+                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, pool_size=None, strides=None, padding: str = 'valid',
+                 data_format: Optional[str] = None, **kwargs):
+        super(ComplexUnPooling3D, self).__init__(rank=3, desired_output_shape=desired_output_shape,
+                                                 upsampling_factor=upsampling_factor, name=name, dtype=dtype,
+                                                 dynamic=dynamic, pool_size=pool_size, strides=strides,
+                                                 padding=padding, data_format=data_format, **kwargs)
+
+    def get_config(self):
+        config = super(ComplexUnPooling3D, self).get_config()
+        config.pop('rank')
+        return config
+
+
 """
     1D Pooling
 """
@@ -437,7 +812,8 @@ class ComplexAvgPooling3D(ComplexPooling3D):
 class ComplexPooling1D(Layer, ComplexLayer):
     def __init__(self, pool_size=2, strides=None,
                  padding='valid', data_format='channels_last',
-                 name=None, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+                 name=None, dtype=DEFAULT_COMPLEX_TYPE, representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
         self.my_dtype = dtype
         super(ComplexPooling1D, self).__init__(name=name, **kwargs)
         if data_format is None:
@@ -448,15 +824,15 @@ class ComplexPooling1D(Layer, ComplexLayer):
         self.strides = conv_utils.normalize_tuple(strides, 1, 'strides')
         self.padding = conv_utils.normalize_padding(padding)
         self.data_format = conv_utils.normalize_data_format(data_format)
-        self.input_spec = InputSpec(ndim=3)
+        self.input_spec = self._split_input_spec(InputSpec(ndim=3))
 
     @abstractmethod
     def pool_function(self, inputs, ksize, strides, padding, data_format):
         pass
 
     def call(self, inputs, **kwargs):
-        outputs = self.pool_function(
-            inputs,
+        outputs = _call_pool_function(
+            self, inputs,
             self.pool_size,
             strides=self.strides,
             padding=self.padding.upper(),
@@ -487,26 +863,53 @@ class ComplexPooling1D(Layer, ComplexLayer):
             'pool_size': self.pool_size,
             'padding': self.padding,
             'data_format': self.data_format,
-            'dtype': self.my_dtype
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
         })
         return config
 
 
+class ComplexMaxPooling1D(ComplexPooling1D):
+    """
+    Max pooling operation for 1D temporal data, using the absolute value to get the max (see `_magnitude_max_pool`).
+    """
+
+    def pool_function(self, inputs, ksize, strides, padding, data_format):
+        if not inputs.dtype.is_complex:
+            return tf.nn.max_pool1d(inputs, ksize=ksize, strides=strides, padding=padding, data_format=data_format)
+        return _magnitude_max_pool(inputs, self.pool_size, self.strides, self.padding, self.data_format)[0]
+
+    def get_real_equivalent(self):
+        return ComplexMaxPooling1D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
+                                   data_format=self.data_format, name=self.name + "_real_equiv")
+
+
 class ComplexAvgPooling1D(ComplexPooling1D):
 
     def pool_function(self, inputs, ksize, strides, padding, data_format):
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
-        output_r = tf.nn.avg_pool1d(input=inputs_r, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        output_i = tf.nn.avg_pool1d(input=inputs_i, ksize=ksize, strides=strides,
-                                    padding=padding, data_format=data_format)
-        if inputs.dtype.is_complex:
-            output = tf.complex(output_r, output_i)
-        else:
-            output = output_r
-        return output
+        return _pool_parts(tf.nn.avg_pool1d, inputs, self.data_format == 'channels_first', ksize=ksize,
+                           strides=strides, padding=padding, data_format=data_format)
 
     def get_real_equivalent(self):
         return ComplexAvgPooling1D(pool_size=self.pool_size, strides=self.strides, padding=self.padding,
                                    data_format=self.data_format, name=self.name + "_real_equiv")
+
+
+class ComplexUnPooling1D(ComplexUnPooling):
+    """
+    Max unpooling of 1D temporal data, see `ComplexUnPooling2D`.
+    desired_output_shape is of the form (steps, features) or (features, steps) with channels_first.
+    """
+
+    def __init__(self, desired_output_shape=None, upsampling_factor: Optional[int] = None, name=None,
+                 dtype=DEFAULT_COMPLEX_TYPE, dynamic=False, pool_size=None, strides=None, padding: str = 'valid',
+                 data_format: Optional[str] = None, **kwargs):
+        super(ComplexUnPooling1D, self).__init__(rank=1, desired_output_shape=desired_output_shape,
+                                                 upsampling_factor=upsampling_factor, name=name, dtype=dtype,
+                                                 dynamic=dynamic, pool_size=pool_size, strides=strides,
+                                                 padding=padding, data_format=data_format, **kwargs)
+
+    def get_config(self):
+        config = super(ComplexUnPooling1D, self).get_config()
+        config.pop('rank')
+        return config
@@ -0,0 +1,269 @@
+"""
+Inference layers with int8 weights and activations, created by post-training quantisation
+    (see `cvnn.quantization.quantize_model`).
+Kernels are quantised symmetrically with one scale per (complex) output channel, shared by the real and imaginary
+    parts. Inputs are quantised symmetrically with a per-tensor scale calibrated on representative data.
+The int8 kernel parts w_r and w_i are widened to int32 at each call (never stored widened) and each multiplies the
+    stacked real and imaginary parts of the quantised inputs: two int32 matrix products, combined exactly in int32 and
+    rescaled to float.
+These layers reduce the memory of the weights, not the latency: TensorFlow has no fast int32 matrix product, so on
+    CPU they are slower than the float layers (about 2.7x for a 1024 x 1024 dense layer). Export the model to an int8
+    TFLite model to run the products in int8.
+"""
+import tensorflow as tf
+from tensorflow.keras import activations
+from tensorflow.keras.layers import Layer
+from tensorflow.python.keras.utils import conv_utils
+from typing import Optional
+# Own modules
+from cvnn.layers.core import ComplexLayer, ComplexDense, DEFAULT_COMPLEX_TYPE
+from cvnn.layers.core import complex_to_split, split_to_complex
+from cvnn.layers.convolutional import ComplexConv1D, ComplexConv2D, _patch_convolution
+
+INT8_MAX = 127      # Symmetric range [-127, 127], the same for positive and negative values
+
+
+def quantize_kernel(kernel_r, kernel_i=None):
+    """
+    Symmetric per-output-channel int8 quantisation of a kernel of shape (..., out_channels).
+    Real and imaginary parts of a complex output channel share the same scale.
+    :return: Tuple (quantized_r, quantized_i, scale). quantized_i is None if kernel_i is None.
+        kernel ~= quantized * scale
+    """
+    magnitude = tf.abs(kernel_r) if kernel_i is None else tf.maximum(tf.abs(kernel_r), tf.abs(kernel_i))
+    max_abs = tf.reduce_max(tf.reshape(magnitude, [-1, magnitude.shape[-1]]), axis=0)
+    scale = tf.where(max_abs > 0, max_abs / INT8_MAX, tf.ones_like(max_abs))
+
+    def quantize(kernel):
+        return tf.cast(tf.clip_by_value(tf.round(kernel / scale), -INT8_MAX, INT8_MAX), tf.int8)
+    return quantize(kernel_r), None if kernel_i is None else quantize(kernel_i), scale
+
+
+class _ComplexQuantizedLayer(Layer, ComplexLayer):
+    """
+    Base of the quantised layers: an int8 kernel of shape `kernel_shape`, an input scale, an optional (float) bias
+        and an activation.
+    """
+
+    def __init__(self, activation=None, use_bias: bool = True, dtype=DEFAULT_COMPLEX_TYPE,
+                 representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
+        super(_ComplexQuantizedLayer, self).__init__(**kwargs)
+        self.activation = activations.get(activation)
+        self.use_bias = use_bias
+        self.my_dtype = tf.dtypes.as_dtype(dtype)
+
+    def _add_quantized_weights(self, kernel_shape):
+        real_dtype = self.my_dtype.real_dtype
+        names = ('kernel_r', 'kernel_i') if self.my_dtype.is_complex else ('kernel',)
+        for name in names:
+            setattr(self, name, self.add_weight(name, shape=kernel_shape, dtype=tf.int8, initializer='zeros',
+                                                trainable=False))
+        self.kernel_scale = self.add_weight('kernel_scale', shape=(kernel_shape[-1],), dtype=real_dtype,
+                                            initializer='ones', trainable=False)
+        self.input_scale = self.add_weight('input_scale', shape=(), dtype=real_dtype, initializer='ones',
+                                           trainable=False)
+        if self.use_bias:
+            parts = 2 if self.my_dtype.is_complex else 1
+            self.bias = self.add_weight('bias', shape=(kernel_shape[-1], parts), dtype=real_dtype,
+                                        initializer='zeros', trainable=False)
+
+    def _set_quantized_weights(self, kernel_r, kernel_i, bias, input_scale: float):
+        """
+        :param kernel_r: Real part of the float kernel (the kernel itself for real layers).
+        :param kernel_i: Imaginary part of the float kernel, None for real layers.
+        :param bias: Bias (complex or real) of shape (out_channels,), None if the layer has no bias.
+        :param input_scale: Calibrated maximum absolute value of the real and imaginary parts of the inputs.
+        """
+        quantized_r, quantized_i, scale = quantize_kernel(kernel_r, kernel_i)
+        if self.my_dtype.is_complex:
+            self.kernel_r.assign(quantized_r)
+            self.kernel_i.assign(quantized_i)
+        else:
+            self.kernel.assign(quantized_r)
+        self.kernel_scale.assign(scale)
+        self.input_scale.assign(input_scale / INT8_MAX if input_scale > 0 else 1.)
+        if self.use_bias:
+            if self.my_dtype.is_complex:
+                bias = tf.stack([tf.math.real(bias), tf.math.imag(bias)], axis=-1)
+            self.bias.assign(tf.reshape(bias, self.bias.shape))
+
+    def _integer_kernels(self):
+        """
+        :return: Tuple of the kernel parts widened to int32 matrices of shape (in_features, out_features).
+            Not cached: the widened copies take 4 times the memory of the int8 kernels.
+        """
+        names = ('kernel_r', 'kernel_i') if self.my_dtype.is_complex else ('kernel',)
+        return tuple(tf.reshape(tf.cast(getattr(self, name), tf.int32), [-1, self.kernel_scale.shape[0]])
+                     for name in names)
+
+    def _quantized_product(self, inputs):
+        """
+        :param inputs: Real tensor of shape (..., in_features * parts) (real and imaginary parts interleaved).
+        :return: Real tensor of shape (..., out_features * parts) with the bias added.
+        """
+        kernels = self._integer_kernels()
+        in_features, out_features = kernels[0].shape
+        parts = 2 if self.my_dtype.is_complex else 1
+        quantized = tf.cast(tf.clip_by_value(tf.round(inputs / self.input_scale), -INT8_MAX, INT8_MAX), tf.int32)
+        shape = tf.shape(quantized)
+        # (batch * parts, in_features): the real and imaginary parts of the inputs share the kernel products
+        flat = tf.reshape(tf.transpose(tf.reshape(quantized, [-1, in_features, parts]), [0, 2, 1]), [-1, in_features])
+        products = [tf.reshape(tf.matmul(flat, kernel), [-1, parts, out_features]) for kernel in kernels]   # int32
+        if self.my_dtype.is_complex:
+            (real_r, imag_r), (real_i, imag_i) = [tf.unstack(product, axis=1) for product in products]
+            # (w_r + j w_i)(x_r + j x_i) = (w_r x_r - w_i x_i) + j (w_r x_i + w_i x_r)
+            accumulator = tf.stack([real_r - imag_i, imag_r + real_i], axis=-1)
+        else:
+            accumulator = tf.reshape(products[0], [-1, out_features, 1])
+        scale = self.input_scale * tf.expand_dims(self.kernel_scale, axis=-1)
+        outputs = tf.reshape(tf.cast(accumulator, scale.dtype) * scale, [-1, out_features * parts])
+        if self.use_bias:
+            outputs = outputs + tf.reshape(self.bias, [-1])
+        return tf.reshape(outputs, tf.concat([shape[:-1], [out_features * parts]], axis=0))
+
+    def get_real_equivalent(self):
+        raise NotImplementedError(f"{self.__class__.__name__} is an inference layer, "
+                                  f"quantize the real equivalent model instead")
+
+    def get_config(self):
+        config = super(_ComplexQuantizedLayer, self).get_config()
+        config.update({
+            'activation': activations.serialize(self.activation),
+            'use_bias': self.use_bias,
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexQuantizedDense(_ComplexQuantizedLayer):
+    """
+    int8 inference equivalent of a `ComplexDense` layer. Create it with `ComplexQuantizedDense.from_dense`.
+    """
+
+    def __init__(self, units: int, activation=None, use_bias: bool = True, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+        super(ComplexQuantizedDense, self).__init__(activation=activation, use_bias=use_bias, dtype=dtype, **kwargs)
+        self.units = units
+
+    def build(self, input_shape):
+        self._add_quantized_weights((int(self._complex_shape(input_shape)[-1]), self.units))
+        self.built = True
+
+    def call(self, inputs):
+        inputs = tf.cast(self._complex_view(inputs), self.my_dtype)
+        if not self.my_dtype.is_complex:
+            return self.activation(self._quantized_product(inputs))
+        split_inputs = complex_to_split(inputs)
+        shape = tf.shape(split_inputs)
+        outputs = self._quantized_product(tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0)))
+        return self._activate(split_to_complex(tf.reshape(outputs, tf.concat([shape[:-2], [self.units, 2]], axis=0))),
+                              self.activation)
+
+    @classmethod
+    def from_dense(cls, dense: ComplexDense, input_scale: float):
+        """
+        :param dense: Built `ComplexDense` layer.
+        :param input_scale: Maximum absolute value of the real and imaginary parts of the layer inputs.
+        :return: Built `ComplexQuantizedDense` layer.
+        """
+        if type(dense) is not ComplexDense:
+            raise ValueError(f"Only ComplexDense layers can be quantized, received {dense.__class__.__name__}")
+        layer = cls(units=dense.units, activation=dense.activation, use_bias=dense.use_bias, dtype=dense.my_dtype,
+                    representation=dense._get_representation(), name=dense.name + "_int8")
+        if dense.my_dtype.is_complex:
+            kernel_r, kernel_i = dense.w_r, dense.w_i
+            bias = tf.complex(dense.b_r, dense.b_i) if dense.use_bias else None
+        else:
+            kernel_r, kernel_i = dense.w, None
+            bias = dense.b if dense.use_bias else None
+        layer.build(layer._input_shape([None, kernel_r.shape[0]]))
+        layer._set_quantized_weights(kernel_r, kernel_i, bias, input_scale)
+        return layer
+
+    def compute_output_shape(self, input_shape):
+        return tf.TensorShape(input_shape)[:-1].concatenate([self.units])
+
+    def get_config(self):
+        config = super(ComplexQuantizedDense, self).get_config()
+        config.update({
+            'units': self.units
+        })
+        return config
+
+
+class ComplexQuantizedConv(_ComplexQuantizedLayer):
+    """
+    int8 inference equivalent of a `ComplexConv1D` or `ComplexConv2D` layer.
+    Create it with `ComplexQuantizedConv.from_conv`.
+    The convolution is computed with integer matrix products of the input patches (im2col, see `_patch_convolution`).
+    """
+
+    def __init__(self, rank: int, filters: int, kernel_size, strides=1, padding: str = 'valid',
+                 data_format: Optional[str] = None, dilation_rate=1, activation=None, use_bias: bool = True,
+                 dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+        """
+        :param rank: 1 or 2, rank of the convolution.
+        Other arguments are the same as `ComplexConv` (groups are not supported).
+        """
+        super(ComplexQuantizedConv, self).__init__(activation=activation, use_bias=use_bias, dtype=dtype, **kwargs)
+        if rank not in (1, 2):
+            raise ValueError(f"Only 1D and 2D quantized convolutions are supported, received rank {rank}")
+        self.rank = rank
+        self.filters = filters
+        self.kernel_size = conv_utils.normalize_tuple(kernel_size, rank, 'kernel_size')
+        self.strides = conv_utils.normalize_tuple(strides, rank, 'strides')
+        self.padding = conv_utils.normalize_padding(padding)
+        self.data_format = conv_utils.normalize_data_format(data_format)
+        self.dilation_rate = conv_utils.normalize_tuple(dilation_rate, rank, 'dilation_rate')
+
+    def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
+        channels = int(input_shape[1] if self.data_format == 'channels_first' else input_shape[-1])
+        self._add_quantized_weights(self.kernel_size + (channels, self.filters))
+        self.built = True
+
+    def call(self, inputs):
+        inputs = tf.cast(self._complex_view(inputs), self.my_dtype)
+        outputs = _patch_convolution(inputs, self._quantized_product, kernel_size=self.kernel_size,
+                                     strides=self.strides, padding=self.padding, data_format=self.data_format,
+                                     dilation_rate=self.dilation_rate)
+        return self._activate(outputs, self.activation)
+
+    @classmethod
+    def from_conv(cls, conv, input_scale: float):
+        """
+        :param conv: Built `ComplexConv1D` or `ComplexConv2D` layer without groups.
+        :param input_scale: Maximum absolute value of the real and imaginary parts of the layer inputs.
+        :return: Built `ComplexQuantizedConv` layer.
+        """
+        if type(conv) not in (ComplexConv1D, ComplexConv2D) or conv.groups != 1:
+            raise ValueError(f"Only ComplexConv1D and ComplexConv2D layers without groups can be quantized, "
+                             f"received {conv.__class__.__name__} (groups={getattr(conv, 'groups', None)})")
+        layer = cls(rank=conv.rank, filters=conv.filters, kernel_size=conv.kernel_size, strides=conv.strides,
+                    padding=conv.padding, data_format=conv.data_format, dilation_rate=conv.dilation_rate,
+                    activation=conv.activation, use_bias=conv.use_bias, dtype=conv.my_dtype,
+                    representation=conv._get_representation(), name=conv.name + "_int8")
+        if conv.my_dtype.is_complex:
+            kernel_r, kernel_i = conv._get_kernel()
+        else:
+            kernel_r, kernel_i = conv.kernel, None
+        channels = kernel_r.shape[-2]
+        input_shape = [None, channels] + [None] * conv.rank if conv.data_format == 'channels_first' \
+            else [None] * (conv.rank + 1) + [channels]
+        layer.build(layer._input_shape(input_shape))
+        layer._set_quantized_weights(kernel_r, kernel_i, conv._get_bias() if conv.use_bias else None, input_scale)
+        return layer
+
+    def get_config(self):
+        config = super(ComplexQuantizedConv, self).get_config()
+        config.update({
+            'rank': self.rank,
+            'filters': self.filters,
+            'kernel_size': self.kernel_size,
+            'strides': self.strides,
+            'padding': self.padding,
+            'data_format': self.data_format,
+            'dilation_rate': self.dilation_rate
+        })
+        return config
@@ -0,0 +1,189 @@
+"""
+Shape layers acting directly on the complex tensor (one reshape, slice, pad, concat or transpose of the complex values
+    instead of one per part plus a `tf.complex` rebuilding the result).
+They are dtype agnostic: the real equivalent model applies the same layer to its real inputs.
+In split representation (see `cvnn.layers.set_representation`) the trailing real/imaginary axis is kept last.
+"""
+import tensorflow as tf
+from tensorflow.keras.layers import Reshape, Permute, Cropping2D, ZeroPadding2D, Concatenate
+from typing import List, Optional, Tuple
+from cvnn.layers.core import ComplexLayer
+
+
+class ComplexReshape(Reshape, ComplexLayer):
+    """
+    Reshapes the complex inputs to `target_shape` (without the batch axis).
+    """
+
+    def __init__(self, target_shape: Tuple[int, ...], representation: Optional[str] = None, **kwargs):
+        """
+        :param target_shape: Target shape of the complex tensor, without the batch axis. One axis can be -1.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexReshape, self).__init__(target_shape=target_shape, **kwargs)
+
+    def call(self, inputs):
+        if not self._is_split():
+            return super(ComplexReshape, self).call(inputs)
+        inputs = self._to_representation(inputs)
+        outputs = tf.reshape(inputs, (tf.shape(inputs)[0],) + self.target_shape + (2,))
+        if not tf.executing_eagerly():
+            outputs.set_shape(self.compute_output_shape(inputs.shape[:-1]).concatenate([2]))
+        return outputs
+
+    def get_real_equivalent(self):
+        # The real equivalent model has twice the features on the last axis
+        target_shape = self.target_shape
+        if target_shape and target_shape[-1] != -1:
+            target_shape = target_shape[:-1] + (2 * target_shape[-1],)
+        return ComplexReshape(target_shape=target_shape, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexReshape, self).get_config()
+        config.update({
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexPermute(Permute, ComplexLayer):
+    """
+    Permutes the (non batch) axes of the complex inputs according to `dims` (1-indexed).
+    """
+
+    def __init__(self, dims: Tuple[int, ...], representation: Optional[str] = None, **kwargs):
+        """
+        :param dims: Permutation of the (non batch) axes, 1-indexed.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexPermute, self).__init__(dims=dims, **kwargs)
+        self.input_spec = self._split_input_spec(self.input_spec)
+
+    def call(self, inputs):
+        if not self._is_split():
+            return super(ComplexPermute, self).call(inputs)
+        return tf.transpose(self._to_representation(inputs), perm=(0,) + self.dims + (len(self.dims) + 1,))
+
+    def get_real_equivalent(self):
+        return ComplexPermute(dims=self.dims, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexPermute, self).get_config()
+        config.update({
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexCropping2D(Cropping2D, ComplexLayer):
+    """
+    Crops the spatial axes (height and width) of complex images.
+    """
+
+    def __init__(self, cropping=((0, 0), (0, 0)), data_format=None, representation: Optional[str] = None, **kwargs):
+        """
+        :param cropping: Int, or tuple of 2 ints, or tuple of 2 tuples of 2 ints.
+            Same as `tf.keras.layers.Cropping2D`: ((top_crop, bottom_crop), (left_crop, right_crop)).
+        :param data_format: string, one of channels_last (default) or channels_first.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexCropping2D, self).__init__(cropping=cropping, data_format=data_format, **kwargs)
+        self.input_spec = self._split_input_spec(self.input_spec)
+
+    def call(self, inputs):
+        # Keras slices the leading axes only, so the split axis (if any) is kept
+        return super(ComplexCropping2D, self).call(self._to_representation(inputs))
+
+    def get_real_equivalent(self):
+        return ComplexCropping2D(cropping=self.cropping, data_format=self.data_format,
+                                 name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexCropping2D, self).get_config()
+        config.update({
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexZeroPadding2D(ZeroPadding2D, ComplexLayer):
+    """
+    Pads the spatial axes (height and width) of complex images with zeros.
+    """
+
+    def __init__(self, padding=(1, 1), data_format=None, representation: Optional[str] = None, **kwargs):
+        """
+        :param padding: Int, or tuple of 2 ints, or tuple of 2 tuples of 2 ints.
+            Same as `tf.keras.layers.ZeroPadding2D`: ((top_pad, bottom_pad), (left_pad, right_pad)).
+        :param data_format: string, one of channels_last (default) or channels_first.
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexZeroPadding2D, self).__init__(padding=padding, data_format=data_format, **kwargs)
+        self.input_spec = self._split_input_spec(self.input_spec)
+
+    def call(self, inputs):
+        if not self._is_split():
+            return super(ComplexZeroPadding2D, self).call(inputs)
+        spatial = [list(pad) for pad in self.padding]
+        if self.data_format == 'channels_first':
+            paddings = [[0, 0], [0, 0]] + spatial
+        else:
+            paddings = [[0, 0]] + spatial + [[0, 0]]
+        return tf.pad(self._to_representation(inputs), paddings + [[0, 0]])
+
+    def get_real_equivalent(self):
+        return ComplexZeroPadding2D(padding=self.padding, data_format=self.data_format,
+                                    name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexZeroPadding2D, self).get_config()
+        config.update({
+            'representation': self._get_representation()
+        })
+        return config
+
+
+class ComplexConcatenate(Concatenate, ComplexLayer):
+    """
+    Concatenates a list of complex tensors along `axis`.
+    In split representation all the inputs must be split tensors (as output by the other split layers).
+    """
+
+    def __init__(self, axis: int = -1, representation: Optional[str] = None, **kwargs):
+        """
+        :param axis: Axis along which to concatenate, of the complex tensors (the split axis is not counted).
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
+        """
+        self._init_representation(representation)
+        super(ComplexConcatenate, self).__init__(axis=axis, **kwargs)
+        self.complex_axis = axis
+        if self._is_split() and axis < 0:
+            self.axis = axis - 1        # Skip the trailing split axis
+
+    def _merge_function(self, inputs):
+        return super(ComplexConcatenate, self)._merge_function([self._to_representation(x) for x in inputs])
+
+    def get_real_equivalent(self):
+        return ComplexConcatenate(axis=self.complex_axis, name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = super(ComplexConcatenate, self).get_config()
+        config.update({
+            'axis': self.complex_axis,
+            'representation': self._get_representation()
+        })
+        return config
+
+
+def complex_concatenate(inputs: List, axis: int = -1, **kwargs):
+    """
+    Functional interface to `ComplexConcatenate`, like `tf.keras.layers.concatenate`.
+    :param inputs: A list of input tensors.
+    :param axis: Concatenation axis.
+    :return: The concatenated tensor.
+    """
+    return ComplexConcatenate(axis=axis, **kwargs)(inputs)
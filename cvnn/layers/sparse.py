@@ -0,0 +1,305 @@
+"""
+Inference layers storing a (pruned) kernel in compressed sparse form. They are created from trained layers,
+    see `cvnn.pruning.to_sparse`.
+Each non-zero complex weight of the kernel is stored once, as its real and imaginary parts with int32 CSR indices
+    (12 bytes instead of 8 for a dense complex weight), and applied with two `tf.sparse.sparse_dense_matmul`
+    (one per kernel part) sharing the same indices.
+"""
+import functools
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import activations
+from tensorflow.keras.layers import Layer
+from tensorflow.python.keras.utils import conv_utils
+from typing import Optional
+# Own modules
+from cvnn.layers.core import ComplexLayer, ComplexDense, DEFAULT_COMPLEX_TYPE
+from cvnn.layers.core import complex_to_split, split_to_complex
+from cvnn.layers.convolutional import ComplexConv1D, ComplexConv2D, _patch_convolution
+
+
+class _ComplexSparseKernelLayer(Layer, ComplexLayer):
+    """
+    Base of the sparse layers: a sparse kernel of `nnz` non-zero (complex) elements, an optional bias and
+        an activation.
+    """
+
+    def __init__(self, nnz: int, activation=None, use_bias: bool = True, dtype=DEFAULT_COMPLEX_TYPE,
+                 representation: Optional[str] = None, **kwargs):
+        self._init_representation(representation)
+        super(_ComplexSparseKernelLayer, self).__init__(**kwargs)
+        self.nnz = int(nnz)
+        self.activation = activations.get(activation)
+        self.use_bias = use_bias
+        self.my_dtype = tf.dtypes.as_dtype(dtype)
+
+    def _add_sparse_weights(self, in_features: int, out_features: int):
+        """
+        :param in_features: Number of (complex) input features of the kernel matrix.
+        :param out_features: Number of (complex) output features of the kernel matrix.
+        """
+        parts = 2 if self.my_dtype.is_complex else 1
+        # Transposed so that the product is a sparse (left) times dense matmul, rows are compressed (CSR)
+        self.kernel_shape = (out_features, in_features)
+        self.row_splits = self.add_weight('row_splits', shape=(out_features + 1,), dtype=tf.int32,
+                                          initializer='zeros', trainable=False)
+        self.col_indices = self.add_weight('col_indices', shape=(self.nnz,), dtype=tf.int32,
+                                           initializer='zeros', trainable=False)
+        if self.my_dtype.is_complex:
+            self.kernel_values_r, self.kernel_values_i = (
+                self.add_weight('kernel_values' + suffix, shape=(self.nnz,), dtype=self.my_dtype.real_dtype,
+                                initializer='zeros', trainable=False) for suffix in ('_r', '_i'))
+        else:
+            self.kernel_values = self.add_weight('kernel_values', shape=(self.nnz,), dtype=self.my_dtype,
+                                                 initializer='zeros', trainable=False)
+        if self.use_bias:
+            self.bias = self.add_weight('bias', shape=(out_features, parts), dtype=self.my_dtype.real_dtype,
+                                        initializer='zeros', trainable=False)
+
+    def _set_sparse_kernel(self, kernel_r, kernel_i=None, bias=None):
+        """
+        :param kernel_r: Real part of the dense kernel, of shape (inputs, outputs).
+        :param kernel_i: Imaginary part of the dense kernel (None for real layers).
+            The kernel has `nnz` non-zero complex elements.
+        :param bias: Bias (complex or real) of shape (outputs,).
+        """
+        transposed_r = tf.transpose(kernel_r)
+        non_zero = tf.not_equal(transposed_r, 0)
+        if kernel_i is not None:
+            transposed_i = tf.transpose(kernel_i)
+            non_zero = tf.logical_or(non_zero, tf.not_equal(transposed_i, 0))
+        indices = tf.where(non_zero)        # Row-major order
+        rows = tf.cast(indices[:, 0], tf.int32)
+        row_lengths = tf.math.bincount(rows, minlength=self.kernel_shape[0], maxlength=self.kernel_shape[0])
+        self.row_splits.assign(tf.concat([[0], tf.cumsum(row_lengths)], axis=0))
+        self.col_indices.assign(tf.cast(indices[:, 1], tf.int32))
+        if kernel_i is not None:
+            self.kernel_values_r.assign(tf.gather_nd(transposed_r, indices))
+            self.kernel_values_i.assign(tf.gather_nd(transposed_i, indices))
+        else:
+            self.kernel_values.assign(tf.gather_nd(transposed_r, indices))
+        if self.use_bias:
+            if self.my_dtype.is_complex:
+                bias = tf.stack([tf.math.real(bias), tf.math.imag(bias)], axis=-1)
+            self.bias.assign(tf.reshape(bias, self.bias.shape))
+
+    def _sparse_kernels(self):
+        """:return: Tuple of the kernel parts as `tf.SparseTensor` of shape (outputs, inputs)."""
+        rows = tf.ragged.row_splits_to_segment_ids(self.row_splits)
+        indices = tf.cast(tf.stack([rows, self.col_indices], axis=1), tf.int64)
+        values = (self.kernel_values_r, self.kernel_values_i) if self.my_dtype.is_complex else (self.kernel_values,)
+        return tuple(tf.SparseTensor(indices, part, self.kernel_shape) for part in values)
+
+    def _sparse_product(self, inputs):
+        """
+        :param inputs: Real tensor of shape (..., in_features) (real and imaginary parts interleaved if complex).
+        :return: Real tensor of shape (..., out_features) with the bias added.
+        """
+        kernels = self._cached('kernels', self._sparse_kernels)
+        out_features, in_features = self.kernel_shape
+        parts = 2 if self.my_dtype.is_complex else 1
+        shape = tf.shape(inputs)
+        # (in_features, batch * parts): the real and imaginary parts share the kernel products
+        flat_inputs = tf.reshape(tf.transpose(tf.reshape(inputs, [-1, in_features, parts]), [1, 0, 2]),
+                                 [in_features, -1])
+        products = [tf.reshape(tf.sparse.sparse_dense_matmul(kernel, flat_inputs), [out_features, -1, parts])
+                    for kernel in kernels]
+        if self.my_dtype.is_complex:
+            (real_r, imag_r), (real_i, imag_i) = [tf.unstack(product, axis=-1) for product in products]
+            # (w_r + j w_i)(x_r + j x_i) = (w_r x_r - w_i x_i) + j (w_r x_i + w_i x_r)
+            outputs = tf.stack([real_r - imag_i, imag_r + real_i], axis=-1)
+        else:
+            outputs = products[0]
+        outputs = tf.reshape(tf.transpose(outputs, [1, 0, 2]), [-1, parts * out_features])
+        if self.use_bias:
+            outputs = outputs + tf.reshape(self.bias, [-1])
+        return tf.reshape(outputs, tf.concat([shape[:-1], [parts * out_features]], axis=0))
+
+    def _to_parts(self, inputs):
+        """Interleaves the real and imaginary parts of `inputs` on the last axis (a bitcast, no copy)."""
+        inputs = tf.cast(self._complex_view(inputs), self.my_dtype)
+        if not self.my_dtype.is_complex:
+            return inputs
+        split_inputs = complex_to_split(inputs)
+        shape = tf.shape(split_inputs)
+        return tf.reshape(split_inputs, tf.concat([shape[:-2], [-1]], axis=0))
+
+    def _from_parts(self, outputs):
+        """Inverse of `_to_parts`."""
+        if not self.my_dtype.is_complex:
+            return outputs
+        shape = tf.shape(outputs)
+        return split_to_complex(tf.reshape(outputs, tf.concat([shape[:-1], [-1, 2]], axis=0)))
+
+    @property
+    def density(self) -> float:
+        """Fraction of the (complex) kernel elements stored."""
+        return self.nnz / float(np.prod(self.kernel_shape))
+
+    @property
+    def stored_bytes(self) -> int:
+        """Memory used by the weights of the layer (sparse kernel and bias), in bytes."""
+        return int(sum(np.prod(weight.shape) * weight.dtype.size for weight in self.weights))
+
+    def get_real_equivalent(self):
+        raise NotImplementedError(f"{self.__class__.__name__} is an inference layer, "
+                                  f"prune and export the real equivalent model instead")
+
+    def get_config(self):
+        config = super(_ComplexSparseKernelLayer, self).get_config()
+        config.update({
+            'nnz': self.nnz,
+            'activation': activations.serialize(self.activation),
+            'use_bias': self.use_bias,
+            'dtype': self.my_dtype,
+            'representation': self._get_representation()
+        })
+        return config
+
+
+def _count_nonzero(kernel_r, kernel_i=None) -> int:
+    """:return: Number of non-zero complex elements of the kernel (kernel_r + j kernel_i)."""
+    non_zero = tf.not_equal(kernel_r, 0)
+    if kernel_i is not None:
+        non_zero = tf.logical_or(non_zero, tf.not_equal(kernel_i, 0))
+    return int(tf.math.count_nonzero(non_zero))
+
+
+class ComplexSparseDense(_ComplexSparseKernelLayer):
+    """
+    Inference equivalent of a (pruned) `ComplexDense` layer keeping only the non-zero kernel elements.
+    Create it with `ComplexSparseDense.from_dense`.
+    """
+
+    def __init__(self, units: int, nnz: int, activation=None, use_bias: bool = True, dtype=DEFAULT_COMPLEX_TYPE,
+                 **kwargs):
+        """
+        :param units: Positive integer, dimensionality of the output space.
+        :param nnz: Number of non-zero (complex) elements of the kernel matrix.
+        :param activation: Activation function to use.
+        :param use_bias: Boolean, whether the layer uses a bias vector.
+        :param dtype: Dtype of the input and layer.
+        """
+        super(ComplexSparseDense, self).__init__(nnz=nnz, activation=activation, use_bias=use_bias, dtype=dtype,
+                                                 **kwargs)
+        self.units = units
+
+    def build(self, input_shape):
+        self._add_sparse_weights(int(self._complex_shape(input_shape)[-1]), self.units)
+        self.built = True
+
+    def call(self, inputs):
+        return self._activate(self._from_parts(self._sparse_product(self._to_parts(inputs))), self.activation)
+
+    @classmethod
+    def from_dense(cls, dense: ComplexDense):
+        """
+        :param dense: Built `ComplexDense` layer (pruned, see `cvnn.pruning`).
+        :return: Built `ComplexSparseDense` layer computing the same function.
+        """
+        if type(dense) is not ComplexDense:
+            raise ValueError(f"Only ComplexDense layers can be converted, received {dense.__class__.__name__}")
+        if dense.my_dtype.is_complex:
+            kernel = (tf.convert_to_tensor(dense.w_r), tf.convert_to_tensor(dense.w_i))
+            bias = tf.complex(dense.b_r, dense.b_i) if dense.use_bias else None
+        else:
+            kernel = (tf.convert_to_tensor(dense.w), None)
+            bias = dense.b if dense.use_bias else None
+        layer = cls(units=dense.units, nnz=_count_nonzero(*kernel), activation=dense.activation,
+                    use_bias=dense.use_bias, dtype=dense.my_dtype, representation=dense._get_representation(),
+                    name=dense.name + "_sparse")
+        layer.build(layer._input_shape([None, kernel[0].shape[0]]))
+        layer._set_sparse_kernel(*kernel, bias=bias)
+        return layer
+
+    def compute_output_shape(self, input_shape):
+        return tf.TensorShape(input_shape)[:-1].concatenate([self.units])
+
+    def get_config(self):
+        config = super(ComplexSparseDense, self).get_config()
+        config.update({
+            'units': self.units
+        })
+        return config
+
+
+class ComplexSparseConv(_ComplexSparseKernelLayer):
+    """
+    Inference equivalent of a (pruned) `ComplexConv1D` or `ComplexConv2D` layer keeping only the non-zero kernel
+        elements. Create it with `ComplexSparseConv.from_conv`.
+    The input patches are extracted (im2col, see `_patch_convolution`) and multiplied by the sparse kernel matrix,
+        so the patches (kernel size times the input size) must fit in memory.
+    """
+
+    def __init__(self, rank: int, filters: int, kernel_size, nnz: int, strides=1, padding: str = 'valid',
+                 data_format: Optional[str] = None, dilation_rate=1, activation=None, use_bias: bool = True,
+                 dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+        """
+        :param rank: 1 or 2, rank of the convolution.
+        :param nnz: Number of non-zero (complex) elements of the kernel matrix.
+        Other arguments are the same as `ComplexConv` (groups are not supported).
+        """
+        super(ComplexSparseConv, self).__init__(nnz=nnz, activation=activation, use_bias=use_bias, dtype=dtype,
+                                                **kwargs)
+        if rank not in (1, 2):
+            raise ValueError(f"Only 1D and 2D sparse convolutions are supported, received rank {rank}")
+        self.rank = rank
+        self.filters = filters
+        self.kernel_size = conv_utils.normalize_tuple(kernel_size, rank, 'kernel_size')
+        self.strides = conv_utils.normalize_tuple(strides, rank, 'strides')
+        self.padding = conv_utils.normalize_padding(padding)
+        self.data_format = conv_utils.normalize_data_format(data_format)
+        self.dilation_rate = conv_utils.normalize_tuple(dilation_rate, rank, 'dilation_rate')
+
+    def build(self, input_shape):
+        input_shape = self._complex_shape(input_shape)
+        channels = int(input_shape[1] if self.data_format == 'channels_first' else input_shape[-1])
+        self._add_sparse_weights(functools.reduce(lambda a, b: a * b, self.kernel_size) * channels, self.filters)
+        self.built = True
+
+    def call(self, inputs):
+        inputs = tf.cast(self._complex_view(inputs), self.my_dtype)
+        outputs = _patch_convolution(inputs, self._sparse_product, kernel_size=self.kernel_size, strides=self.strides,
+                                     padding=self.padding, data_format=self.data_format,
+                                     dilation_rate=self.dilation_rate)
+        return self._activate(outputs, self.activation)
+
+    @classmethod
+    def from_conv(cls, conv):
+        """
+        :param conv: Built `ComplexConv1D` or `ComplexConv2D` layer (pruned, see `cvnn.pruning`) without groups.
+        :return: Built `ComplexSparseConv` layer computing the same function.
+        """
+        if type(conv) not in (ComplexConv1D, ComplexConv2D) or conv.groups != 1:
+            raise ValueError(f"Only ComplexConv1D and ComplexConv2D layers without groups can be converted, "
+                             f"received {conv.__class__.__name__} (groups={getattr(conv, 'groups', None)})")
+        if conv.my_dtype.is_complex:
+            kernel = conv._get_kernel()
+        else:
+            kernel = (tf.convert_to_tensor(conv.kernel), None)
+        channels = kernel[0].shape[-2]
+        # Same (complex) feature order as the extracted patches
+        kernel = tuple(None if part is None else tf.reshape(part, [-1, part.shape[-1]]) for part in kernel)
+        layer = cls(rank=conv.rank, filters=conv.filters, kernel_size=conv.kernel_size,
+                    nnz=_count_nonzero(*kernel), strides=conv.strides, padding=conv.padding,
+                    data_format=conv.data_format, dilation_rate=conv.dilation_rate, activation=conv.activation,
+                    use_bias=conv.use_bias, dtype=conv.my_dtype, representation=conv._get_representation(),
+                    name=conv.name + "_sparse")
+        input_shape = [None, channels] + [None] * conv.rank if conv.data_format == 'channels_first' \
+            else [None] * (conv.rank + 1) + [channels]
+        layer.build(layer._input_shape(input_shape))
+        layer._set_sparse_kernel(*kernel, bias=conv._get_bias() if conv.use_bias else None)
+        return layer
+
+    def get_config(self):
+        config = super(ComplexSparseConv, self).get_config()
+        config.update({
+            'rank': self.rank,
+            'filters': self.filters,
+            'kernel_size': self.kernel_size,
+            'strides': self.strides,
+            'padding': self.padding,
+            'data_format': self.data_format,
+            'dilation_rate': self.dilation_rate
+        })
+        return config
@@ -3,14 +3,16 @@ from tensorflow.keras import backend
 from tensorflow.keras.layers import UpSampling2D
 from typing import Optional, Union, Tuple
 from cvnn.layers.core import ComplexLayer
-from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
+from cvnn.layers.core import DEFAULT_COMPLEX_TYPE, complex_to_split, split_to_complex
+from cvnn.layers.core import _split_to_channels, _channels_to_split
 
 
 class ComplexUpSampling2D(UpSampling2D, ComplexLayer):
 
     def __init__(self, size: Union[int, Tuple[int, int]] = (2, 2),
                  data_format: Optional[str] = None, interpolation: str = 'nearest',
-                 align_corners: bool = False, dtype=DEFAULT_COMPLEX_TYPE, **kwargs):
+                 align_corners: bool = False, dtype=DEFAULT_COMPLEX_TYPE, representation: Optional[str] = None,
+                 **kwargs):
         """
         :param size: Int, or tuple of 2 integers. The upsampling factors for rows and columns.
         :param data_format: string, one of channels_last (default) or channels_first.
@@ -21,21 +23,28 @@ class ComplexUpSampling2D(UpSampling2D, ComplexLayer):
         :param align_corners:  if True, the corner pixels of the input and output tensors are aligned,
             and thus preserving the values at those pixels.
             Example of align corners: https://discuss.pytorch.org/t/what-we-should-use-align-corners-false/22663/9
+        :param representation: 'complex' or 'split' (see `set_representation`). Defaults to `get_representation()`.
         """
+        self._init_representation(representation)
         self.factor_upsample = size
         self.my_dtype = tf.dtypes.as_dtype(dtype)
         super(ComplexUpSampling2D, self).__init__(size=size, data_format=data_format, interpolation=interpolation,
                                                   dtype=self.my_dtype.real_dtype, **kwargs)
+        self.input_spec = self._split_input_spec(self.input_spec)
 
     def call(self, inputs):
-        result = tf.complex(
-            backend.resize_images(tf.math.real(inputs), self.size[0], self.size[1], self.data_format,
-                                  interpolation=self.interpolation),
-            backend.resize_images(tf.math.imag(inputs), self.size[0], self.size[1], self.data_format,
-                                  interpolation=self.interpolation),
-        )
-        casted_value = inputs.dtype if not inputs.dtype.is_integer else tf.float32
-        return tf.cast(result, dtype=casted_value)
+        inputs = self._complex_view(inputs)
+        if not inputs.dtype.is_complex:
+            result = backend.resize_images(inputs, self.size[0], self.size[1], self.data_format,
+                                           interpolation=self.interpolation)
+            casted_value = inputs.dtype if not inputs.dtype.is_integer else tf.float32
+            return tf.cast(result, dtype=casted_value)
+        # Real and imaginary parts are resized at once, interleaved on the channel axis
+        channels_first = self.data_format == 'channels_first'
+        result = backend.resize_images(_split_to_channels(complex_to_split(inputs), channels_first),
+                                       self.size[0], self.size[1], self.data_format, interpolation=self.interpolation)
+        result = tf.cast(result, inputs.dtype.real_dtype)       # Bilinear resizing outputs float32
+        return self._to_representation(split_to_complex(_channels_to_split(result, channels_first)))
 
     def get_real_equivalent(self):
         return ComplexUpSampling2D(size=self.factor_upsample, data_format=self.data_format,
@@ -45,8 +54,8 @@ class ComplexUpSampling2D(UpSampling2D, ComplexLayer):
         config = super(ComplexUpSampling2D, self).get_config()
         config.update({
             'dtype': self.my_dtype,
-            'factor_upsample': self.factor_upsample
-
+            'factor_upsample': self.factor_upsample,
+            'representation': self._get_representation()
         })
         return config
 
@@ -0,0 +1,205 @@
+"""
+Magnitude-based pruning of complex layers.
+Complex weights are pruned by their magnitude |w_r + j w_i| so that real and imaginary parts are removed together.
+    - `prune_low_magnitude`: One-shot pruning of a model to a given sparsity.
+    - `PruneLowMagnitude`: Keras callback pruning gradually during training, following a schedule
+        (`ConstantSparsity` or `PolynomialDecaySparsity`).
+    - `to_sparse`: Exports a pruned model whose dense and convolutional layers store their kernels in sparse form
+        (see `cvnn.layers.sparse`).
+"""
+import tensorflow as tf
+from typing import Optional, List, Tuple, Dict
+from cvnn.layers.core import ComplexDense
+from cvnn.layers.convolutional import ComplexConv, ComplexConv1D, ComplexConv2D
+from cvnn.layers.sparse import ComplexSparseDense, ComplexSparseConv
+from cvnn import logger
+
+# Attribute prefixes of the kernels of each layer type (`name_r` and `name_i` for complex layers)
+_KERNEL_NAMES = {
+    ComplexDense: ('w', 'u', 'v'),
+    ComplexConv: ('kernel', 'depthwise_kernel', 'pointwise_kernel', 'spatial_kernel', 'depth_kernel')
+}
+
+
+def prunable_weights(model) -> List[Tuple[tf.Variable, Optional[tf.Variable]]]:
+    """
+    :param model: A `tf.keras.Model` or layer.
+    :return: List of the kernels of its `ComplexDense` and `ComplexConv` layers (biases are not pruned).
+        Each kernel is a tuple (real, imag) of variables, imag is None for real layers.
+    """
+    layers = [model] + list(model.submodules) if isinstance(model, tf.Module) else [model]
+    kernels = []
+    for layer in layers:
+        for layer_type, names in _KERNEL_NAMES.items():
+            if not isinstance(layer, layer_type):
+                continue
+            for name in names:
+                if hasattr(layer, name + '_r'):
+                    kernels.append((getattr(layer, name + '_r'), getattr(layer, name + '_i')))
+                elif isinstance(getattr(layer, name, None), tf.Variable):
+                    kernels.append((getattr(layer, name), None))
+    return kernels
+
+
+def _magnitude(kernel_r, kernel_i):
+    if kernel_i is None:
+        return tf.abs(kernel_r)
+    return tf.sqrt(tf.square(kernel_r) + tf.square(kernel_i))
+
+
+def _magnitude_mask(kernel_r, kernel_i, sparsity: float):
+    """
+    :return: Mask (same dtype as the kernel) keeping the `1 - sparsity` fraction of the weights with largest magnitude.
+    """
+    magnitude = tf.reshape(_magnitude(kernel_r, kernel_i), [-1])
+    keep = int(round((1. - sparsity) * magnitude.shape[0]))
+    if keep <= 0:
+        return tf.zeros_like(kernel_r)
+    threshold = tf.math.top_k(magnitude, k=keep, sorted=True).values[-1]
+    return tf.cast(_magnitude(kernel_r, kernel_i) >= threshold, kernel_r.dtype)
+
+
+def _apply_mask(kernel_r, kernel_i, mask):
+    kernel_r.assign(kernel_r * mask)
+    if kernel_i is not None:
+        kernel_i.assign(kernel_i * mask)
+
+
+def prune_low_magnitude(model, sparsity: float) -> Dict:
+    """
+    Sets to zero the `sparsity` fraction of the complex weights with smallest magnitude of each kernel.
+    :param model: A `tf.keras.Model` or layer.
+    :param sparsity: Float between 0 and 1.
+    :return: Dictionary mapping each kernel (real part variable reference) to its mask.
+    """
+    if not 0. <= sparsity <= 1.:
+        raise ValueError(f"sparsity must be between 0 and 1, received {sparsity}")
+    masks = {}
+    for kernel_r, kernel_i in prunable_weights(model):
+        mask = _magnitude_mask(kernel_r, kernel_i, sparsity)
+        _apply_mask(kernel_r, kernel_i, mask)
+        masks[kernel_r.ref()] = mask
+    return masks
+
+
+def get_sparsity(model) -> float:
+    """
+    :return: Fraction of the complex weights of the prunable kernels of `model` that are zero.
+    """
+    zeros, total = 0, 0
+    for kernel_r, kernel_i in prunable_weights(model):
+        magnitude = _magnitude(kernel_r, kernel_i)
+        zeros += int(tf.reduce_sum(tf.cast(tf.equal(magnitude, 0), tf.int64)))
+        total += int(tf.size(magnitude))
+    return zeros / total if total else 0.
+
+
+class ConstantSparsity:
+    """
+    Pruning schedule reaching `sparsity` at `begin_step` and keeping it, the masks being updated every `frequency`
+        steps until `end_step` (-1 for the end of training).
+    """
+
+    def __init__(self, sparsity: float, begin_step: int = 0, end_step: int = -1, frequency: int = 100):
+        if not 0. <= sparsity <= 1.:
+            raise ValueError(f"sparsity must be between 0 and 1, received {sparsity}")
+        self.sparsity = sparsity
+        self.begin_step = begin_step
+        self.end_step = end_step
+        self.frequency = frequency
+
+    def _should_prune(self, step: int) -> bool:
+        if step < self.begin_step or 0 <= self.end_step < step:
+            return False
+        return (step - self.begin_step) % self.frequency == 0 or step == self.end_step
+
+    def __call__(self, step: int) -> Optional[float]:
+        """
+        :return: The target sparsity if the masks must be updated at `step`, None otherwise.
+        """
+        return self.sparsity if self._should_prune(step) else None
+
+
+class PolynomialDecaySparsity(ConstantSparsity):
+    """
+    Gradual pruning schedule from "To prune, or not to prune" from M. Zhu and S. Gupta (2017)
+        URL: https://arxiv.org/abs/1710.01878
+    The sparsity goes from `initial_sparsity` at `begin_step` to `final_sparsity` at `end_step` as
+        s_t = s_f + (s_i - s_f) (1 - (t - t_0) / (t_end - t_0))^power
+    pruning quickly at first, while there are many redundant weights, and slowly near the end.
+    """
+
+    def __init__(self, final_sparsity: float, begin_step: int, end_step: int, initial_sparsity: float = 0.,
+                 power: float = 3., frequency: int = 100):
+        super(PolynomialDecaySparsity, self).__init__(final_sparsity, begin_step=begin_step, end_step=end_step,
+                                                      frequency=frequency)
+        if end_step <= begin_step:
+            raise ValueError(f"end_step ({end_step}) must be greater than begin_step ({begin_step})")
+        self.initial_sparsity = initial_sparsity
+        self.power = power
+
+    def __call__(self, step: int) -> Optional[float]:
+        if not self._should_prune(step):
+            return None
+        progress = (step - self.begin_step) / (self.end_step - self.begin_step)
+        return self.sparsity + (self.initial_sparsity - self.sparsity) * (1. - progress) ** self.power
+
+
+class PruneLowMagnitude(tf.keras.callbacks.Callback):
+    """
+    Keras callback pruning the model during training following `schedule`.
+    When the schedule requires it, the masks of each kernel are recomputed from the complex weight magnitudes.
+    After each training step, the masks are applied again so that pruned weights stay at zero.
+
+    Example:
+        schedule = PolynomialDecaySparsity(final_sparsity=0.9, begin_step=0, end_step=10 * steps_per_epoch)
+        model.fit(x, y, epochs=12, callbacks=[PruneLowMagnitude(schedule)])
+        sparse_model = to_sparse(model)
+    """
+
+    def __init__(self, schedule):
+        """
+        :param schedule: Callable returning the target sparsity for a given step, or None if masks must not be
+            updated at that step. For example `ConstantSparsity` or `PolynomialDecaySparsity`.
+        """
+        super(PruneLowMagnitude, self).__init__()
+        self.schedule = schedule
+        self.step = 0       # Kept between calls to `fit`
+        self.masks = {}
+
+    def on_train_batch_end(self, batch, logs=None):
+        sparsity = self.schedule(self.step)
+        if sparsity is not None:
+            self.masks = prune_low_magnitude(self.model, sparsity)
+        else:
+            for kernel_r, kernel_i in prunable_weights(self.model):
+                mask = self.masks.get(kernel_r.ref())
+                if mask is not None:
+                    _apply_mask(kernel_r, kernel_i, mask)
+        self.step += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs['sparsity'] = get_sparsity(self.model)
+
+
+def _to_sparse_layer(layer):
+    if type(layer) is ComplexDense:
+        return ComplexSparseDense.from_dense(layer)
+    if type(layer) in (ComplexConv1D, ComplexConv2D) and layer.groups == 1:
+        return ComplexSparseConv.from_conv(layer)
+    if isinstance(layer, (ComplexDense, ComplexConv)):
+        logger.warning(f"Layer {layer.name} ({layer.__class__.__name__}) has no sparse equivalent, it is kept dense")
+    return layer
+
+
+def to_sparse(model: tf.keras.Model) -> tf.keras.Model:
+    """
+    Exports a (pruned) model for inference. `ComplexDense`, `ComplexConv1D` and `ComplexConv2D` layers are replaced
+        by `ComplexSparseDense` and `ComplexSparseConv` layers storing only their non-zero kernel elements
+        and computing the same outputs with sparse matrix products.
+    Other layers are shared with `model`.
+    :param model: A built Sequential or functional model.
+    :return: The new model.
+    """
+    return tf.keras.models.clone_model(model, clone_function=_to_sparse_layer)
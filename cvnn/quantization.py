@@ -0,0 +1,81 @@
+"""
+Post-training int8 quantisation of complex models.
+`quantize_model` calibrates the input ranges of the `ComplexDense`, `ComplexConv1D` and `ComplexConv2D` layers
+    on representative data and replaces them by their int8 equivalents (see `cvnn.layers.quantized`).
+"""
+import numpy as np
+import tensorflow as tf
+from typing import Dict, Optional
+from cvnn.layers.core import ComplexDense
+from cvnn.layers.convolutional import ComplexConv, ComplexConv1D, ComplexConv2D
+from cvnn.layers.quantized import ComplexQuantizedDense, ComplexQuantizedConv
+from cvnn import logger
+
+
+def _is_quantizable(layer) -> bool:
+    if type(layer) is ComplexDense:
+        return True
+    return type(layer) in (ComplexConv1D, ComplexConv2D) and layer.groups == 1
+
+
+def _batches(representative_data):
+    """Yields the model inputs of a dataset of inputs or (inputs, labels) batches."""
+    for batch in representative_data:
+        if isinstance(batch, (tuple, list)):
+            batch = batch[0]
+        yield batch
+
+
+def calibrate(model: tf.keras.Model, representative_data, max_batches: Optional[int] = None) -> Dict[str, float]:
+    """
+    Computes the range of the inputs of each quantizable layer of `model`.
+    :param model: A built Sequential or functional model.
+    :param representative_data: Iterable (list, `tf.data.Dataset`, ...) of input batches or (inputs, labels) batches.
+    :param max_batches: Maximum number of batches used, all of them if None.
+    :return: Dictionary mapping the layer names to the maximum absolute value of the real and imaginary parts
+        of their inputs.
+    """
+    layers = [layer for layer in model.layers if _is_quantizable(layer)]
+    if not layers:
+        return {}
+    probe = tf.keras.Model(inputs=model.inputs, outputs=[layer.input for layer in layers])
+    ranges = np.zeros(len(layers))
+    for i, batch in enumerate(_batches(representative_data)):
+        if max_batches is not None and i >= max_batches:
+            break
+        outputs = probe(batch, training=False)
+        if len(layers) == 1:
+            outputs = [outputs]
+        for j, inputs in enumerate(outputs):
+            inputs = tf.convert_to_tensor(inputs)
+            if inputs.dtype.is_complex:
+                inputs = tf.stack([tf.math.real(inputs), tf.math.imag(inputs)])
+            ranges[j] = max(ranges[j], float(tf.reduce_max(tf.abs(inputs))))
+    return {layer.name: value for layer, value in zip(layers, ranges)}
+
+
+def quantize_model(model: tf.keras.Model, representative_data, max_batches: Optional[int] = None) -> tf.keras.Model:
+    """
+    Post-training quantisation of `model`:
+        - Kernels: symmetric int8 with one scale per output channel (shared by real and imaginary parts).
+        - Inputs of each quantized layer: symmetric int8 with a per-tensor scale calibrated on `representative_data`.
+        - Products: int32 accumulation, rescaled to float before the bias and activation.
+    Other layers are shared with `model` and stay in float.
+    The quantized model takes less memory but is slower than `model` on CPU (no fast int32 products in TensorFlow),
+        see `cvnn.layers.quantized`.
+    :param model: A built Sequential or functional model.
+    :param representative_data: Iterable of input batches or (inputs, labels) batches, see `calibrate`.
+    :param max_batches: Maximum number of batches used for the calibration, all of them if None.
+    :return: The quantized model.
+    """
+    ranges = calibrate(model, representative_data, max_batches=max_batches)
+
+    def quantize_layer(layer):
+        if layer.name in ranges:
+            if isinstance(layer, ComplexDense):
+                return ComplexQuantizedDense.from_dense(layer, input_scale=ranges[layer.name])
+            return ComplexQuantizedConv.from_conv(layer, input_scale=ranges[layer.name])
+        if isinstance(layer, (ComplexDense, ComplexConv)):
+            logger.warning(f"Layer {layer.name} ({layer.__class__.__name__}) has no int8 equivalent, it is kept in float")
+        return layer
+    return tf.keras.models.clone_model(model, clone_function=quantize_layer)
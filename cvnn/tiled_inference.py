@@ -0,0 +1,301 @@
+"""
+Tiled (sliding window) inference of fully convolutional models on images too large to fit in memory at once.
+The receptive field of the model is computed from the layer configurations so that overlapping tiles can be
+    stitched back without seams.
+"""
+import math
+import numpy as np
+import tensorflow as tf
+from fractions import Fraction
+from typing import Optional, Union, List, Tuple
+from tensorflow.keras import layers as keras_layers
+from tensorflow.python.keras.utils import conv_utils
+from cvnn.layers.pooling import ComplexUnPooling
+from cvnn.layers.convolutional import ComplexConv2DTranspose
+
+STITCH_MODES = {'discard', 'add'}
+
+
+class AxisGeometry:
+    """
+    Geometry of a tensor along one spatial axis, relative to the model input.
+    Element `o` of the tensor is computed from the input pixels [x - halo_left, x + halo_right],
+        with x = offset + o * scale.
+    Shifting the input by a multiple of `period` pixels shifts the tensor by an integer number of elements.
+    """
+
+    def __init__(self, offset=Fraction(0), scale=Fraction(1), halo_left=Fraction(0), halo_right=Fraction(0),
+                 period: int = 1):
+        self.offset = Fraction(offset)
+        self.scale = Fraction(scale)
+        self.halo_left = Fraction(halo_left)
+        self.halo_right = Fraction(halo_right)
+        self.period = period
+
+    def then(self, offset=0, scale=1, halo_left=0, halo_right=0, period=1) -> 'AxisGeometry':
+        """
+        Geometry after a layer with the given local geometry (in elements of the current tensor).
+        """
+        scale = self.scale * Fraction(scale)
+        period = _lcm(_lcm(self.period, scale.numerator), (Fraction(period) * self.scale).numerator)
+        return AxisGeometry(offset=self.offset + Fraction(offset) * self.scale, scale=scale,
+                            halo_left=self.halo_left + Fraction(halo_left) * self.scale,
+                            halo_right=self.halo_right + Fraction(halo_right) * self.scale,
+                            period=period)
+
+    def merge(self, other: 'AxisGeometry') -> 'AxisGeometry':
+        """
+        Geometry of a tensor computed from two tensors aligned element-wise (concatenation, sum, ...).
+        """
+        if self.scale != other.scale:
+            raise ValueError(f"Cannot merge tensors with different resolutions "
+                             f"(scales {self.scale} and {other.scale} of the input)")
+        return AxisGeometry(offset=self.offset, scale=self.scale,
+                            halo_left=max(self.halo_left, other.halo_left + self.offset - other.offset),
+                            halo_right=max(self.halo_right, other.halo_right + other.offset - self.offset),
+                            period=_lcm(self.period, other.period))
+
+    @property
+    def halo(self) -> int:
+        """Number of input pixels two neighbouring tiles must share."""
+        return math.ceil(self.halo_left + self.halo_right)
+
+    def __repr__(self):
+        return f"AxisGeometry(offset={self.offset}, scale={self.scale}, halo_left={self.halo_left}, " \
+               f"halo_right={self.halo_right}, period={self.period})"
+
+
+def _lcm(a: int, b: int) -> int:
+    return a * b // math.gcd(a, b)
+
+
+def _window_geometry(geometry: AxisGeometry, kernel: int, stride: int, padding: str) -> AxisGeometry:
+    """Convolutions and pooling"""
+    if padding == 'same':
+        offset = -(max(kernel - stride, 0) // 2)
+    elif padding == 'valid':
+        offset = 0
+    else:
+        raise ValueError(f"Unsupported padding {padding} for tiled inference")
+    return geometry.then(offset=offset, scale=stride, halo_right=kernel - 1)
+
+
+def _layer_geometry(layer, geometries: List[Tuple[AxisGeometry, AxisGeometry]]) \
+        -> Optional[Tuple[AxisGeometry, ...]]:
+    """
+    :param layer: Layer of the model.
+    :param geometries: Geometry (of both spatial axes) of the inputs of the layer.
+    :return: Geometry of the outputs of the layer. None if the layer has no spatial parameters.
+    """
+    geometry = list(geometries[0])
+    for other in geometries[1:]:
+        geometry = [g.merge(o) for g, o in zip(geometry, other)]
+    if isinstance(layer, tf.keras.Model):
+        inner = receptive_field(layer)
+        return tuple(g.then(offset=i.offset, scale=i.scale, halo_left=i.halo_left, halo_right=i.halo_right,
+                            period=i.period) for g, i in zip(geometry, inner))
+    if getattr(layer, 'data_format', 'channels_last') == 'channels_first':
+        raise ValueError(f"Tiled inference only supports channels_last layers, {layer.name} is channels_first")
+    if isinstance(layer, (ComplexConv2DTranspose, keras_layers.Conv2DTranspose)):
+        output_padding = layer.output_padding or (None, None)
+        result = []
+        for g, k, s, d, out_pad in zip(geometry, layer.kernel_size, layer.strides, layer.dilation_rate,
+                                       output_padding):
+            dilated = (k - 1) * d + 1
+            # Output size of a 1 pixel input gives the cropping of 'same' padding
+            length = conv_utils.deconv_output_length(1, k, padding=layer.padding, output_padding=out_pad,
+                                                     stride=s, dilation=d)
+            crop = max(dilated - length, 0) // 2
+            result.append(g.then(offset=Fraction(crop, s), scale=Fraction(1, s),
+                                 halo_left=Fraction(dilated - 1, s)))
+        return tuple(result)
+    if isinstance(layer, ComplexUnPooling):
+        if layer.desired_output_shape is not None or layer.upsampling_factor is None:
+            raise ValueError(f"Tiled inference needs {layer.name} to use upsampling_factor "
+                             f"(a fixed desired_output_shape does not depend on the tile size)")
+        if layer.rank != 2:
+            raise ValueError(f"Tiled inference only supports 2D layers, {layer.name} is {layer.rank}D")
+        factor = layer.upsampling_factor
+        return tuple(g.then(scale=Fraction(1, factor), halo_left=Fraction(factor - 1, factor)) for g in geometry)
+    if hasattr(layer, 'kernel_size') and hasattr(layer, 'dilation_rate'):
+        if len(layer.kernel_size) != 2:
+            raise ValueError(f"Tiled inference only supports 2D layers, {layer.name} is {len(layer.kernel_size)}D")
+        return tuple(_window_geometry(g, (k - 1) * d + 1, s, layer.padding)
+                     for g, k, s, d in zip(geometry, layer.kernel_size, layer.strides, layer.dilation_rate))
+    if hasattr(layer, 'pool_size'):
+        if len(layer.pool_size) != 2:
+            raise ValueError(f"Tiled inference only supports 2D layers, {layer.name} is {len(layer.pool_size)}D")
+        return tuple(_window_geometry(g, k, s, layer.padding)
+                     for g, k, s in zip(geometry, layer.pool_size, layer.strides))
+    if isinstance(layer, keras_layers.UpSampling2D):
+        if layer.interpolation == 'nearest':
+            return tuple(g.then(scale=Fraction(1, f), halo_left=Fraction(f - 1, f))
+                         for g, f in zip(geometry, layer.size))
+        return tuple(g.then(scale=Fraction(1, f), halo_left=1, halo_right=1) for g, f in zip(geometry, layer.size))
+    if isinstance(layer, keras_layers.Cropping2D):
+        return tuple(g.then(offset=crop[0]) for g, crop in zip(geometry, layer.cropping))
+    if isinstance(layer, keras_layers.ZeroPadding2D):
+        return tuple(g.then(offset=-pad[0]) for g, pad in zip(geometry, layer.padding))
+    return None
+
+
+def _check_pixel_wise(node):
+    """Layers without spatial parameters are assumed to act pixel-wise, check at least their output shape."""
+    input_shape = tf.nest.flatten(node.keras_inputs)[0].shape
+    for tensor in tf.nest.flatten(node.outputs):
+        if tensor.shape.rank != 4:
+            raise ValueError(f"Model is not fully convolutional: layer {node.layer.name} "
+                             f"outputs shape {tensor.shape}")
+        if any(i is not None and o is not None and i != o for i, o in zip(input_shape[1:3], tensor.shape[1:3])):
+            raise ValueError(f"Unsupported layer {node.layer.name}: it changes the spatial shape "
+                             f"from {input_shape} to {tensor.shape}")
+
+
+def receptive_field(model: tf.keras.Model) -> Tuple[AxisGeometry, AxisGeometry]:
+    """
+    Computes the geometry (scale, offset and receptive field) of the output of a fully convolutional model
+        for each spatial axis (height, width) of a channels_last 2D input.
+    Supported layers are convolutions (also transposed, depthwise and separable), pooling, unpooling, upsampling,
+        cropping and zero padding. Other layers are assumed to act pixel-wise (activations, batch normalization,
+        concatenation, ...), the output shape is checked to be consistent.
+    :param model: Keras functional or sequential model with a single input and output.
+    :return: Tuple of `AxisGeometry` for the height and width axes.
+    """
+    if len(model.inputs) != 1 or len(model.outputs) != 1:
+        raise ValueError("Tiled inference only supports models with one input and one output")
+    geometries = {id(model.inputs[0]): (AxisGeometry(), AxisGeometry())}
+    for depth in sorted(model._nodes_by_depth.keys(), reverse=True):
+        for node in model._nodes_by_depth[depth]:
+            inputs = [t for t in tf.nest.flatten(node.keras_inputs) if id(t) in geometries]
+            if not inputs:
+                continue        # Input layer
+            layer_inputs = [t for t in tf.nest.flatten(node.keras_inputs) if t.shape.rank == 4]
+            if len(inputs) != len(layer_inputs):
+                raise ValueError(f"Cannot compute the geometry of the inputs of layer {node.layer.name}")
+            input_geometries = [geometries[id(t)] for t in inputs]
+            outputs = _layer_geometry(node.layer, input_geometries)
+            if outputs is None:     # Element-wise / channel-wise layers
+                _check_pixel_wise(node)
+                outputs = input_geometries[0]
+                for other in input_geometries[1:]:
+                    outputs = tuple(g.merge(o) for g, o in zip(outputs, other))
+            for tensor in tf.nest.flatten(node.outputs):
+                geometries[id(tensor)] = outputs
+    return geometries[id(model.outputs[0])]
+
+
+def _axis_tiles(length: int, tile: int, geometry: AxisGeometry) -> List[int]:
+    """Starts of the (aligned) tiles covering [0, length) along one axis."""
+    if length <= tile:
+        return [0]
+    overlap = math.ceil(geometry.halo / geometry.period) * geometry.period
+    step = tile - overlap
+    if step <= 0:
+        raise ValueError(f"Tile size {tile} is too small for a receptive field of {geometry.halo} pixels "
+                         f"(aligned to {geometry.period}), use tiles larger than {overlap}")
+    starts = list(range(0, length - tile, step))
+    return starts + [length - tile]
+
+
+def _valid_range(start: int, tile_length: int, length: int, output_length: int, geometry: AxisGeometry):
+    """Range of the tile outputs not affected by the tile borders (scene borders excluded)."""
+    low, high = 0, output_length
+    if start > 0:
+        low = max(math.ceil((geometry.halo_left - geometry.offset) / geometry.scale), 0)
+    if start + tile_length < length:
+        high = min(math.floor((tile_length - 1 - geometry.halo_right - geometry.offset) / geometry.scale) + 1,
+                   output_length)
+    return low, high
+
+
+def _blend_weights(start: int, tile_length: int, length: int, output_length: int, ramp: int) -> np.ndarray:
+    """Weights of overlap-add, linearly decreasing towards the tile borders that are not scene borders."""
+    index = np.arange(output_length, dtype=np.float32)
+    weights = np.ones(output_length, dtype=np.float32)
+    if start > 0:
+        weights = np.minimum(weights, (index + 1) / (ramp + 1))
+    if start + tile_length < length:
+        weights = np.minimum(weights, (output_length - index) / (ramp + 1))
+    return weights
+
+
+def tiled_predict(model: tf.keras.Model, image: Union[np.ndarray, str], tile_size: Optional[int] = None,
+                  batch_size: int = 4, mode: str = 'discard', output_path: Optional[str] = None) -> np.ndarray:
+    """
+    Runs a fully convolutional model on an image of arbitrary size by overlapping tiles,
+        so that memory is bounded by the tile size and not by the image size.
+    Tiles are aligned with every stride of the model and overlap by its receptive field (see `receptive_field`).
+    If the image size is not a multiple of the model total stride (`AxisGeometry.period`), it is zero padded at
+        the bottom and right. The result is then that of the model on the padded image.
+    :param model: Fully convolutional channels_last model (see `receptive_field`).
+    :param image: Image of shape (height, width, channels). It can be a np.memmap or the path to a .npy file,
+        which is then memory-mapped.
+    :param tile_size: Size (in input pixels) of the square tiles. Must be larger than the receptive field.
+        Defaults to the model input size if defined, 512 otherwise.
+    :param batch_size: Number of tiles given to the model at once.
+    :param mode: How overlapping tiles are stitched.
+        - 'discard' (default): Outputs affected by the tile borders are dropped.
+            The result is the same as running the model on the full image.
+        - 'add': All outputs are blended with weights decreasing linearly towards the tile borders.
+    :param output_path: If given, the output is written to a memory-mapped .npy file at this path.
+    :return: Model output for the full image, of shape (output_height, output_width, output_channels).
+    """
+    if mode not in STITCH_MODES:
+        raise ValueError(f"Unknown mode {mode}, supported modes are {STITCH_MODES}")
+    if isinstance(image, str):
+        image = np.load(image, mmap_mode='r')
+    if image.ndim != 3:
+        raise ValueError(f"image must have shape (height, width, channels), got {image.shape}")
+    geometry = receptive_field(model)
+    model_size = tuple(model.inputs[0].shape[1:3])
+    if tile_size is None:
+        tile_size = model_size if None not in model_size else (512, 512)
+    tile_size = tuple(tile_size) if isinstance(tile_size, (tuple, list)) else (tile_size, tile_size)
+    if None not in model_size and (model_size != tile_size):
+        raise ValueError(f"The model input size {model_size} is fixed, tile_size cannot be {tile_size}")
+    tile_size = tuple(t // g.period * g.period for t, g in zip(tile_size, geometry))
+    if 0 in tile_size:
+        raise ValueError(f"tile_size must be at least the model total stride {[g.period for g in geometry]}")
+    # Aligned (padded) image size
+    size = tuple(math.ceil(n / g.period) * g.period for n, g in zip(image.shape[:2], geometry))
+    tile_size = tuple(min(t, n) for t, n in zip(tile_size, size))
+    output_shape = tf.TensorShape(model.compute_output_shape((1,) + size + image.shape[2:])).as_list()[1:]
+    dtype = model.outputs[0].dtype.as_numpy_dtype
+    if output_path is not None:
+        outputs = np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=tuple(output_shape))
+    else:
+        outputs = np.zeros(output_shape, dtype=dtype)
+    if mode == 'add':
+        outputs[...] = 0
+        weights_sum = np.zeros(output_shape[:2], dtype=np.float32)
+        ramps = [math.ceil(g.halo / g.scale) for g in geometry]
+
+    tiles = [(row, col) for row in _axis_tiles(size[0], tile_size[0], geometry[0])
+             for col in _axis_tiles(size[1], tile_size[1], geometry[1])]
+    for first in range(0, len(tiles), batch_size):
+        batch_tiles = tiles[first:first + batch_size]
+        batch = np.zeros((len(batch_tiles),) + tile_size + image.shape[2:], dtype=image.dtype)
+        for i, (row, col) in enumerate(batch_tiles):
+            patch = image[row:row + tile_size[0], col:col + tile_size[1]]   # Only this part is read from disk
+            batch[i, :patch.shape[0], :patch.shape[1]] = patch
+        predictions = model(tf.convert_to_tensor(batch, dtype=model.inputs[0].dtype), training=False).numpy()
+        for prediction, (row, col) in zip(predictions, batch_tiles):
+            out_row, out_col = int(row / geometry[0].scale), int(col / geometry[1].scale)
+            if mode == 'discard':
+                (top, bottom), (left, right) = [
+                    _valid_range(start, t, n, o, g) for start, t, n, o, g in
+                    zip((row, col), tile_size, size, prediction.shape[:2], geometry)]
+                outputs[out_row + top:out_row + bottom, out_col + left:out_col + right] = \
+                    prediction[top:bottom, left:right]
+            else:
+                weights = np.outer(*[_blend_weights(start, t, n, o, ramp) for start, t, n, o, ramp in
+                                     zip((row, col), tile_size, size, prediction.shape[:2], ramps)])
+                rows = slice(out_row, out_row + prediction.shape[0])
+                cols = slice(out_col, out_col + prediction.shape[1])
+                outputs[rows, cols] += weights[..., np.newaxis] * prediction
+                weights_sum[rows, cols] += weights
+    if mode == 'add':
+        outputs /= weights_sum[..., np.newaxis]
+    if output_path is not None:
+        outputs.flush()
+    return outputs
@@ -100,6 +100,513 @@ def shape_ad_dtype_of_conv2d():
     assert y.dtype == tf.complex64
 
 
+def _random_complex(shape):
+    return tf.complex(tf.random.normal(shape), tf.random.normal(shape))
+
+
+def _assert_same_output(reference, candidate, x, atol=1e-4):
+    """Copies the weights of `reference` into `candidate` and checks both layers give the same output."""
+    expected = reference(x)
+    candidate(x)        # Build the layer
+    candidate.set_weights(reference.get_weights())
+    result = candidate(x)
+    assert result.dtype == expected.dtype
+    assert result.shape == expected.shape
+    assert np.allclose(expected.numpy(), result.numpy(), atol=atol)
+
+
+@tf.autograph.experimental.do_not_convert
+def dense_gauss_method():
+    x = _random_complex((4, 7))
+    _assert_same_output(ComplexDense(5), ComplexDense(5, matmul_method='gauss'), x)
+    x = _random_complex((2, 3, 7))
+    _assert_same_output(ComplexDense(5, use_bias=False), ComplexDense(5, use_bias=False, matmul_method='gauss'), x)
+    assert ComplexDense(5, matmul_method='gauss').get_config()['matmul_method'] == 'gauss'
+    try:
+        ComplexDense(5, matmul_method='strassen')
+        assert False, "Unsupported matmul_method should raise"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def dense_packed_method():
+    x = _random_complex((4, 7))
+    _assert_same_output(ComplexDense(5), ComplexDense(5, matmul_method='packed'), x)
+    x = _random_complex((2, 3, 7))
+    reference = ComplexDense(5, activation='cart_relu')
+    packed = ComplexDense(5, activation='cart_relu', matmul_method='packed')
+    _assert_same_output(reference, packed, x)
+    # Cached block kernel must follow the weights
+    complex_layers.freeze(packed)
+    packed(x)
+    packed.set_weights([2 * w for w in reference.get_weights()])
+    reference.set_weights(packed.get_weights())
+    assert np.allclose(reference(x).numpy(), packed(x).numpy(), atol=1e-4)
+
+
+@tf.autograph.experimental.do_not_convert
+def frozen_inference():
+    model = tf.keras.models.Sequential([
+        ComplexInput(input_shape=(8, 8, 2)),
+        ComplexConv2D(4, 3, conv_method='block', activation='cart_relu'),
+        ComplexBatchNormalization(),
+        ComplexConv2D(4, 3, padding='same', conv_method='winograd'),
+        ComplexFlatten(),
+        ComplexDense(6, matmul_method='packed', activation='cart_relu'),
+        ComplexDense(3, matmul_method='gauss')
+    ])
+    x = _random_complex((5, 8, 8, 2))
+    expected = model(x, training=False).numpy()
+    complex_layers.freeze(model)
+    assert np.allclose(model(x, training=False).numpy(), expected, atol=1e-4)
+    # Batch normalization uses its moving statistics even in training mode
+    assert np.allclose(model(x, training=True).numpy(), expected, atol=1e-4)
+    assert np.allclose(model.predict(x), expected, atol=1e-4)
+    # Assigning the weights invalidates the cached tensors, also inside predict
+    model.set_weights([2 * w for w in model.get_weights()])
+    complex_layers.unfreeze(model)
+    expected = model(x, training=False).numpy()
+    complex_layers.freeze(model)
+    assert np.allclose(model.predict(x), expected, atol=1e-4)
+    model.set_weights([w / 2 for w in model.get_weights()])
+    frozen = model.predict(x)
+    complex_layers.unfreeze(model)
+    assert np.allclose(frozen, model.predict(x), atol=1e-4)
+
+
+@tf.autograph.experimental.do_not_convert
+def low_rank_dense():
+    x = _random_complex((4, 12))
+    layer = complex_layers.ComplexLowRankDense(8, rank=3, activation='cart_relu')
+    y = layer(x)
+    assert y.shape == (4, 8) and y.dtype == tf.complex64
+    assert layer.count_params() == 2 * (3 * (12 + 8) + 8)
+    assert layer.get_config()['rank'] == 3
+    dense = ComplexDense(8)
+    expected = dense(x).numpy()
+    # Full rank factorisation is exact
+    for matmul_method in ['standard', 'gauss', 'packed']:
+        dense.matmul_method = matmul_method
+        low_rank = complex_layers.ComplexLowRankDense.from_dense(dense, rank=8)
+        assert low_rank.matmul_method == matmul_method
+        assert np.allclose(low_rank(x).numpy(), expected, atol=1e-4)
+    # Truncation error decreases with the rank
+    errors = [np.linalg.norm(complex_layers.ComplexLowRankDense.from_dense(dense, rank=rank)(x).numpy() - expected)
+              for rank in [2, 4, 6]]
+    assert errors[0] >= errors[1] >= errors[2]
+    real_dense = ComplexDense(8, dtype=np.float32)
+    x = tf.random.normal((4, 12))
+    expected = real_dense(x).numpy()
+    low_rank = complex_layers.ComplexLowRankDense.from_dense(real_dense, rank=8)
+    assert np.allclose(low_rank(x).numpy(), expected, atol=1e-4)
+    try:
+        complex_layers.ComplexLowRankDense.from_dense(ComplexDense(8), rank=2)
+        assert False, "Converting a layer that is not built should fail"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def unitary_dense():
+    layer = complex_layers.ComplexUnitaryDense(use_bias=False)
+    x = _random_complex((6, 16))
+    y = layer(x)
+    assert y.shape == x.shape and y.dtype == tf.complex64
+    assert layer.count_params() == 7 * 16
+    assert np.allclose(np.linalg.norm(y.numpy(), axis=-1), np.linalg.norm(x.numpy(), axis=-1), atol=1e-4)
+    # Row i of layer(I) is W e_i so W = layer(I)^T must be unitary
+    matrix = np.transpose(layer(tf.eye(16, dtype=tf.complex64)).numpy())
+    assert np.allclose(np.conj(matrix.T) @ matrix, np.eye(16), atol=1e-4)
+    assert np.allclose(y.numpy(), x.numpy() @ matrix.T, atol=1e-4)
+    config = layer.get_config()
+    same = complex_layers.ComplexUnitaryDense.from_config(config)
+    same(x)
+    same.set_weights(layer.get_weights())
+    assert np.allclose(same(x).numpy(), y.numpy(), atol=1e-4)
+
+
+@tf.autograph.experimental.do_not_convert
+def sparse_dense():
+    mask = np.random.uniform(size=(8, 20)) < 0.1
+    x = (np.random.normal(size=(8, 20)) + 1j * np.random.normal(size=(8, 20))).astype(np.complex64) * mask
+    sparse_x = tf.sparse.from_dense(x)
+    sparse_pair = (tf.sparse.from_dense(x.real), tf.sparse.from_dense(x.imag))
+    for matmul_method in ['standard', 'gauss', 'packed']:
+        for layer in [ComplexDense(6, matmul_method=matmul_method),
+                      complex_layers.ComplexLowRankDense(6, rank=2, matmul_method=matmul_method)]:
+            expected = layer(x).numpy()
+            assert np.allclose(layer(sparse_x).numpy(), expected, atol=1e-4)
+            assert np.allclose(layer(sparse_pair).numpy(), expected, atol=1e-4)
+            assert np.allclose(layer(tf.sparse.from_dense(x.real)).numpy(), layer(x.real.astype(np.complex64)).numpy(),
+                               atol=1e-4)
+    real_layer = ComplexDense(6, dtype=np.float32)
+    assert np.allclose(real_layer(tf.sparse.from_dense(x.real)).numpy(), real_layer(x.real).numpy(), atol=1e-4)
+    inputs = complex_layers.complex_input(shape=(20,), sparse=True)
+    model = tf.keras.Model(inputs=inputs, outputs=ComplexDense(6)(inputs))
+    assert np.allclose(model(sparse_x).numpy(), model.layers[-1](x).numpy(), atol=1e-4)
+    # Dense inputs are still checked by the input spec
+    for wrong_input in [x[0], x[:, :10]]:
+        try:
+            model.layers[-1](wrong_input)
+            assert False, "Input rank and number of features are checked"
+        except ValueError:
+            pass
+
+
+@tf.autograph.experimental.do_not_convert
+def split_representation():
+    def model():
+        inputs = complex_layers.complex_input(shape=(8, 8, 3))
+        h = ComplexConv2D(4, 3, padding='same', activation='cart_relu')(inputs)
+        h = ComplexBatchNormalization()(h)
+        h = ComplexAvgPooling2D()(h)
+        h = ComplexUpSampling2D()(h)
+        h = ComplexConv2D(4, 3, conv_method='block', activation='modrelu')(h)
+        h = ComplexMaxPooling2D()(h)
+        h = ComplexFlatten()(h)
+        return tf.keras.Model(inputs=inputs, outputs=ComplexDense(5, matmul_method='packed')(h))
+    x = _random_complex((4, 8, 8, 3))
+    reference = model()
+    # Poolings and upsamplings keep the static channel dimension of symbolic inputs
+    inputs = complex_layers.complex_input(shape=(None, None, 3))
+    assert ComplexUpSampling2D()(ComplexAvgPooling2D()(inputs)).shape.as_list() == [None, None, None, 3]
+    complex_layers.set_representation('split')
+    try:
+        split_model = model()
+        split_pooling = ComplexAvgPooling2D()
+    finally:
+        complex_layers.set_representation('complex')
+    split_model.set_weights(reference.get_weights())
+    # The model input is split as well, complex data is converted at the boundary (a bitcast)
+    split_x = complex_layers.complex_to_split(x)
+    assert split_model.input.shape.as_list() == [None, 8, 8, 3, 2]
+    outputs = split_model(split_x, training=False)
+    assert outputs.dtype == tf.float32 and outputs.shape == (4, 5, 2)
+    assert np.allclose(complex_layers.split_to_complex(outputs).numpy(), reference(x, training=False).numpy(),
+                       atol=1e-4)
+    # Split layers take split inputs only
+    outputs = split_pooling(split_x)
+    assert outputs.shape == (4, 4, 4, 3, 2)
+    assert np.allclose(complex_layers.split_to_complex(outputs).numpy(), ComplexAvgPooling2D()(x).numpy())
+    try:
+        split_pooling(x)
+        assert False, "Split layers take split inputs"
+    except ValueError:
+        pass
+    # The representation of a layer is a constructor argument saved in its config
+    layer = ComplexConv2D(4, 3, representation='split')
+    assert layer.get_config()['representation'] == 'split'
+    assert ComplexConv2D.from_config(layer.get_config())(split_x).shape == (4, 6, 6, 4, 2)
+    assert ComplexConv2D(4, 3).get_config()['representation'] == 'complex'
+    cloned = tf.keras.models.clone_model(split_model)
+    cloned.set_weights(split_model.get_weights())
+    assert np.allclose(cloned(split_x, training=False).numpy(), split_model(split_x, training=False).numpy())
+    try:
+        complex_layers.set_representation('polar')
+        assert False, "Unknown representation"
+    except ValueError:
+        pass
+    try:
+        ComplexDense(5, representation='polar')
+        assert False, "Unknown representation"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def shape_layers():
+    x = tf.cast(_random_complex((2, 6, 8, 3)), tf.complex128)
+    y = tf.cast(_random_complex((2, 6, 8, 2)), tf.complex128)
+    x_np, y_np = x.numpy(), y.numpy()
+    expected = {
+        'flatten': x_np.reshape((2, -1)),
+        'reshape': x_np.reshape((2, 8, 6, 3)),
+        'permute': np.transpose(x_np, (0, 2, 1, 3)),
+        'cropping': x_np[:, 1:-2, :-3],
+        'padding': np.pad(x_np, [[0, 0], [1, 0], [2, 1], [0, 0]]),
+        'concatenate': np.concatenate([x_np, y_np], axis=-1)
+    }
+
+    def apply(representation):
+        convert = complex_layers.complex_to_split if representation == 'split' else tf.identity
+        complex_layers.set_representation(representation)
+        try:
+            # Layers take inputs in their representation
+            return {
+                'flatten': ComplexFlatten()(convert(x)),
+                'reshape': complex_layers.ComplexReshape((8, -1, 3))(convert(x)),
+                'permute': complex_layers.ComplexPermute((2, 1, 3))(convert(x)),
+                'cropping': complex_layers.ComplexCropping2D(((1, 2), (0, 3)))(convert(x)),
+                'padding': complex_layers.ComplexZeroPadding2D(((1, 0), (2, 1)))(convert(x)),
+                'concatenate': complex_layers.complex_concatenate([convert(x), convert(y)])
+            }
+        finally:
+            complex_layers.set_representation('complex')
+    for name, result in apply('complex').items():
+        assert result.dtype == tf.complex128, f"{name} changed the dtype to {result.dtype}"
+        assert np.array_equal(result.numpy(), expected[name]), name
+    for name, result in apply('split').items():
+        assert result.dtype == tf.float64 and result.shape[-1] == 2, name
+        assert np.array_equal(complex_layers.split_to_complex(result).numpy(), expected[name]), name
+    # Concatenating split inputs along a positive axis
+    complex_layers.set_representation('split')
+    try:
+        concat = complex_layers.ComplexConcatenate(axis=1)
+    finally:
+        complex_layers.set_representation('complex')
+    result = concat([complex_layers.complex_to_split(x), complex_layers.complex_to_split(x)])
+    assert np.array_equal(complex_layers.split_to_complex(result).numpy(), np.concatenate([x_np, x_np], axis=1))
+    assert concat.get_config()['axis'] == 1
+    assert complex_layers.ComplexReshape((4, 3)).get_real_equivalent().target_shape == (4, 6)
+    assert complex_layers.ComplexReshape((4, -1)).get_real_equivalent().target_shape == (4, -1)
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_gauss_method():
+    x = _random_complex((2, 16, 3))
+    _assert_same_output(complex_layers.ComplexConv1D(4, 3, padding='same'),
+                        complex_layers.ComplexConv1D(4, 3, padding='same', conv_method='gauss'), x)
+    x = _random_complex((2, 12, 12, 3))
+    _assert_same_output(ComplexConv2D(5, 3, strides=2),
+                        ComplexConv2D(5, 3, strides=2, conv_method='gauss'), x)
+    x = _random_complex((2, 6, 6, 6, 2))
+    _assert_same_output(complex_layers.ComplexConv3D(3, 2, padding='same'),
+                        complex_layers.ComplexConv3D(3, 2, padding='same', conv_method='gauss'), x)
+    assert ComplexConv2D(5, 3, conv_method='gauss').get_config()['conv_method'] == 'gauss'
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_block_method():
+    x = _random_complex((2, 16, 3))
+    _assert_same_output(complex_layers.ComplexConv1D(4, 3, dilation_rate=2),
+                        complex_layers.ComplexConv1D(4, 3, dilation_rate=2, conv_method='block'), x)
+    x = _random_complex((2, 12, 12, 3))
+    _assert_same_output(ComplexConv2D(5, 3, padding='same'),
+                        ComplexConv2D(5, 3, padding='same', conv_method='block'), x)
+    x = _random_complex((2, 6, 6, 6, 2))
+    _assert_same_output(complex_layers.ComplexConv3D(3, 2, strides=2),
+                        complex_layers.ComplexConv3D(3, 2, strides=2, conv_method='block'), x)
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_winograd_method():
+    for conv_method in ['winograd', 'winograd_f4']:
+        for shape, padding in [((2, 9, 13, 3), 'valid'), ((2, 8, 8, 4), 'same'), ((1, 3, 3, 2), 'valid')]:
+            x = _random_complex(shape)
+            _assert_same_output(ComplexConv2D(5, 3, padding=padding),
+                                ComplexConv2D(5, 3, padding=padding, conv_method=conv_method), x, atol=1e-3)
+        x = tf.random.normal((2, 10, 10, 3))
+        _assert_same_output(ComplexConv2D(4, 3, dtype=np.float32),
+                            ComplexConv2D(4, 3, dtype=np.float32, conv_method=conv_method), x, atol=1e-3)
+    layer = ComplexConv2D(5, 3, padding='same', conv_method='winograd')
+    layer(_random_complex((2, 8, 8, 4)))
+    complex_layers.freeze(layer)
+    _assert_same_output(ComplexConv2D(5, 3, padding='same'), layer, _random_complex((2, 8, 8, 4)), atol=1e-3)
+    try:
+        ComplexConv2D(5, 3, strides=2, conv_method='winograd')
+        assert False, "Winograd is only supported for strides 1"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_groups():
+    x = _random_complex((2, 10, 10, 6))
+    grouped = ComplexConv2D(9, 3, groups=3)
+    y = grouped(x)
+    kernel_r, kernel_i, bias_r, bias_i = grouped.get_weights()
+    expected = []
+    for g in range(3):
+        layer = ComplexConv2D(3, 3)
+        layer(x[..., 2 * g:2 * g + 2])
+        layer.set_weights([kernel_r[..., 3 * g:3 * g + 3], kernel_i[..., 3 * g:3 * g + 3],
+                           bias_r[3 * g:3 * g + 3], bias_i[3 * g:3 * g + 3]])
+        expected.append(layer(x[..., 2 * g:2 * g + 2]))
+    assert np.allclose(tf.concat(expected, axis=-1).numpy(), y.numpy(), atol=1e-5)
+    for conv_method in ['gauss', 'block', 'fft']:
+        _assert_same_output(grouped, ComplexConv2D(9, 3, groups=3, conv_method=conv_method), x, atol=1e-3)
+    x = _random_complex((2, 12, 4))
+    _assert_same_output(complex_layers.ComplexConv1D(6, 3, groups=2, padding='causal'),
+                        complex_layers.ComplexConv1D(6, 3, groups=2, padding='causal', conv_method='block'), x)
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_known_zero_parts():
+    x = tf.random.normal((2, 9, 9, 3))
+    # Real layers: a single real convolution
+    conv = ComplexConv2D(4, 3, padding='same', dtype=tf.float32)
+    y = conv(x)
+    assert y.dtype == tf.float32
+    expected = tf.nn.bias_add(tf.nn.convolution(x, conv.kernel, padding='SAME'), conv.bias)
+    assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+    # Real inputs of complex layers: same outputs as the complex (zero imaginary part) inputs
+    complex_x = tf.cast(x, tf.complex64)
+    for layer in [ComplexConv2D(4, 3), ComplexConv2D(4, 3, conv_method='gauss'),
+                  ComplexConv2D(4, 3, conv_method='block'),
+                  complex_layers.ComplexSeparableConv2D(4, 3, depth_multiplier=2),
+                  complex_layers.ComplexConv2DTranspose(4, 3, strides=2),
+                  complex_layers.ComplexConv2DTranspose(4, 3, strides=2, conv_method='block')]:
+        expected = layer(complex_x)
+        y = layer(x)
+        assert y.dtype == tf.complex64, f"{layer.name} outputs {y.dtype}"
+        assert np.allclose(y.numpy(), expected.numpy(), atol=1e-4), layer.name
+    # Only the real part is computed when the activation discards the imaginary part
+    x = _random_complex((2, 9, 9, 3))
+    for linear, real in [(ComplexConv2D(4, 3), ComplexConv2D(4, 3, activation='cast_to_real')),
+                         (ComplexConv2D(4, 3, conv_method='block'),
+                          ComplexConv2D(4, 3, conv_method='block', activation='cast_to_real')),
+                         (complex_layers.ComplexConv2DTranspose(4, 3),
+                          complex_layers.ComplexConv2DTranspose(4, 3, activation='cast_to_real'))]:
+        expected = linear(x)
+        real(x)
+        real.set_weights(linear.get_weights())
+        for inputs, expected_outputs in [(x, expected), (tf.math.real(x), linear(tf.math.real(x)))]:
+            y = real(inputs)
+            assert y.dtype == tf.float32
+            assert np.allclose(y.numpy(), tf.math.real(expected_outputs).numpy(), atol=1e-4), real.name
+
+
+@tf.autograph.experimental.do_not_convert
+def depthwise_and_separable_conv():
+    x = _random_complex((2, 11, 11, 3))
+    depthwise = complex_layers.ComplexDepthwiseConv2D(3, depth_multiplier=2, padding='same')
+    y = depthwise(x)
+    assert y.shape == (2, 11, 11, 6)
+    # Same as a convolution with one group per input channel
+    kernel_r, kernel_i, bias_r, bias_i = depthwise.get_weights()
+    grouped = ComplexConv2D(6, 3, groups=3, padding='same')
+    grouped(x)
+    grouped.set_weights([kernel_r.reshape((3, 3, 1, 6)), kernel_i.reshape((3, 3, 1, 6)), bias_r, bias_i])
+    assert np.allclose(grouped(x).numpy(), y.numpy(), atol=1e-5)
+    _assert_same_output(depthwise, complex_layers.ComplexDepthwiseConv2D(3, depth_multiplier=2, padding='same',
+                                                                         conv_method='gauss'), x)
+    separable = complex_layers.ComplexSeparableConv2D(4, 3, depth_multiplier=2, strides=2)
+    y = separable(x)
+    depthwise_r, depthwise_i, pointwise_r, pointwise_i, bias_r, bias_i = separable.get_weights()
+    depthwise = complex_layers.ComplexDepthwiseConv2D(3, depth_multiplier=2, strides=2, use_bias=False)
+    pointwise = ComplexConv2D(4, 1)
+    pointwise(depthwise(x))
+    depthwise.set_weights([depthwise_r, depthwise_i])
+    pointwise.set_weights([pointwise_r, pointwise_i, bias_r, bias_i])
+    assert np.allclose(pointwise(depthwise(x)).numpy(), y.numpy(), atol=1e-5)
+    _assert_same_output(separable, complex_layers.ComplexSeparableConv2D(4, 3, depth_multiplier=2, strides=2,
+                                                                         conv_method='gauss'), x)
+    real_equivalent = separable.get_real_equivalent()
+    assert real_equivalent.my_dtype == tf.float32
+    config = separable.get_config()
+    assert config['depth_multiplier'] == 2 and 'groups' not in config
+    try:
+        complex_layers.ComplexDepthwiseConv2D(3, conv_method='block')
+        assert False, "block method is not supported for depthwise convolutions"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_2_plus_1_d():
+    x = _random_complex((2, 7, 9, 9, 3))
+    for kwargs in [{'padding': 'same'}, {'strides': (2, 1, 2)}, {'dilation_rate': 2, 'padding': 'same'}]:
+        factorized = complex_layers.ComplexConv2Plus1D(4, 3, intermediate_filters=5, **kwargs)
+        y = factorized(x)
+        spatial_r, spatial_i, depth_r, depth_i, bias_r, bias_i = factorized.get_weights()
+        # Equivalent full 3D kernel
+        kernel = np.einsum('hwcm,dmf->dhwcf', spatial_r + 1j * spatial_i, depth_r + 1j * depth_i)
+        full = complex_layers.ComplexConv3D(4, 3, **kwargs)
+        full(x)
+        full.set_weights([kernel.real, kernel.imag, bias_r, bias_i])
+        expected = full(x)
+        assert y.shape == expected.shape
+        assert np.allclose(expected.numpy(), y.numpy(), atol=1e-4)
+        _assert_same_output(factorized, complex_layers.ComplexConv2Plus1D(4, 3, intermediate_filters=5,
+                                                                          conv_method='gauss', **kwargs), x)
+    default = complex_layers.ComplexConv2Plus1D(8, 3)
+    default(x)
+    assert default.spatial_kernel_r.shape[-1] == 27 * 3 * 8 // (9 * 3 + 3 * 8)
+    assert default.get_config()['intermediate_filters'] is None
+    try:
+        complex_layers.ComplexConv2Plus1D(8, 3, groups=2)
+        assert False, "groups are not supported"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_1d_streaming():
+    x = _random_complex((2, 30, 3))
+    stack = [complex_layers.ComplexConv1D(4, 3, padding='causal', activation='cart_relu'),
+             complex_layers.ComplexConv1D(5, 2, padding='causal', dilation_rate=4),
+             complex_layers.ComplexConv1D(2, 1, padding='causal')]
+    expected = x
+    for layer in stack:
+        expected = layer(expected)
+        layer.reset_stream(batch_size=2)
+    # Sample by sample
+    outputs = []
+    for t in range(x.shape[1]):
+        y = x[:, t]
+        for layer in stack:
+            y = layer.stream_step(y)
+        outputs.append(y)
+    assert np.allclose(expected.numpy(), tf.stack(outputs, axis=1).numpy(), atol=1e-5)
+    # By chunks, after a reset
+    for layer in stack:
+        layer.reset_stream(batch_size=2)
+    outputs = []
+    for start in range(0, x.shape[1], 7):
+        y = x[:, start:start + 7]
+        for layer in stack:
+            y = layer.stream_step(y)
+        outputs.append(y)
+    assert np.allclose(expected.numpy(), tf.concat(outputs, axis=1).numpy(), atol=1e-5)
+    assert len(stack[0].get_weights()) == 4         # The buffer is not a weight
+    # Split frames of a single sample have the same rank as complex frames of several samples
+    complex_layers.set_representation('split')
+    try:
+        split_layer = complex_layers.ComplexConv1D(4, 3, padding='causal')
+    finally:
+        complex_layers.set_representation('complex')
+    expected = split_layer(complex_layers.complex_to_split(x))
+    split_layer.reset_stream(batch_size=2)
+    outputs = [split_layer.stream_step(complex_layers.complex_to_split(x[:, t])) for t in range(x.shape[1])]
+    assert outputs[0].shape == (2, 4, 2)
+    assert np.allclose(expected.numpy(), tf.stack(outputs, axis=1).numpy(), atol=1e-5)
+    try:
+        complex_layers.ComplexConv1D(4, 3, padding='same').reset_stream()
+        assert False, "Streaming requires causal padding"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def conv_fft_method():
+    x = _random_complex((2, 40, 3))
+    _assert_same_output(complex_layers.ComplexConv1D(4, 9, padding='same'),
+                        complex_layers.ComplexConv1D(4, 9, padding='same', conv_method='fft'), x, atol=1e-3)
+    _assert_same_output(complex_layers.ComplexConv1D(4, 5, strides=3, dilation_rate=1),
+                        complex_layers.ComplexConv1D(4, 5, strides=3, conv_method='fft'), x, atol=1e-3)
+    _assert_same_output(complex_layers.ComplexConv1D(4, 5, dilation_rate=3, padding='causal'),
+                        complex_layers.ComplexConv1D(4, 5, dilation_rate=3, padding='causal', conv_method='fft'),
+                        x, atol=1e-3)
+    x = _random_complex((2, 20, 20, 3))
+    _assert_same_output(ComplexConv2D(5, 7, padding='same', strides=2),
+                        ComplexConv2D(5, 7, padding='same', strides=2, conv_method='fft'), x, atol=1e-3)
+    _assert_same_output(ComplexConv2D(5, 9), ComplexConv2D(5, 9, conv_method='auto'), x, atol=1e-3)
+    # Cached kernel FFT must follow weight updates
+    reference = ComplexConv2D(2, 8)
+    layer = ComplexConv2D(2, 8, conv_method='fft')
+    layer(x)
+    complex_layers.freeze(layer)
+    layer(x)
+    _assert_same_output(reference, layer, x, atol=1e-3)
+    # One kernel FFT is kept per input shape, up to FFT_CACHE_SIZE shapes
+    for size in range(10, 17):
+        x = _random_complex((1, size, size, 3))
+        assert np.allclose(reference(x).numpy(), layer(x).numpy(), atol=1e-3)
+    assert len(layer._weights_cache['fft_kernels']) == complex_layers.convolutional.FFT_CACHE_SIZE
+    complex_layers.unfreeze(layer)
+
+
 @tf.autograph.experimental.do_not_convert
 def normalize_img(image, label):
     """Normalizes images: `uint8` -> `float32`."""
@@ -231,6 +738,150 @@ def complex_max_pool_2d(test_unpool=True):
     assert np.all(max_pool_2d(x) == complex_max_pool_2d(x))
 
 
+def _reference_max_pool_2d(x, pool_size, strides, padding):
+    """Max pooling ranking on the absolute value computed with tf.nn.max_pool_with_argmax."""
+    _, argmax = tf.nn.max_pool_with_argmax(tf.math.abs(x), ksize=pool_size, strides=strides, padding=padding.upper(),
+                                           include_batch_in_index=True)
+    return tf.reshape(tf.gather(tf.reshape(x, [-1]), argmax), tf.shape(argmax)), argmax
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_max_pool_nd():
+    x = _random_complex((2, 9, 8, 3))
+    weights = _random_complex((2, 9, 8, 3))
+    for pool_size, strides, padding in [(2, 2, 'valid'), (3, 2, 'same'), (2, 1, 'valid'), (3, 3, 'same')]:
+        expected, expected_argmax = _reference_max_pool_2d(x, pool_size, strides, padding)
+        result, argmax = ComplexMaxPooling2DWithArgmax(pool_size, strides, padding=padding)(x)
+        assert np.all(result.numpy() == expected.numpy())
+        assert argmax.dtype == tf.int64 and np.all(argmax.numpy() == expected_argmax.numpy())
+        # The gradient only flows to the selected positions
+        layer = ComplexMaxPooling2D(pool_size, strides, padding=padding)
+        with tf.GradientTape(persistent=True) as tape:
+            tape.watch(x)
+            loss = tf.reduce_sum(tf.math.real(layer(x) * weights[:, :expected.shape[1], :expected.shape[2]]))
+            expected_loss = tf.reduce_sum(tf.math.real(
+                _reference_max_pool_2d(x, pool_size, strides, padding)[0] *
+                weights[:, :expected.shape[1], :expected.shape[2]]))
+        assert np.allclose(tape.gradient(loss, x).numpy(), tape.gradient(expected_loss, x).numpy())
+    # channels_first
+    result = ComplexMaxPooling2D(3, 2, padding='same', data_format='channels_first')(tf.transpose(x, [0, 3, 1, 2]))
+    assert np.all(tf.transpose(result, [0, 2, 3, 1]).numpy() == _reference_max_pool_2d(x, 3, 2, 'same')[0].numpy())
+    # 1D and 3D: the maxima of the magnitudes are selected
+    for layer, keras_layer, shape in [
+        (complex_layers.ComplexMaxPooling1D(3, 2, padding='same'),
+         tf.keras.layers.MaxPooling1D(3, 2, padding='same'), (2, 11, 3)),
+        (complex_layers.ComplexMaxPooling3D((2, 2, 2)), tf.keras.layers.MaxPooling3D((2, 2, 2)), (2, 6, 5, 4, 3))
+    ]:
+        x = _random_complex(shape)
+        result = layer(x)
+        assert result.dtype == tf.complex64
+        assert np.allclose(tf.math.abs(result).numpy(), keras_layer(tf.math.abs(x)).numpy())
+        # Real inputs use the keras max pooling
+        assert np.all(layer(tf.math.real(x)).numpy() == keras_layer(tf.math.real(x)).numpy())
+    assert not hasattr(ComplexMaxPooling2D(), 'argmax')
+
+
+@tf.autograph.experimental.do_not_convert
+def compact_argmax_unpooling():
+    x = _random_complex((2, 9, 8, 3))
+    for pool_size, strides, padding in [(2, 2, 'valid'), (3, 2, 'same'), (2, 1, 'valid')]:
+        values, flat_argmax = ComplexMaxPooling2DWithArgmax(pool_size, strides, padding=padding)(x)
+        compact_values, window_argmax = ComplexMaxPooling2DWithArgmax(pool_size, strides, padding=padding,
+                                                                      argmax_format='window')(x)
+        assert window_argmax.dtype == tf.uint8 and window_argmax.shape == flat_argmax.shape
+        assert np.all(compact_values.numpy() == values.numpy())
+        expected = ComplexUnPooling2D(x.shape[1:])([values, flat_argmax])
+        unpooled = ComplexUnPooling2D(x.shape[1:], pool_size=pool_size, strides=strides,
+                                      padding=padding)([compact_values, window_argmax])
+        assert np.allclose(unpooled.numpy(), expected.numpy())
+    # channels_first
+    x_t = tf.transpose(x, [0, 3, 1, 2])
+    values, argmax = ComplexMaxPooling2DWithArgmax(3, 2, padding='same', data_format='channels_first',
+                                                   argmax_format='window')(x_t)
+    unpooled = ComplexUnPooling2D(x_t.shape[1:], pool_size=3, strides=2, padding='same',
+                                  data_format='channels_first')([values, argmax])
+    values, argmax = ComplexMaxPooling2DWithArgmax(3, 2, padding='same')(x)
+    expected = ComplexUnPooling2D(x.shape[1:])([values, argmax])
+    assert np.allclose(tf.transpose(unpooled, [0, 2, 3, 1]).numpy(), expected.numpy())
+    # The output shape is computed from the pooling geometry
+    x = _random_complex((2, 8, 6, 3))
+    values, argmax = ComplexMaxPooling2DWithArgmax(argmax_format='window')(x)
+    unpooled = ComplexUnPooling2D(pool_size=2)([values, argmax])
+    values, argmax = ComplexMaxPooling2DWithArgmax()(x)
+    assert np.allclose(unpooled.numpy(), ComplexUnPooling2D(x.shape[1:])([values, argmax]).numpy())
+    try:
+        ComplexUnPooling2D(upsampling_factor=2)([values, tf.cast(argmax, tf.uint8)])
+        assert False, "Window indices need the pool_size"
+    except ValueError:
+        pass
+    try:
+        ComplexMaxPooling2DWithArgmax(argmax_format='global')
+        assert False, "Unknown argmax format"
+    except ValueError:
+        pass
+
+
+@tf.autograph.experimental.do_not_convert
+def unpooling_nd():
+    x = _random_complex((2, 9, 8, 3))
+    for pool_size, strides, padding in [(2, 2, 'valid'), (3, 2, 'same'), (2, 1, 'valid')]:
+        values, argmax = ComplexMaxPooling2DWithArgmax(pool_size, strides, padding=padding)(x)
+        weights = _random_complex(x.shape)
+        # Flat indices with the pooling geometry are unpooled window by window, summing overlaps in a fixed order
+        unpooling = ComplexUnPooling2D(x.shape[1:], pool_size=pool_size, strides=strides, padding=padding)
+        expected_unpooling = ComplexUnPooling2D(x.shape[1:])
+        with tf.GradientTape(persistent=True) as tape:
+            tape.watch(values)
+            unpooled = unpooling([values, argmax])
+            expected = expected_unpooling([values, argmax])
+            loss = tf.reduce_sum(tf.math.real(unpooled * weights))
+            expected_loss = tf.reduce_sum(tf.math.real(expected * weights))
+        assert np.allclose(unpooled.numpy(), expected.numpy())
+        assert np.allclose(tape.gradient(loss, values).numpy(), tape.gradient(expected_loss, values).numpy())
+    # channels_first with flat indices
+    x_t = tf.transpose(x, [0, 3, 1, 2])
+    values, argmax = ComplexMaxPooling2DWithArgmax(3, 2, padding='same', data_format='channels_first')(x_t)
+    unpooled = ComplexUnPooling2D(x_t.shape[1:], pool_size=3, strides=2, padding='same',
+                                  data_format='channels_first')([values, argmax])
+    values, argmax = ComplexMaxPooling2DWithArgmax(3, 2, padding='same')(x)
+    expected = ComplexUnPooling2D(x.shape[1:])([values, argmax])
+    assert np.allclose(tf.transpose(unpooled, [0, 2, 3, 1]).numpy(), expected.numpy())
+    # The output shape is static, computed from the upsampling factor
+    x = _random_complex((2, 8, 6, 3))
+    values, argmax = ComplexMaxPooling2DWithArgmax()(x)
+    unpooled = ComplexUnPooling2D(upsampling_factor=2)([values, argmax])
+    assert unpooled.shape == x.shape
+    assert np.allclose(unpooled.numpy(), ComplexUnPooling2D(x.shape[1:])([values, argmax]).numpy())
+    # upsampling_factor does not set the pooling geometry: 'same' pooling of 5x5 gives 3x3, not 5x5 / 2
+    x = _random_complex((2, 5, 5, 3))
+    values, argmax = ComplexMaxPooling2DWithArgmax(padding='same')(x)
+    unpooled = ComplexUnPooling2D(desired_output_shape=x.shape[1:], upsampling_factor=2)([values, argmax])
+    assert np.allclose(unpooled.numpy(), ComplexUnPooling2D(x.shape[1:])([values, argmax]).numpy())
+    try:
+        ComplexUnPooling2D(x.shape[1:], pool_size=2)([values, argmax])
+        assert False, "'valid' pooling of 5x5 does not give 3x3"
+    except ValueError:
+        pass
+    # The real equivalent keeps the output shape
+    assert ComplexUnPooling2D(x.shape[1:]).get_real_equivalent().desired_output_shape == tuple(x.shape[1:])
+    # 1D and 3D: max pooling the unpooled values gives them back
+    for unpooling, pooling, shape, window in [
+        (complex_layers.ComplexUnPooling1D(pool_size=2), complex_layers.ComplexMaxPooling1D(2), (2, 5, 3), 2),
+        (complex_layers.ComplexUnPooling3D(pool_size=(2, 2, 1)), complex_layers.ComplexMaxPooling3D((2, 2, 1)),
+         (2, 3, 2, 4, 3), 4)
+    ]:
+        values = _random_complex(shape)
+        offsets = tf.constant(np.random.randint(window, size=shape), dtype=tf.uint8)
+        unpooled = unpooling([values, offsets])
+        assert unpooled.shape[1:-1] == tuple(length * pool for length, pool in zip(shape[1:-1], unpooling.pool_size))
+        assert np.all(pooling(unpooled).numpy() == values.numpy())
+    try:
+        complex_layers.ComplexUnPooling1D((8, 8, 3))
+        assert False, "desired_output_shape of a 1D unpooling is of size 2"
+    except ValueError:
+        pass
+
+
 def new_max_unpooling_2d_test():
     img = get_img()
     new_imag = tf.stack((img.reshape((2, 3, 3)), img.reshape((2, 3, 3))), axis=-1)
@@ -295,6 +946,38 @@ def complex_polar_avg_pool():
 
 
 
+def _reference_polar_avg_pool(x, pool_size: int, renormalize: bool):
+    """Non overlapping 'valid' polar average pooling with numpy trigonometric functions."""
+    batch, height, width, channels = x.shape
+    windows = x[:, :height // pool_size * pool_size, :width // pool_size * pool_size]
+    windows = windows.reshape(batch, height // pool_size, pool_size, width // pool_size, pool_size, channels)
+    magnitude = np.mean(np.abs(windows), axis=(2, 4))
+    phasor = np.mean(np.exp(1j * np.angle(windows)), axis=(2, 4))
+    if renormalize:
+        return magnitude * np.exp(1j * np.angle(phasor))
+    return magnitude * phasor
+
+
+@tf.autograph.experimental.do_not_convert
+def complex_circular_avg_pool():
+    x = _random_complex((2, 7, 6, 3)).numpy()
+    for layer_class, renormalize in [(ComplexPolarAvgPooling2D, True),
+                                     (complex_layers.ComplexCircularAvgPooling2D, False)]:
+        expected = _reference_polar_avg_pool(x, 2, renormalize)
+        assert np.allclose(layer_class()(x).numpy(), expected, atol=1e-5)
+        # channels_first
+        result = layer_class(data_format='channels_first')(np.transpose(x, [0, 3, 1, 2]))
+        assert np.allclose(np.transpose(result.numpy(), [0, 2, 3, 1]), expected, atol=1e-5)
+    # Phases cancelling out
+    img = np.array([1, 1j, -1, -1j]).reshape((1, 2, 2, 1)).astype(np.complex64)
+    assert np.allclose(ComplexPolarAvgPooling2D()(img).numpy(), 1.)
+    assert np.allclose(complex_layers.ComplexCircularAvgPooling2D()(img).numpy(), 0.)
+    # Real inputs are average pooled
+    real = np.real(x)
+    assert np.allclose(complex_layers.ComplexCircularAvgPooling2D()(real).numpy(),
+                       tf.keras.layers.AveragePooling2D()(real).numpy())
+
+
 @tf.autograph.experimental.do_not_convert
 def complex_conv_2d_transpose():
     value = [[1, 2, 1], [2, 1, 2], [1, 1, 2]]
@@ -322,6 +1005,30 @@ def complex_conv_2d_transpose():
     assert complex_transpose(complex_input).dtype == tf.complex64
 
 
+@tf.autograph.experimental.do_not_convert
+def conv_2d_transpose_methods():
+    x = _random_complex((2, 5, 6, 3))
+    for conv_method in ['gauss', 'block']:
+        _assert_same_output(ComplexConv2DTranspose(4, 3, strides=2, padding='same'),
+                            ComplexConv2DTranspose(4, 3, strides=2, padding='same', conv_method=conv_method), x)
+        _assert_same_output(ComplexConv2DTranspose(4, 3, dilation_rate=2),
+                            ComplexConv2DTranspose(4, 3, dilation_rate=2, conv_method=conv_method), x)
+    # An explicit output_padding disables the sub-pixel path without changing the output
+    for conv_method in ['standard', 'gauss', 'block']:
+        _assert_same_output(ComplexConv2DTranspose(4, 2, strides=2, output_padding=0),
+                            ComplexConv2DTranspose(4, 2, strides=2, conv_method=conv_method), x)
+        _assert_same_output(ComplexConv2DTranspose(4, (2, 3), strides=(2, 3), output_padding=0),
+                            ComplexConv2DTranspose(4, (2, 3), strides=(2, 3), padding='same',
+                                                   conv_method=conv_method), x)
+    layer = ComplexConv2DTranspose(4, 2, strides=2, conv_method='block')
+    assert layer.get_config()['conv_method'] == 'block'
+    try:
+        ComplexConv2DTranspose(4, 2, conv_method='fft')
+        assert False, "fft is not supported by ComplexConv2DTranspose"
+    except ValueError:
+        pass
+
+
 @tf.autograph.experimental.do_not_convert
 def upsampling_near_neighbour():
     input_shape = (2, 2, 1, 3)
@@ -530,7 +1237,11 @@ def batch_norm():
 
 def pooling_layers():
     complex_polar_avg_pool()
+    complex_circular_avg_pool()
     complex_max_pool_2d()
+    complex_max_pool_nd()
+    compact_argmax_unpooling()
+    unpooling_nd()
     complex_avg_pool_1d()
     complex_avg_pool()
 
@@ -542,8 +1253,26 @@ def test_layers():
     batch_norm()
     upsampling()
     complex_conv_2d_transpose()
+    conv_2d_transpose_methods()
     shape_ad_dtype_of_conv2d()
+    conv_gauss_method()
+    conv_block_method()
+    conv_fft_method()
+    conv_1d_streaming()
+    conv_winograd_method()
+    conv_groups()
+    depthwise_and_separable_conv()
+    conv_known_zero_parts()
+    conv_2_plus_1_d()
     dense_example()
+    dense_gauss_method()
+    dense_packed_method()
+    frozen_inference()
+    low_rank_dense()
+    unitary_dense()
+    sparse_dense()
+    split_representation()
+    shape_layers()
 
 
 if __name__ == "__main__":
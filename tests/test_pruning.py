@@ -0,0 +1,90 @@
+import numpy as np
+import tensorflow as tf
+from cvnn import layers
+from cvnn.pruning import prune_low_magnitude, get_sparsity, prunable_weights, to_sparse, \
+    PruneLowMagnitude, PolynomialDecaySparsity, ConstantSparsity
+
+
+def _random_complex(shape):
+    return (np.random.normal(size=shape) + 1j * np.random.normal(size=shape)).astype(np.complex64)
+
+
+def _model():
+    inputs = layers.complex_input(shape=(12, 12, 2))
+    h = layers.ComplexConv2D(6, 3, padding='same', strides=2, activation='cart_relu')(inputs)
+    h = layers.ComplexConv2D(4, 3, dilation_rate=2)(h)
+    h = layers.ComplexFlatten()(h)
+    outputs = layers.ComplexDense(5, activation='cart_relu')(h)
+    return tf.keras.Model(inputs=inputs, outputs=outputs)
+
+
+def test_prune_low_magnitude():
+    model = _model()
+    x = _random_complex((3, 12, 12, 2))
+    model(x)
+    magnitudes = [np.abs(r.numpy() + 1j * i.numpy()) for r, i in prunable_weights(model)]
+    prune_low_magnitude(model, 0.75)
+    assert np.isclose(get_sparsity(model), 0.75, atol=0.01)
+    for (kernel_r, kernel_i), magnitude in zip(prunable_weights(model), magnitudes):
+        # Real and imaginary parts are pruned together, the largest magnitudes are kept
+        assert np.all((kernel_r.numpy() == 0) == (kernel_i.numpy() == 0))
+        kept = kernel_r.numpy() != 0
+        assert magnitude[kept].min() >= magnitude[~kept].max()
+
+
+def test_schedules():
+    schedule = PolynomialDecaySparsity(0.8, begin_step=10, end_step=110, frequency=20)
+    assert schedule(0) is None and schedule(11) is None and schedule(200) is None
+    assert schedule(10) == 0. and np.isclose(schedule(110), 0.8)
+    assert schedule(30) < schedule(50) < schedule(70)
+    schedule = ConstantSparsity(0.5, frequency=5)
+    assert schedule(0) == 0.5 and schedule(3) is None and schedule(1000) == 0.5
+
+
+def test_gradual_pruning():
+    model = _model()
+    x = _random_complex((16, 12, 12, 2))
+    y = _random_complex((16, 5))
+    model.compile(optimizer='adam', loss=lambda y_true, y_pred: tf.reduce_mean(tf.abs(y_true - y_pred)))
+    callback = PruneLowMagnitude(PolynomialDecaySparsity(0.9, begin_step=0, end_step=8, frequency=2))
+    model.fit(x, y, batch_size=4, epochs=3, callbacks=[callback], verbose=0)
+    assert np.isclose(get_sparsity(model), 0.9, atol=0.01)
+
+
+def test_to_sparse():
+    model = _model()
+    x = _random_complex((3, 12, 12, 2))
+    prune_low_magnitude(model, 0.8)
+    sparse_model = to_sparse(model)
+    assert sum(isinstance(layer, layers.ComplexSparseConv) for layer in sparse_model.layers) == 2
+    assert sum(isinstance(layer, layers.ComplexSparseDense) for layer in sparse_model.layers) == 1
+    assert np.allclose(sparse_model(x).numpy(), model(x).numpy(), atol=1e-4)
+    for layer in sparse_model.layers:
+        if isinstance(layer, (layers.ComplexSparseDense, layers.ComplexSparseConv)):
+            assert layer.density < 0.25
+    # The stored kernels shrink as the sparsity rises, well below the dense weights at 90%
+    dense = layers.ComplexDense(64)
+    dense(_random_complex((2, 64)))
+    dense_bytes = sum(np.prod(weight.shape) * weight.dtype.size for weight in dense.weights)
+    stored_bytes = []
+    for sparsity in [0.5, 0.8, 0.9, 0.95]:
+        prune_low_magnitude(dense, sparsity)
+        stored_bytes.append(layers.ComplexSparseDense.from_dense(dense).stored_bytes)
+    assert all(more > less for more, less in zip(stored_bytes[:-1], stored_bytes[1:]))
+    assert stored_bytes[0] < dense_bytes and stored_bytes[2] < dense_bytes / 4
+    # 1D causal and real-valued layers
+    model = tf.keras.Sequential([
+        layers.ComplexConv1D(4, 3, padding='causal', input_shape=(20, 3), dtype=np.float32),
+        layers.ComplexFlatten(),
+        layers.ComplexDense(2, dtype=np.float32)
+    ])
+    x = np.random.normal(size=(2, 20, 3)).astype(np.float32)
+    prune_low_magnitude(model, 0.5)
+    assert np.allclose(to_sparse(model)(x).numpy(), model(x).numpy(), atol=1e-4)
+
+
+if __name__ == '__main__':
+    test_prune_low_magnitude()
+    test_schedules()
+    test_gradual_pruning()
+    test_to_sparse()
@@ -0,0 +1,68 @@
+import numpy as np
+import tensorflow as tf
+from cvnn import layers
+from cvnn.layers.quantized import quantize_kernel, INT8_MAX
+from cvnn.quantization import calibrate, quantize_model
+
+
+def _random_complex(shape):
+    return (np.random.normal(size=shape) + 1j * np.random.normal(size=shape)).astype(np.complex64)
+
+
+def _model():
+    inputs = layers.complex_input(shape=(12, 12, 2))
+    h = layers.ComplexConv2D(6, 3, padding='same', strides=2, activation='cart_relu')(inputs)
+    h = layers.ComplexConv2D(4, 3, dilation_rate=2)(h)
+    h = layers.ComplexFlatten()(h)
+    outputs = layers.ComplexDense(5)(h)
+    return tf.keras.Model(inputs=inputs, outputs=outputs)
+
+
+def _relative_error(result, expected):
+    return np.linalg.norm(result - expected) / np.linalg.norm(expected)
+
+
+def test_quantize_kernel():
+    kernel = _random_complex((3, 3, 4, 6))
+    kernel[..., 0] *= 100.      # The scale is per output channel
+    quantized_r, quantized_i, scale = quantize_kernel(tf.math.real(kernel), tf.math.imag(kernel))
+    assert quantized_r.dtype == tf.int8 and scale.shape == (6,)
+    assert np.abs(quantized_r.numpy()).max() <= INT8_MAX and np.abs(quantized_i.numpy()).max() <= INT8_MAX
+    restored = (quantized_r.numpy() + 1j * quantized_i.numpy()) * scale.numpy()
+    assert np.all(np.abs(restored.real - kernel.real) <= scale.numpy() / 2 + 1e-6)
+    assert np.all(np.abs(restored.imag - kernel.imag) <= scale.numpy() / 2 + 1e-6)
+
+
+def test_quantize_model():
+    model = _model()
+    data = [_random_complex((4, 12, 12, 2)) for _ in range(3)]
+    ranges = calibrate(model, data)
+    assert len(ranges) == 3 and all(value > 0 for value in ranges.values())
+    quantized = quantize_model(model, tf.data.Dataset.from_tensor_slices((np.concatenate(data),
+                                                                          np.zeros((12, 5)))).batch(4))
+    assert [type(layer) for layer in quantized.layers if 'int8' in layer.name] == \
+           [layers.ComplexQuantizedConv, layers.ComplexQuantizedConv, layers.ComplexQuantizedDense]
+    assert all(weight.dtype == tf.int8 for layer in quantized.layers if 'int8' in layer.name
+               for weight in layer.weights if 'kernel_r' in weight.name or 'kernel_i' in weight.name)
+    x = data[0]
+    assert _relative_error(quantized(x).numpy(), model(x).numpy()) < 0.05
+
+
+def test_quantize_real_dense():
+    inputs = tf.keras.Input(shape=(10,))
+    outputs = layers.ComplexDense(3, dtype=np.float32)(inputs)
+    model = tf.keras.Model(inputs=inputs, outputs=outputs)
+    x = np.random.normal(size=(8, 10)).astype(np.float32)
+    quantized = quantize_model(model, [x])
+    assert _relative_error(quantized(x).numpy(), model(x).numpy()) < 0.05
+    try:
+        layers.ComplexQuantizedDense.from_dense(layers.ComplexLowRankDense(3, rank=2), input_scale=1.)
+        assert False, "Only ComplexDense layers can be quantized"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test_quantize_kernel()
+    test_quantize_model()
+    test_quantize_real_dense()
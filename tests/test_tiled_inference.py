@@ -0,0 +1,98 @@
+import os
+import tempfile
+import numpy as np
+import tensorflow as tf
+from fractions import Fraction
+from cvnn import layers
+from cvnn.tiled_inference import receptive_field, tiled_predict
+
+
+def _random_image(shape):
+    return (np.random.normal(size=shape) + 1j * np.random.normal(size=shape)).astype(np.complex64)
+
+
+def _small_unet():
+    """U-Net with 'valid' convolutions: the output is smaller than the input and skip connections are cropped."""
+    inputs = layers.complex_input(shape=(None, None, 2))
+    c0 = layers.ComplexConv2D(4, 3, activation='cart_relu')(inputs)
+    c1 = layers.ComplexMaxPooling2D(pool_size=2)(c0)
+    c2 = layers.ComplexConv2D(4, 3, activation='cart_relu')(c1)
+    c3 = layers.ComplexConv2DTranspose(4, 2, strides=2)(c2)
+    crop = tf.keras.layers.Cropping2D(cropping=(2, 2))(c0)
+    concat = tf.keras.layers.concatenate([c3, crop], axis=-1)
+    outputs = layers.ComplexConv2D(3, 3)(concat)
+    return tf.keras.Model(inputs=inputs, outputs=outputs)
+
+
+def _same_padding_model():
+    inputs = layers.complex_input(shape=(None, None, 2))
+    h = layers.ComplexConv2D(4, 5, padding='same', strides=2, activation='cart_relu')(inputs)
+    h = layers.ComplexAvgPooling2D(pool_size=2, padding='same')(h)
+    h = layers.ComplexConv2D(4, 3, padding='same', dilation_rate=2)(h)
+    h = layers.ComplexUpSampling2D(size=4)(h)
+    outputs = layers.ComplexConv2D(2, 3, padding='same')(h)
+    return tf.keras.Model(inputs=inputs, outputs=outputs)
+
+
+def test_receptive_field():
+    height, width = receptive_field(_small_unet())
+    assert height.scale == 1 and height.period == 2
+    # Output pixel o depends on the input pixels [2 * (o // 2), 2 * (o // 2) + 9]
+    assert height.offset == 0 and height.halo_left == 1 and height.halo_right == 9
+    height, width = receptive_field(_same_padding_model())
+    assert height.scale == 1 and height.period == 4
+    assert height.offset == Fraction(-10) and height.halo_left == 3 and height.halo_right == 24
+
+
+def test_tiled_predict():
+    for model in [_small_unet(), _same_padding_model()]:
+        image = _random_image((70, 53, 2))
+        geometry = receptive_field(model)
+        padded = np.pad(image, [[0, -n % g.period] for n, g in zip(image.shape[:2], geometry)] + [[0, 0]])
+        expected = model(padded[np.newaxis]).numpy()[0]
+        result = tiled_predict(model, image, tile_size=32, batch_size=3)
+        assert result.shape == expected.shape
+        assert np.allclose(result, expected, atol=1e-4)
+    # With 'valid' convolutions every tile output is exact, so overlap-add does not change them
+    model = _small_unet()
+    image = _random_image((64, 64, 2))
+    assert np.allclose(tiled_predict(model, image, tile_size=24, mode='add'), model(image[np.newaxis]).numpy()[0],
+                       atol=1e-4)
+
+
+def test_tiled_predict_memmap():
+    model = _small_unet()
+    image = _random_image((50, 40, 2))
+    with tempfile.TemporaryDirectory() as folder:
+        input_path = os.path.join(folder, "image.npy")
+        output_path = os.path.join(folder, "output.npy")
+        np.save(input_path, image)
+        result = tiled_predict(model, input_path, tile_size=20, output_path=output_path)
+        assert np.allclose(np.load(output_path), model(image[np.newaxis]).numpy()[0], atol=1e-4)
+        del result
+
+
+def test_misaligned_model():
+    inputs = layers.complex_input(shape=(None, None, 2))
+    pooled = layers.ComplexAvgPooling2D(pool_size=2)(inputs)
+    upsampled = layers.ComplexUpSampling2D(size=4)(pooled)
+    outputs = tf.keras.layers.concatenate([layers.ComplexConv2D(2, 3)(pooled), upsampled[:, ::4, ::4]])
+    model = tf.keras.Model(inputs=inputs, outputs=outputs)
+    try:
+        receptive_field(model)
+        assert False, "Concatenated tensors have different resolutions"
+    except ValueError:
+        pass
+    flatten = tf.keras.Model(inputs=inputs, outputs=layers.ComplexFlatten()(inputs))
+    try:
+        receptive_field(flatten)
+        assert False, "Flatten is not fully convolutional"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test_receptive_field()
+    test_tiled_predict()
+    test_tiled_predict_memmap()
+    test_misaligned_model()